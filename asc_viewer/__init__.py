@@ -1,5 +1,48 @@
-from asc_viewer.asc_canvas import AscCanvas, Net, Connection
+import importlib
+from asc_viewer.affine import Affine
+from asc_viewer.schematic import (
+    Schematic,
+    LoadCancelled,
+    Net,
+    Connection,
+    Wire,
+    WirePoint,
+)
 from asc_viewer.symbol import Symbol
+from asc_viewer.symbol_cache import SymbolCache
+from asc_viewer.symbol_library import SymbolLibrary
 from asc_viewer.symbol_instance import SymbolInstance, Pin
+from asc_viewer.design import Design, SubcircuitView
+from asc_viewer.netlist import NetlistWriter, write_netlist
 from asc_viewer.bounded_canvas import BoundedCanvas
-from asc_viewer.viewport import Viewport
+from asc_viewer.tile_cache import TileCache
+from asc_viewer.thumbnail_cache import ThumbnailCache
+from asc_viewer.file_watcher import FileWatcher
+from asc_viewer.profiling import Profiler, profiler
+from asc_viewer.vector_context import VectorContext
+
+# the classes that need wxPython are imported on first use, so that the headless model
+# doesn't pay for importing wx
+_gui = {
+    "AscCanvas": "asc_viewer.asc_canvas",
+    "EVT_HOVER_CHANGED": "asc_viewer.asc_canvas",
+    "EVT_LOAD_PROGRESS": "asc_viewer.asc_canvas",
+    "EVT_LOAD_DONE": "asc_viewer.asc_canvas",
+    "DrawingResources": "asc_viewer.resources",
+    "ThumbnailBrowser": "asc_viewer.thumbnail_browser",
+    "EVT_THUMBNAIL_ACTIVATED": "asc_viewer.thumbnail_browser",
+    "Viewport": "asc_viewer.viewport",
+}
+
+
+def __getattr__(name):
+    module = _gui.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_gui))
@@ -0,0 +1,80 @@
+import math
+
+
+class Affine:
+    """A 2D affine transformation in plain Python, laid out like wx.GraphicsMatrix.
+
+    A point (x, y) is mapped to (a * x + c * y + tx, b * x + d * y + ty). Like the wx
+    matrix operations, translate, rotate and concat apply the new transformation to
+    points before the existing one. Instances are immutable, every operation returns a
+    new Affine.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "tx", "ty")
+
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=1.0, tx=0.0, ty=0.0):
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.tx = tx
+        self.ty = ty
+
+    @classmethod
+    def orientation(cls, mirror, rotation):
+        """Returns the transformation of a symbol instance as stored in an asc file.
+
+        Arguments:
+        mirror -- True if the symbol is mirrored along the y axis.
+        rotation -- rotation in degrees, multiples of 90 are computed exactly.
+        """
+        if rotation % 90 == 0:
+            cos, sin = [(1, 0), (0, 1), (-1, 0), (0, -1)][rotation // 90 % 4]
+        else:
+            cos = math.cos(rotation / 180 * math.pi)
+            sin = math.sin(rotation / 180 * math.pi)
+        m = -1 if mirror else 1
+        return cls(m * cos, sin, -m * sin, cos, 0, 0)
+
+    def get(self):
+        """Returns the components (a, b, c, d, tx, ty), e.g., for gc.CreateMatrix()."""
+        return self.a, self.b, self.c, self.d, self.tx, self.ty
+
+    def concat(self, other):
+        """Returns a transformation that applies other first and then self."""
+        return Affine(
+            self.a * other.a + self.c * other.b,
+            self.b * other.a + self.d * other.b,
+            self.a * other.c + self.c * other.d,
+            self.b * other.c + self.d * other.d,
+            self.a * other.tx + self.c * other.ty + self.tx,
+            self.b * other.tx + self.d * other.ty + self.ty,
+        )
+
+    def translate(self, dx, dy):
+        return self.concat(Affine(tx=dx, ty=dy))
+
+    def rotate(self, angle):
+        """Rotates by angle in radians."""
+        cos, sin = math.cos(angle), math.sin(angle)
+        return self.concat(Affine(cos, sin, -sin, cos))
+
+    def invert(self):
+        det = self.a * self.d - self.b * self.c
+        a, b = self.d / det, -self.b / det
+        c, d = -self.c / det, self.a / det
+        return Affine(
+            a, b, c, d, -(a * self.tx + c * self.ty), -(b * self.tx + d * self.ty)
+        )
+
+    def transform_point(self, x, y):
+        return self.a * x + self.c * y + self.tx, self.b * x + self.d * y + self.ty
+
+    def __eq__(self, other):
+        return isinstance(other, Affine) and self.get() == other.get()
+
+    def __hash__(self):
+        return hash(self.get())
+
+    def __repr__(self):
+        return "Affine(%g, %g, %g, %g, %g, %g)" % self.get()
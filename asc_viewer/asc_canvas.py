@@ -1,146 +1,214 @@
 import wx
+import wx.lib.newevent
+import collections
 import math
-import glob, os
-import rtreelib as rt
+import os
+import threading
+import time
+from asc_viewer.affine import Affine
 from asc_viewer.bounded_canvas import BoundedCanvas
-from asc_viewer.symbol import Symbol, window_types
+from asc_viewer.file_watcher import FileWatcher
+from asc_viewer.profiling import profiled, profiler
+from asc_viewer.vector_context import VectorContext
+from asc_viewer.resources import DrawingResources
+from asc_viewer.schematic import (
+    Schematic,
+    LoadCancelled,
+    Net,
+    Connection,
+    WirePoint,
+    Wire,
+)
+from asc_viewer.search import SearchResults
+from asc_viewer.spatial_index import GridIndex
 from asc_viewer.symbol_instance import SymbolInstance
+from asc_viewer.symbol_library import SymbolLibrary
 from asc_viewer.viewport import Viewport
 
-# font sizes available in LTspice
-font_size_factors = [0.625, 1, 1.5, 2, 2.5, 3.5, 5, 7]
+# posted by AscCanvas when the net or instance under the mouse pointer changes, the
+# event has the attributes net and instance, either may be None. The event object of
+# this and the load events is the canvas.
+HoverChangedEvent, EVT_HOVER_CHANGED = wx.lib.newevent.NewEvent()
 
+# posted by AscCanvas.load_asc_async() while loading, the event has the attributes
+# filename, phase and count, see Schematic.load()
+LoadProgressEvent, EVT_LOAD_PROGRESS = wx.lib.newevent.NewEvent()
 
-class Net:
-    """A net as used in LtSpice."""
+# posted by AscCanvas.load_asc_async() when loading ends, the event has the attributes
+# filename, schematic (None unless it is displayed now), cancelled and error
+LoadDoneEvent, EVT_LOAD_DONE = wx.lib.newevent.NewEvent()
 
-    def __init__(self, name):
-        self.name = name
-        self.connections = []  # see Connection class below
-        self.type = None  # denotes spur type as string
-        self.wires = set()
+# image file extensions that AscCanvas.export() renders to a bitmap
+export_bitmap_types = {
+    ".png": wx.BITMAP_TYPE_PNG,
+    ".jpg": wx.BITMAP_TYPE_JPEG,
+    ".jpeg": wx.BITMAP_TYPE_JPEG,
+    ".bmp": wx.BITMAP_TYPE_BMP,
+    ".tif": wx.BITMAP_TYPE_TIFF,
+    ".tiff": wx.BITMAP_TYPE_TIFF,
+}
 
 
-class Connection:
-    """A connection between a net and an instance."""
+def _schematic_attribute(name):
+    return property(lambda self: getattr(self.schematic, name), doc=f"Schematic.{name}")
 
-    def __init__(self, instance, pin, pin_name):
-        self.instance = instance
-        self.pin = pin
-        self.pin_name = pin_name
 
-
-class WirePoint:
-    """An endpoint of a wire."""
-
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.direction = (
-            None  # direction for orientation of symbols attached to endpoints
-        )
-        self.wires = []
-        self.net = None  # is set after DFS connects wires to nets
-
-
-class Wire:
-    """A wire as drawn in LtSpice."""
-
-    def __init__(self, x0, y0, x1, y1):
-        self.x0 = x0
-        self.y0 = y0
-        self.x1 = x1
-        self.y1 = y1
-        self.net = None
+def _resource_attribute(name):
+    return property(
+        lambda self: getattr(self.resources, name), doc=f"DrawingResources.{name}"
+    )
 
 
 class AscCanvas(BoundedCanvas, Viewport):
     """Displays an LtSpice schematic.
 
+    Only elements that intersect the damaged area of the window are painted. Instances
+    are found by the area they paint, which includes pin names and window texts that
+    may reach far beyond the symbol, see instance_rect(). Rendered areas are cached as
+    bitmap tiles per zoom level, so scrolling is mostly blitting. A tile paints every
+    instance whose texts reach into it, so texts aren't cut off at tile edges. Tiles are
+    discarded when the schematic is reloaded or user paint functions or user data of
+    instances change, see invalidate() for other changes.
+
     Arguments:
     parent -- the parent window
     symbol_paths -- a list of path names where symbols are stored
     instance_name -- the instance name of this schematic, this is only useful it the schematic is an instantiated subcircuit
+    symbol_library -- a SymbolLibrary that is shared with other canvases, symbol_paths are added to it
+    resources -- the DrawingResources to paint with, by default the ones shared by all canvases
+    shared_symbols -- True to use the symbol library of the application, see SymbolLibrary.acquire(),
+                      unless symbol_library is given
     """
 
-    def __init__(self, parent, symbol_paths=[], instance_name=""):
+    def __init__(
+        self,
+        parent,
+        symbol_paths=[],
+        instance_name="",
+        symbol_library=None,
+        resources=None,
+        shared_symbols=False,
+    ):
         super().__init__(parent)
 
         self.instance_name = instance_name
-        self.symbols = {}
+        self.releases = []  # releases shared objects when the canvas is destroyed
+        if symbol_library is None:
+            if shared_symbols:
+                symbol_library = SymbolLibrary.acquire()
+                self.releases.append(SymbolLibrary.release)
+            else:
+                symbol_library = SymbolLibrary()
+        self.symbols = symbol_library
         self.filename = None
         self.load_symbols(symbol_paths)
 
-        # create some graphics primitives for later use
-        self.fonts = []
-        self.dc = wx.ClientDC(self)
-        self.gc = wx.GraphicsContext.Create(self.dc)
-        self.black_pen = wx.Pen(wx.Colour(0, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
-        self.red_pen = wx.Pen(wx.Colour(255, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
-        for i in range(len(font_size_factors)):
-            font = self.create_font(font_size_factors[i])
-            self.fonts.append(font)
-        font_size = 0.8
-        self.black_font = self.create_font(font_size, wx.BLACK)
-        self.blue_font = self.create_font(font_size, wx.BLUE)
-        self.red_font = self.create_font(font_size, wx.RED)
-        self.gray_font = self.create_font(font_size, wx.Colour(50, 50, 50, 50))
+        # pens, brushes, fonts and the graphics context that measures texts are shared
+        if resources is None:
+            resources = DrawingResources.acquire()
+            self.releases.append(DrawingResources.release)
+        self.resources = resources
+        self.gc = resources.gc
 
         self.reset()
 
         self.find_data = wx.FindReplaceData()
         self.find_dialog = None  # cannot be initialized here yet
+        self.find_query = None
+        self.find_results = SearchResults([])
+
+        self.watcher = FileWatcher()  # see watch()
+        self.load_cancel = None  # a threading.Event while load_asc_async() runs
+        self.watch_timer = None
+        self.device_transform = (
+            None,
+            None,
+        )  # (view state, Affine), see device_to_schematic()
+        self.hover_pos = None  # device position of the last unprocessed motion event
+        self.hover_box = None  # empty schematic area, see update_hover()
+        self.hover_net = None
+        self.hover_instance = None
+        self.frame_times = collections.deque(maxlen=60)  # seconds, see get_stats()
+        self.show_frame_time = False  # see set_frame_time_overlay()
+        self.overlay_refresh = False  # True while only the overlay is repainted
 
         self.Bind(wx.EVT_CHAR_HOOK, self.on_key)
         self.Bind(wx.EVT_PAINT, self.on_paint)
+        self.Bind(wx.EVT_IDLE, self.on_idle)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+
+    pen_margin = 4  # half the widest pen and junction dots, in schematic units
+    hover_radius = 5  # maximum distance between mouse pointer and a hovered wire
+    hover_box_size = 32  # edge length of an empty area that skips hover lookups
+    use_tile_cache = True  # paint from cached bitmap tiles, see TileCache
+    progress_interval = 0.1  # minimum time between LoadProgressEvents in seconds
+
+    # level of detail, below these zoom levels details are skipped that would be sub-pixel
+    lod_text_zoom = 0.5  # texts, pin names and flag labels
+    lod_junction_zoom = 0.35  # junction dots
+    lod_box_zoom = 0.25  # symbols are replaced by their extent boxes
+
+    wires = _schematic_attribute("wires")
+    wire_points = _schematic_attribute("wire_points")
+    flags = _schematic_attribute("flags")
+    texts = _schematic_attribute("texts")
+    nets = _schematic_attribute("nets")
+    symbol_instances = _schematic_attribute("symbol_instances")
+    rtree = _schematic_attribute("rtree")
+    wire_lookup = _schematic_attribute("wire_lookup")
+    flag_lookup = _schematic_attribute("flag_lookup")
+
+    fonts = _resource_attribute("fonts")
+    text_extents = _resource_attribute("text_extents")
+    black_pen = _resource_attribute("black_pen")
+    red_pen = _resource_attribute("red_pen")
+    blue_pen = _resource_attribute("blue_pen")
+    no_pen = _resource_attribute("no_pen")
+    orange_brush = _resource_attribute("orange_brush")
+    no_brush = _resource_attribute("no_brush")
+    black_font = _resource_attribute("black_font")
+    blue_font = _resource_attribute("blue_font")
+    red_font = _resource_attribute("red_font")
+    gray_font = _resource_attribute("gray_font")
 
     def reset(self):
-        self.wires = []
-        self.wire_points = {}
-        self.net_counter = 0  # for auto-labeling nets
-        self.flags = {}  # off-schematic connectors or io pins
-        self.texts = []
-        self.rtree = rt.RTree()
-        self.wire_lookup = rt.RTree()
-        self.nets = {}  # name to net
-        self.path = self.gc.CreatePath()
-        self.symbol_instances = {}
+        self.schematic = Schematic(self.symbols, self.instance_name)
+        self.flag_paths = {}  # flag position to path
+        self.text_lookup = GridIndex()  # aligned texts of the schematic
+        self.instance_lookup = GridIndex()  # instances by their painted area
+        self.instance_lookup_key = None  # the schematic and revision it was built for
 
     def load_symbols(self, symbol_paths):
-        """Loads symbols from a list of paths to asy files."""
-        if isinstance(symbol_paths, str):
-            symbol_paths = [symbol_paths]
-        for path in symbol_paths:
-            path = os.path.join(path, "*.asy")
-            filenames = glob.glob(path)
-            for f in filenames:
-                name = os.path.basename(f)[:-4]
-                self.symbols[name] = Symbol(self, f)
+        """Adds directory trees of asy files to the symbol library."""
+        self.symbols.add_paths(symbol_paths)
 
-    def create_font(self, size, color=wx.BLACK):
-        return self.gc.CreateFont(
-            wx.Font(
-                int(10 * size),
-                wx.FONTFAMILY_DEFAULT,
-                wx.FONTSTYLE_NORMAL,
-                wx.FONTWEIGHT_NORMAL,
-            ),
-            col=color,
-        )
+    def save_symbol_cache(self):
+        """Stores symbols that have been parsed since they were looked up in the symbol cache."""
+        self.symbols.save_cache()
 
-    def align_text(self, x, y, text, align, size, rotation, morig):
+    def create_font(self, size, color=wx.BLACK):
+        return self.resources.create_font(size, color)
+
+    def text_extent(self, text, size):
+        """Returns the width and height of text in an LTspice font size. Extents are
+        measured once and cached, because they don't change between paints."""
+        extent = self.text_extents.get((text, size))
+        if extent is None:
+            self.gc.SetFont(self.fonts[size])
+            w, h, d, e = self.gc.GetFullTextExtent(text)
+            profiler.count("text extents measured")
+            extent = self.text_extents[(text, size)] = (w, h)
+        return extent
+
+    def align_text(self, x, y, text, align, size, rotation, morig=Affine()):
         """Aligns text for presentation. It takes formatting inputs from the asc file,
-        i.e., rotation, alignment and matrix transformation and returns coordinates suitable
+        i.e., rotation, alignment and an Affine transformation and returns coordinates suitable
         for wx's DrawText function."""
-        m = self.gc.CreateMatrix()
-        m.Concat(morig)
-        self.gc.SetFont(self.fonts[size])
-        w, h, d, e = self.gc.GetFullTextExtent(text)
+        m = morig
+        w, h = self.text_extent(text, size)
         if align[0] == "V":
             align = align[1:]
-            m.Translate(x, y)
-            m.Rotate(math.pi / 2 * 3)
-            m.Translate(-x, -y)
+            m = m.translate(x, y).rotate(math.pi / 2 * 3).translate(-x, -y)
             rotation += 270
         if align == "Right":
             x -= w
@@ -155,342 +223,436 @@ class AscCanvas(BoundedCanvas, Viewport):
         elif align == "Center":
             x -= w / 2
             y -= h / 2
-        m.Translate(x, y)
+        m = m.translate(x, y)
 
         # the only valid text directions are right or up
         if rotation % 360 == 180 or rotation % 360 == 90:
-            m.Translate(w / 2, h / 2)
-            m.Rotate(math.pi)
-            m.Translate(-w / 2, -h / 2)
-        x1, y1 = m.TransformPoint(0, 0)
-        x2, y2 = m.TransformPoint(w, h)
+            m = m.translate(w / 2, h / 2).rotate(math.pi).translate(-w / 2, -h / 2)
+        x1, y1 = m.transform_point(0, 0)
+        x2, y2 = m.transform_point(w, h)
         return min(x1, x2), min(y1, y2), max(y1, y2)
 
-    def connect_wires(self, wire_point):
-        """Connects wires to nets using recursion."""
-        stack = [wire_point]
-        while stack:
-            wire_point = stack.pop()
-            # check for a custom net name
-            flag = self.flags.get((wire_point.x, wire_point.y))
-            if flag:
-                assert (
-                    self.net_override is None or self.net_override == flag["net"]
-                ), f"Conflicting net names are assigned: {self.net_override} and {flag['net']}"
-                if self.net_override is None:
-                    self.net_counter -= 1
-                self.net_override = flag["net"]
-                wire_point.net.name = flag["net"]
-
-            for wire in wire_point.wires:
-                wire.net = wire_point.net
-                wire_point.net.wires.add(wire)
-                if wire_point.x == wire.x0 and wire_point.y == wire.y0:
-                    neighbor = self.wire_points.get((wire.x1, wire.y1))
-                else:
-                    neighbor = self.wire_points.get((wire.x0, wire.y0))
-                if neighbor.net is None:
-                    neighbor.net = wire_point.net
-                    stack.append(neighbor)
-
     def load_asc(self, filename):
         """Loads an LtSpice schematic from the given filename."""
-        instances = []
-        self.filename = filename
-        self.reset()
-        self.reset_extent()
-        f = open(filename, encoding="iso-8859-1")
-        sheet_w, sheet_h = 0, 0
-        for line in f:
-            line = line.strip()
-            if len(line) == 0:
-                continue
-            words = line.split(" ")
-            if words[0] == "WIRE":
-                wire = Wire(*[int(x) for x in words[1:]])
-                self.check_extent([wire.x0, wire.x1], [wire.y0, wire.y1])
-                self.wires.append(wire)
-
-                # save endpoints and determine direction of wire ends that is used for some connector symbols and ground
-                # default direction at wire end is down
-                wire_point0 = self.wire_points.get((wire.x0, wire.y0))
-                if wire_point0 is None:
-                    wire_point0 = WirePoint(wire.x0, wire.y0)
-                    self.wire_points[(wire.x0, wire.y0)] = wire_point0
-                wire_point1 = self.wire_points.get((wire.x1, wire.y1))
-                if wire_point1 is None:
-                    wire_point1 = WirePoint(wire.x1, wire.y1)
-                    self.wire_points[(wire.x1, wire.y1)] = wire_point1
-                wire_point0.wires.append(wire)
-                wire_point1.wires.append(wire)
-                if wire.x0 == wire.x1:  # vertical
-                    if wire.y0 < wire.y1:
-                        wire_point0.direction = 2  # top
-                    else:
-                        wire_point1.direction = 2
-                if wire.y0 == wire.y1:  # horizontal
-                    if wire.x0 < wire.x1:
-                        wire_point0.direction = 1  # left
-                        wire_point1.direction = 3
-                    else:
-                        wire_point0.direction = 3  # right
-                        wire_point1.direction = 1
-
-                min_x, min_y = min(wire.x0, wire.x1), min(
-                    wire.y0, wire.y1
-                )  # rtree lib needs a well-formed rect
-                max_x, max_y = max(wire.x0, wire.x1), max(wire.y0, wire.y1)
-                rect = rt.Rect(min_x, min_y, max_x + 1, max_y + 1)
-                self.wire_lookup.insert(wire, rect)
-            elif words[0] == "TEXT":
-                x = int(words[1])
-                y = int(words[2])
-                align = words[3]
-                size = int(words[4])
-                text = " ".join(words[5:])
-                self.check_extent(x - 15, y - 15)
-
-                x, y, y2 = self.align_text(
-                    x, y, text, align, size, 0, self.gc.CreateMatrix()
-                )
-                t = dict(x=x, y=y, size=size, text=text)
-
-                self.texts.append(t)
-            elif words[0] == "SHEET":
-                sheet_w, sheet_h = int(words[2]), int(words[3])
-            elif words[0] == "FLAG":
-                last_flag = dict(
-                    x=int(words[1]), y=int(words[2]), net=words[3], type=None
-                )
-                self.check_extent(last_flag["x"], last_flag["y"])
-                self.flags[(last_flag["x"], last_flag["y"])] = last_flag
-            elif words[0] == "IOPIN":
-                last_flag["type"] = words[3]
-            elif words[0] == "SYMATTR":
-                attr = " ".join(words[2:])
-                if words[1] == "InstName" and self.instance_name != "":
-                    attr = self.instance_name + "." + attr
-                instances[-1].attrs[words[1]] = attr
-            elif words[0] == "SYMBOL":
-                instance = SymbolInstance(
-                    self,
-                    words[1],
-                    int(words[2]),
-                    int(words[3]),
-                    words[4][0] == "M",
-                    int(words[4][1:]),
-                )
-                instances.append(instance)
-                self.check_extent(instance.x, instance.y)
-                # load default attrs from symbol file
-                symbol = self.symbols.get(words[1])
-                assert symbol, f"Unknown symbol {words[1]}"
-                symbol.load()
-                instance.attrs = symbol.attrs.copy()
-            elif words[0] == "WINDOW":
-                x = int(words[2])
-                y = int(words[3])
-                window = dict(
-                    type=window_types[words[1]],
-                    x=x,
-                    y=y,
-                    align=words[4],
-                    size=int(words[5]),
-                )
-                instances[-1].windows[window["type"]] = window
-
-        # load symbol instances
-        pin_positions = {}
-        for instance in instances:
-            s = self.symbols.get(instance.name)
-            if s is None:
-                print(f"Symbol not found {instance.name}")
-                self.rtree.insert(
-                    instance,
-                    rt.Rect(
-                        instance.x - 5, instance.y - 5, instance.x + 5, instance.y + 5
-                    ),
-                )
-                continue
-            s.load()
-            instance.set_symbol(s)
-            for pin in instance.pins:
-                pin_positions[(pin.x, pin.y)] = (instance, pin)
-            x1, y1 = instance.matrix.TransformPoint(s.x1, s.y1)
-            x2, y2 = instance.matrix.TransformPoint(s.x2, s.y2)
-            if x1 > x2:
-                x1, x2 = x2, x1
-            if y1 > y2:
-                y1, y2 = y2, y1
-            self.rtree.insert(
-                instance,
-                rt.Rect(
-                    instance.x + x1, instance.y + y1, instance.x + x2, instance.y + y2
-                ),
-            )
-            self.symbol_instances[instance.attrs["InstName"]] = instance
-            self.check_extent(
-                [instance.x + s.x1, instance.x + s.x2],
-                [instance.y + s.y1, instance.y + s.y2],
-            )
+        schematic = Schematic(self.symbols, self.instance_name)
+        schematic.load(filename)
+        self.save_symbol_cache()
+        self.set_schematic(schematic)
+
+    def load_asc_async(self, filename):
+        """Loads an LtSpice schematic in a worker thread. The current schematic stays
+        displayed until the new one is ready. Posts LoadProgressEvent while loading and
+        LoadDoneEvent when done. A load that is still running is cancelled.
+        """
+        self.cancel_load()
+        cancel = self.load_cancel = threading.Event()
+        thread = threading.Thread(
+            target=self.load_worker, args=(filename, cancel), daemon=True
+        )
+        thread.start()
 
-        # connect wires to pins
-        for wire_point in self.wire_points.values():
-            if wire_point.net:
-                continue
-            self.net_counter += 1
-            wire_point.net = Net(f"N{self.net_counter:03d}")
-            self.nets[wire_point.net.name] = wire_point.net
-            self.net_override = (
-                None  # is set to net name if a user-assigned net name is found
-            )
-            self.connect_wires(wire_point)
+    def cancel_load(self):
+        """Cancels a running load_asc_async(), the current schematic stays displayed."""
+        if self.load_cancel is not None:
+            self.load_cancel.set()
 
-        # calculate correct pin index from SpiceOrder
+    def is_loading(self):
+        return self.load_cancel is not None
 
-        # add instance connections to nets and label spur types
-        for wire_point in self.wire_points.values():
-            res = pin_positions.get((wire_point.x, wire_point.y))
-            if res:
-                instance, pin = res
-                pin_name = str(pin.symbol_pin.index)
-                connection = Connection(instance, pin, pin_name)
-                wire_point.net.connections.append(connection)
+    def load_worker(self, filename, cancel):
+        """Parses and connects a schematic, this runs in a worker thread."""
+        last = 0
 
-        # add net flags to main rtree
-        for flag in self.flags.values():
-            x1 = flag["x"]
-            y1 = flag["y"]
-            x2 = x1 + 20
-            y2 = y1 + 20
-            net = self.nets.setdefault(flag["net"], Net(flag["net"]))
-            self.rtree.insert(net, rt.Rect(x1, y1, x2, y2))
-
-        self.x1 -= 10
-        self.y1 -= 10
-        self.x2 = max(self.x2, sheet_w)
-        self.y2 = max(self.y2, sheet_h)
+        def progress(phase, count):
+            nonlocal last
+            now = time.monotonic()
+            if phase != "parse" or now - last > self.progress_interval:
+                last = now
+                wx.CallAfter(self.post_load_progress, filename, phase, count, cancel)
+
+        schematic = Schematic(self.symbols, self.instance_name)
+        error = None
+        try:
+            schematic.load(filename, progress, cancel)
+        except LoadCancelled:
+            schematic = None
+        except Exception as e:
+            schematic = None
+            error = e
+        # everything that needs the graphics context runs on the main thread
+        wx.CallAfter(self.finish_load, filename, schematic, error, cancel)
+
+    def post_load_progress(self, filename, phase, count, cancel):
+        if self and cancel is self.load_cancel and not cancel.is_set():
+            event = LoadProgressEvent(filename=filename, phase=phase, count=count)
+            event.SetEventObject(self)
+            wx.PostEvent(self, event)
+
+    def finish_load(self, filename, schematic, error, cancel):
+        if not self:
+            return  # the canvas was destroyed
+        if cancel is self.load_cancel:
+            self.load_cancel = None
+        if cancel.is_set():
+            schematic = None
+        if schematic is not None:
+            self.save_symbol_cache()
+            self.set_schematic(schematic)
+        event = LoadDoneEvent(
+            filename=filename,
+            schematic=schematic,
+            cancelled=cancel.is_set(),
+            error=error,
+        )
+        event.SetEventObject(self)
+        wx.PostEvent(self, event)
+
+    def set_schematic(self, schematic):
+        """Displays a schematic model that has already been loaded."""
+        self.schematic = schematic
+        self.hover_box = None
+        self.find_query = None  # the next find in the dialog searches again
+        self.find_results = SearchResults([])
+        self.filename = schematic.filename
+        if self.filename not in self.watcher and self.watcher.stats:
+            self.watcher = FileWatcher([self.filename])  # follow the shown file
+        self.x1, self.y1, self.x2, self.y2 = schematic.get_extent()
         self.set_size(self.x2 - self.x1, self.y2 - self.y1)
         self.Refresh()
+        self.create_flag_paths()
+        self.index_texts()
+        self.index_instances()
+
+    def set_view(self, view):
+        """Displays a SubcircuitView of a Design under its hierarchical instance name."""
+        self.instance_name = view.prefix
+        self.set_schematic(view.schematic)
+
+    def create_flag_paths(self, gc=None):
+        """Creates the paths that draw flags.
+
+        Arguments:
+        gc -- the graphics context that creates the paths, defaults to the one of the canvas
+        """
+        self.flag_paths = {}
+        for flag in self.flags.values():
+            self.create_flag_path(flag, gc)
+
+    def create_flag_path(self, flag, gc=None):
+        """Creates the path that draws a flag, it depends on the wires at the flag."""
+        if gc is None:
+            gc = self.gc
+        x1, y1 = flag["x"], flag["y"]
+        self.flag_paths.pop((x1, y1), None)
+        if flag["type"] == "In":
+            points = [
+                (x1, y1),
+                (x1 + 10, y1 + 10),
+                (x1 + 10, y1 + 20),
+                (x1 - 10, y1 + 20),
+                (x1 - 10, y1 + 10),
+                (x1, y1),
+            ]
+            wire_point = self.wire_points.get((x1, y1))
+            if wire_point and len(wire_point.wires) == 1:
+                direction = wire_point.direction
+                if direction:
+                    m = (
+                        Affine()
+                        .translate(x1, y1)
+                        .rotate(math.pi / 2 * direction)
+                        .translate(-x1, -y1)
+                    )
+                    points = [m.transform_point(*p) for p in points]
+            path = gc.CreatePath()
+            path.MoveToPoint(*points[0])
+            for point in points[1:]:
+                path.AddLineToPoint(*point)
+            self.flag_paths[(x1, y1)] = path
+        elif flag["type"] == "Out":
+            pass
+        elif flag["type"] == "BiDir":
+            pass
+        elif flag["net"] == "0":
+            path = gc.CreatePath()
+            path.MoveToPoint(x1 - 10, y1)
+            path.AddLineToPoint(x1 + 10, y1)
+            path.MoveToPoint(x1 - 10, y1)
+            path.AddLineToPoint(x1, y1 + 10)
+            path.MoveToPoint(x1 + 10, y1)
+            path.AddLineToPoint(x1, y1 + 10)
+            self.flag_paths[(x1, y1)] = path
+
+    def index_texts(self):
+        """Aligns the texts of the schematic and adds them to an index for painting."""
+        self.text_lookup = GridIndex(
+            [(text, self.text_rect(text)) for text in self.texts]
+        )
 
-        self.path = self.gc.CreatePath()
+    def text_rect(self, text):
+        """Aligns a text of the schematic and returns its area."""
+        x, y, y2 = self.align_text(
+            text["x"], text["y"], text["text"], text["align"], text["size"], 0
+        )
+        text["pos"] = (x, y)
+        w, h = self.text_extent(text["text"], text["size"])
+        return (x, y, x + w + 1, y + h + 1)
+
+    def index_instances(self):
+        """Adds the instances of the schematic to an index by the area they paint. It is
+        built again when the revision of the schematic changes, e.g. after
+        SymbolInstance.reset_text_layout()."""
+        self.instance_lookup = GridIndex(
+            [
+                (instance, self.instance_rect(instance))
+                for instance in self.schematic.instances
+                if instance.symbol
+            ]
+        )
+        self.instance_lookup_key = (id(self.schematic), self.schematic.revision)
+
+    def instance_rect(self, instance):
+        """Places the texts of an instance and returns the area (x1, y1, x2, y2) that it
+        paints: its symbol, the texts of the symbol file, pin names and windows."""
+        x1, y1, x2, y2 = instance.get_extent()
+        xs, ys = [x1, x2], [y1, y2]
+        for size, text, x, y, angle in instance.layout_text(self):
+            w, h = self.text_extent(text, size)
+            # DrawText() rotates counterclockwise around the top left corner
+            c, s = math.cos(angle), math.sin(angle)
+            for dx, dy in ((w, 0), (0, h), (w, h)):
+                xs.append(instance.x + x + dx * c + dy * s)
+                ys.append(instance.y + y - dx * s + dy * c)
+            xs.append(instance.x + x)
+            ys.append(instance.y + y)
+        symbol = instance.symbol
+        for text, (x, y) in zip(symbol.texts, symbol.align_texts(self)):
+            w, h = self.text_extent(text["text"], text["size"])
+            for dx, dy in ((0, 0), (w, 0), (0, h), (w, h)):
+                px, py = instance.matrix.transform_point(x + dx, y + dy)
+                xs.append(instance.x + px)
+                ys.append(instance.y + py)
+        return (min(xs), min(ys), max(xs) + 1, max(ys) + 1)
+
+    def reload(self):
+        """Applies the changes of the schematic file, see Schematic.reload(). Only the
+        changed areas are repainted, and zoom and scroll position are kept.
+
+        Returns the SchematicChanges.
+        """
+        changes = self.schematic.reload()
+        if not changes:
+            return changes
+        self.hover_box = None
+        self.find_query = None
+        self.find_results = SearchResults([])
+
+        rects = list(changes.rects)
+        removed, added = changes.texts
+        for text in removed:
+            rects.append(self.text_rect(text))
+        self.text_lookup.remove(removed)
+        items = [(text, self.text_rect(text)) for text in added]
+        self.text_lookup.bulk_load(items)
+        rects.extend(rect for text, rect in items)
+
+        # the painted areas of instances include their texts
+        removed, added = changes.instances
+        removed = [instance for instance in removed if instance.symbol]
+        rects.extend(self.instance_rect(instance) for instance in removed)
+        self.instance_lookup.remove(removed)
+        items = [
+            (instance, self.instance_rect(instance))
+            for instance in added
+            if instance.symbol
+        ]
+        self.instance_lookup.bulk_load(items)
+        rects.extend(rect for instance, rect in items)
+
+        # flag shapes depend on the wires at the flag
+        for flag in changes.flags[0]:
+            self.flag_paths.pop((flag["x"], flag["y"]), None)
+        for rect in changes.rects:
+            for entry in self.flag_lookup.query(rect):
+                self.create_flag_path(entry.data)
+
+        if changes.extent_changed:
+            # tiles are aligned to the extent, keep the view where it was
+            x, y = self.get_scroll_origin()
+            x += self.x1
+            y += self.y1
+            self.x1, self.y1, self.x2, self.y2 = self.schematic.get_extent()
+            self.resize(self.x2 - self.x1, self.y2 - self.y1)
+            self.set_scroll_origin(x - self.x1, y - self.y1)
+            self.invalidate()
+        else:
+            for rect in rects:
+                self.invalidate(rect)
+        return changes
+
+    def watch(self, interval=500):
+        """Reloads the schematic when its file changes.
+
+        Arguments:
+        interval -- the time between checks of the file in milliseconds
+        """
+        if self.watch_timer is None:
+            self.watch_timer = wx.Timer(self)
+            self.Bind(wx.EVT_TIMER, self.on_watch_timer, self.watch_timer)
+        self.watcher = FileWatcher([self.filename])
+        self.watch_timer.Start(interval)
+
+    def unwatch(self):
+        """Stops watching the schematic file."""
+        if self.watch_timer is not None:
+            self.watch_timer.Stop()
+
+    def on_watch_timer(self, evt):
+        if self.watcher.poll():
+            self.reload()
+            self.save_symbol_cache()
+
+    def device_to_schematic(self, x, y):
+        """Converts window coordinates to schematic coordinates. The transformation is
+        cached until zoom or scroll position change."""
+        state = (self.zoom, self.GetViewStart(), self.x1, self.y1)
+        cached_state, m = self.device_transform
+        if state != cached_state:
+            (vx, vy), (ux, uy) = state[1], self.GetScrollPixelsPerUnit()
+            s = 1 / self.zoom
+            m = Affine(s, 0, 0, s, vx * ux * s + self.x1, vy * uy * s + self.y1)
+            self.device_transform = (state, m)
+        return m.transform_point(x, y)
 
-        for wire in self.wires:
-            self.path.MoveToPoint(wire.x0, wire.y0)
-            self.path.AddLineToPoint(wire.x1, wire.y1)
+    def mouse_position(self, evt):
+        """Returns the mouse position in schematic canvas coordinates."""
+        return self.device_to_schematic(*evt.GetPosition())
 
-        for wire_point in self.wire_points.values():
-            # add dots representing wire connection
-            if len(wire_point.wires) > 2:
-                self.path.AddRectangle(wire_point.x - 2, wire_point.y - 2, 4, 4)
+    def OnMotion(self, evt):
+        self.hover_pos = evt.GetPosition()  # processed once per idle cycle
+        super().OnMotion(evt)
 
-        for flag in self.flags.values():
-            x1, y1 = flag["x"], flag["y"]
-            if flag["type"] == "In":
-                path = self.gc.CreatePath()
-                path.MoveToPoint(x1, y1)
-                path.AddLineToPoint(x1 + 10, y1 + 10)
-                path.AddLineToPoint(x1 + 10, y1 + 20)
-                path.AddLineToPoint(x1 - 10, y1 + 20)
-                path.AddLineToPoint(x1 - 10, y1 + 10)
-                path.AddLineToPoint(x1, y1)
-                wire_point = self.wire_points.get((x1, y1))
-                if wire_point and len(wire_point.wires) == 1:
-                    direction = wire_point.direction
-                    if direction:
-                        m = self.gc.CreateMatrix()
-                        m.Translate(x1, y1)
-                        m.Rotate(math.pi / 2 * direction)
-                        m.Translate(-x1, -y1)
-                        path.Transform(m)
-                self.path.AddPath(path)
-            elif flag["type"] == "Out":
-                pass
-            elif flag["type"] == "BiDir":
-                pass
-            elif flag["net"] == "0":
-                path = self.gc.CreatePath()
-                path.MoveToPoint(x1 - 10, y1)
-                path.AddLineToPoint(x1 + 10, y1)
-                path.MoveToPoint(x1 - 10, y1)
-                path.AddLineToPoint(x1, y1 + 10)
-                path.MoveToPoint(x1 + 10, y1)
-                path.AddLineToPoint(x1, y1 + 10)
-                self.path.AddPath(path)
+    def on_idle(self, evt):
+        evt.Skip()
+        if self.hover_pos is None:
+            return
+        x, y = self.device_to_schematic(*self.hover_pos)
+        self.hover_pos = None
+        self.update_hover(x, y)
 
-    def mouse_position(self, evt):
-        """Returns the mouse position in schematic canvas coordinates."""
-        dc = wx.ClientDC(self)
-        self.DoPrepareDC(dc)
-        x, y = evt.GetLogicalPosition(dc)
-        return (x + self.x1, y + self.y1)
+    def on_destroy(self, evt):
+        evt.Skip()
+        if evt.GetEventObject() is not self:
+            return  # a child window, e.g. the find dialog
+        self.cancel_load()
+        self.unwatch()
+        for release in self.releases:
+            release()
+        self.releases = []
+
+    def update_hover(self, x, y):
+        """Looks up the net and instance at a position, and posts EVT_HOVER_CHANGED if
+        either changed. Lookups are skipped while the position is inside hover_box."""
+        box = self.hover_box
+        if box and box[0] <= x <= box[2] and box[1] <= y <= box[3]:
+            return
+        wire = self.schematic.nearest_wires([(x, y)], self.hover_radius)[0]
+        net = wire and wire.net
+        instance = self.schematic.instance_at(x, y)
+        self.hover_box = None
+        if net is None and instance is None:
+            # over an empty area, e.g. between the elements of a sparse schematic,
+            # nothing can be hovered until the pointer gets close to an element
+            self.hover_box = self.schematic.empty_box(
+                x, y, self.hover_box_size, self.hover_radius
+            )
+        if net is self.hover_net and instance is self.hover_instance:
+            return
+        self.hover_net = net
+        self.hover_instance = instance
+        event = HoverChangedEvent(net=net, instance=instance)
+        event.SetEventObject(self)
+        wx.PostEvent(self, event)
 
     def get_instance_under_mouse(self, evt):
         """Returns the symbol instance under the mouse pointer."""
         if len(self.symbol_instances) == 0:
             return None
-        pos = self.mouse_position(evt)
-        res = self.rtree.query(pos)
-        try:
-            return next(res).data
-        except StopIteration:
-            return None
+        return self.schematic.instance_at(*self.mouse_position(evt))
 
     def get_net_under_mouse(self, evt):
         """Returns the net under the mouse pointer."""
         if len(self.wires) == 0:
             return None
-
-        pos = self.mouse_position(evt)
-        rect = (pos[0] - 5, pos[1] - 5, pos[0] + 5, pos[1] + 5)
-        res = self.wire_lookup.query(rect)
-
-        def distance_to_line(x0, y0, x1, y1, x2, y2):
-            return (
-                abs((x2 - x1) * (y1 - y0) - (x1 - x0) * (y2 - y1))
-                / ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-            )
-
-        res = [x.data for x in res]
-        if not res:
-            return None
-        closest_wire = min(
-            res,
-            key=lambda wire: distance_to_line(
-                pos[0], pos[1], wire.x0, wire.y0, wire.x1, wire.y1
-            ),
-        )
-        return closest_wire.net
+        return self.schematic.net_at(*self.mouse_position(evt), radius=5)
 
     def on_key(self, evt):
+        if evt.GetKeyCode() == wx.WXK_ESCAPE and self.is_loading():
+            self.cancel_load()
+            return
         k = evt.GetUnicodeKey()
         if evt.ControlDown():
             k = chr(k)
             if k == "F":
                 if self.find_dialog is None:
                     title = f"Find in {self.instance_name}"
-                    self.find_data.SetFindString("")
                     self.find_dialog = wx.FindReplaceDialog(None, self.find_data, title)
                     self.find_dialog.Bind(wx.EVT_FIND, self.on_find)
+                    self.find_dialog.Bind(wx.EVT_FIND_NEXT, self.on_find)
+                    self.find_dialog.Bind(wx.EVT_FIND_CLOSE, self.on_find_close)
                 self.find_dialog.Show()
                 return
         evt.Skip()
 
-    def on_find(self, evt):
-        find = evt.GetFindString()
-        self.find_dialog.Destroy()
-        self.find_dialog = None
+    def find(self, query, mode="substring", case_sensitive=False):
+        """Searches the schematic and scrolls to the best hit.
+
+        Arguments:
+        query -- the text to search for, or a regular expression in regex mode
+        mode -- "exact", "prefix", "substring" or "regex"
+        case_sensitive -- True to match case
+
+        Returns the SearchHit that is shown, or None if nothing matches. Use find_next()
+        and find_previous() to step through the other hits.
+        """
+        self.find_results = SearchResults(
+            self.schematic.search(query, mode, case_sensitive)
+        )
+        return self.find_next()
+
+    def find_next(self):
+        """Scrolls to the next hit of the last search and returns it."""
+        return self.show_hit(self.find_results.next())
 
-        # search nodes
-        r = list(self.rtree.search(None, lambda x: x.data.name == find))
-        if len(r):
-            r = r[0]
-            self.center_on(r.rect.min_x - self.x1, r.rect.min_y - self.y1)
+    def find_previous(self):
+        """Scrolls to the previous hit of the last search and returns it."""
+        return self.show_hit(self.find_results.previous())
+
+    def show_hit(self, hit):
+        if hit is not None:
+            self.center_on(hit.x - self.x1, hit.y - self.y1)
+        return hit
+
+    def on_find(self, evt):
+        flags = evt.GetFlags()
+        query = evt.GetFindString()
+        if evt.GetEventType() == wx.wxEVT_FIND or query != self.find_query:
+            self.find_query = query
+            mode = "exact" if flags & wx.FR_WHOLEWORD else "substring"
+            hit = self.find(query, mode, bool(flags & wx.FR_MATCHCASE))
+        elif flags & wx.FR_DOWN:
+            hit = self.find_next()
         else:
+            hit = self.find_previous()
+        if hit is None:
             wx.MessageDialog(
                 None, "No matches", "Error", wx.OK | wx.ICON_QUESTION
             ).ShowModal()
 
+    def on_find_close(self, evt):
+        self.find_dialog.Destroy()
+        self.find_dialog = None
+
     def go_to_edge(self, instance_name):
         """Scrolls the canvas to the symbol instance specified by instance_name."""
         if not instance_name.startswith(self.instance_name):
@@ -503,32 +665,274 @@ class AscCanvas(BoundedCanvas, Viewport):
             instance_name = self.instance_name + "." + local_instance
 
         s = self.symbol_instances.get(instance_name)
+        if s is None and self.schematic.instance_name != self.instance_name:
+            # a shared template of a Design, see set_view(), has no prefix
+            s = self.symbol_instances.get(local_instance)
         if s is None:
             return
         self.center_on(s.x - self.x1, s.y - self.y1)
 
+    def get_update_rect(self):
+        """Returns the area that needs to be repainted in schematic coordinates."""
+        x, y, w, h = self.GetUpdateRegion().GetBox()
+        x0, y0 = self.CalcUnscrolledPosition(x, y)
+        x1, y1 = self.CalcUnscrolledPosition(x + w, y + h)
+        return (
+            x0 / self.zoom + self.x1,
+            y0 / self.zoom + self.y1,
+            x1 / self.zoom + self.x1,
+            y1 / self.zoom + self.y1,
+        )
+
     def on_paint(self, evt):
-        """Paints the schematic."""
+        """Paints the part of the schematic that needs to be repainted."""
+        start = time.perf_counter()
         dc = wx.PaintDC(self)
-        self.DoPrepareDC(dc)
-        dc.SetBackground(wx.Brush(wx.Colour(255,255,255,255)))
-        dc.Clear()
+        if self.use_tile_cache:
+            self.paint_tiles(dc)
+        else:
+            self.DoPrepareDC(dc)
+            dc.SetBackground(self.resources.white_brush)
+            dc.Clear()
+
+            gc = wx.GraphicsContext.Create(dc)
+            gc.Translate(-self.x1, -self.y1)
+            self.paint(gc, self.get_update_rect())
+            del gc  # flushes drawing operations before the overlay
+            dc.SetDeviceOrigin(0, 0)
+        seconds = time.perf_counter() - start
+        if self.overlay_refresh:
+            self.overlay_refresh = False  # not a frame of the schematic
+        else:
+            self.frame_times.append(seconds)
+            if profiler.enabled:
+                profiler.add_time("on_paint", seconds)
+        if self.show_frame_time:
+            self.paint_frame_time(dc)
+
+    def paint_frame_time(self, dc):
+        """Draws the time of the last frame and the mean of recent frames in the top left
+        corner of the window. The overlay is repainted if the last frame didn't cover it.
+        """
+        if not self.frame_times:
+            return
+        last = self.frame_times[-1] * 1e3
+        mean = sum(self.frame_times) / len(self.frame_times) * 1e3
+        dc.SetFont(wx.SMALL_FONT)
+        dc.SetTextForeground(wx.BLACK)
+        dc.SetTextBackground(wx.Colour(255, 255, 160))
+        dc.SetBackgroundMode(wx.SOLID)
+        text = f" frame {last:.1f} ms, mean {mean:.1f} ms "
+        dc.DrawText(text, 4, 4)
+        w, h = dc.GetTextExtent(text)
+        overlay = wx.Rect(4, 4, w, h)
+        if not self.GetUpdateRegion().Contains(overlay) == wx.Inside:
+            self.overlay_refresh = True
+            self.RefreshRect(overlay, eraseBackground=False)
+
+    def set_frame_time_overlay(self, show):
+        """Shows or hides the duration of painting frames in the top left corner."""
+        self.show_frame_time = show
+        self.Refresh()
 
+    def get_stats(self):
+        """Returns where loading and painting spent their time, see Profiler.stats(), and
+        the durations of the last frames in seconds under "frame_times". Spans and
+        counters are only recorded while asc_viewer.profiling.profiler is enabled, and
+        they cover all canvases."""
+        stats = profiler.stats()
+        stats["frame_times"] = list(self.frame_times)
+        return stats
+
+    def reset_stats(self):
+        """Discards the recorded spans, counters and frame times."""
+        profiler.reset()
+        self.frame_times.clear()
+
+    def invalidate(self, rect=None):
+        """Discards cached tiles and repaints. Call this after changing the appearance of
+        the schematic in a way the canvas can't detect, e.g., state used by a user paint function.
+
+        Arguments:
+        rect -- the changed area (x1, y1, x2, y2) in schematic coordinates, including the
+                texts of changed instances, see instance_rect(). None for everything.
+        """
+        if rect is None:
+            self.tile_cache.clear()
+            self.Refresh()
+            return
+        x1, y1, x2, y2 = rect
+        m = self.pen_margin
+        rect = (x1 - self.x1 - m, y1 - self.y1 - m, x2 - self.x1 + m, y2 - self.y1 + m)
+        self.tile_cache.discard(rect)
+        x1, y1 = self.CalcScrolledPosition(
+            int(rect[0] * self.zoom), int(rect[1] * self.zoom)
+        )
+        x2, y2 = self.CalcScrolledPosition(
+            int(rect[2] * self.zoom), int(rect[3] * self.zoom)
+        )
+        self.RefreshRect(wx.Rect(x1, y1, x2 - x1 + 1, y2 - y1 + 1))
+
+    def paint_tiles(self, dc):
+        """Blits the tiles that cover the update region to dc, rendering missing tiles."""
+        self.tile_cache.validate((id(self.schematic), self.schematic.revision))
+        size = self.tile_cache.tile_size
+        x, y, w, h = self.GetUpdateRegion().GetBox()
+        x0, y0 = self.CalcUnscrolledPosition(x, y)
+        x1, y1 = self.CalcUnscrolledPosition(x + w, y + h)
+        for row in range(y0 // size, (y1 - 1) // size + 1):
+            for col in range(x0 // size, (x1 - 1) // size + 1):
+                key = (self.zoom, col, row)
+                bmp = self.tile_cache.get(key)
+                if bmp is None:
+                    bmp = self.render_tile(col, row)
+                    self.tile_cache.put(key, bmp)
+                    profiler.count("tiles rendered")
+                dc.DrawBitmap(bmp, *self.CalcScrolledPosition(col * size, row * size))
+
+    @profiled("render_tile")
+    def render_tile(self, col, row):
+        """Renders the tile at the given column and row of the current zoom level to a bitmap."""
+        size = self.tile_cache.tile_size
+        bmp = wx.Bitmap(size, size)
+        dc = wx.MemoryDC(bmp)
+        dc.SetBackground(self.resources.white_brush)
+        dc.Clear()
         gc = wx.GraphicsContext.Create(dc)
-        gc.Translate(-self.x1, -self.y1)
-
-
+        x = col * size / self.zoom + self.x1
+        y = row * size / self.zoom + self.y1
+        gc.Scale(self.zoom, self.zoom)
+        gc.Translate(-x, -y)
+        self.paint(gc, (x, y, x + size / self.zoom, y + size / self.zoom))
+        del gc  # flushes drawing operations to the bitmap
+        dc.SelectObject(wx.NullBitmap)
+        return bmp
+
+    def export(self, filename, zoom=1, size=None, margin=16, full_detail=True):
+        """Renders the whole schematic into an image file, independently of the window.
+        The extension of filename selects the format: svg and pdf are written as vector
+        graphics by a VectorContext, and png, jpg, bmp and tif are rendered offscreen to
+        a bitmap.
+
+        Arguments:
+        filename -- the image file
+        zoom -- pixels per schematic unit, ignored if size is given
+        size -- (width, height) in pixels that the schematic is fitted into
+        margin -- the space around the schematic in schematic units
+        full_detail -- False to skip details by the zoom of the image like on screen,
+                       e.g. for thumbnails, see paint()
+
+        Returns the (width, height) of the image in pixels.
+        """
+        x1, y1, x2, y2 = self.schematic.get_extent()
+        x1, y1, x2, y2 = x1 - margin, y1 - margin, x2 + margin, y2 + margin
+        if size is not None:
+            zoom = min(size[0] / (x2 - x1), size[1] / (y2 - y1))
+        width = max(1, math.ceil((x2 - x1) * zoom))
+        height = max(1, math.ceil((y2 - y1) * zoom))
+        rect = (x1, y1, x1 + width / zoom, y1 + height / zoom)
+        detail = math.inf if full_detail else zoom
+        extension = os.path.splitext(filename)[1].lower()
+
+        if extension in (".svg", ".pdf"):
+            gc = VectorContext(width, height, self.resources.font_styles, self.gc)
+            gc.Scale(zoom, zoom)
+            gc.Translate(-x1, -y1)
+            flag_paths = self.flag_paths
+            try:
+                self.create_flag_paths(gc)
+                self.paint(gc, rect, detail)
+            finally:
+                self.flag_paths = flag_paths
+            gc.save(filename)
+            return width, height
+
+        bitmap_type = export_bitmap_types.get(extension)
+        if bitmap_type is None:
+            raise ValueError(f"Unsupported image format {extension}")
+        bmp = wx.Bitmap(width, height)
+        dc = wx.MemoryDC(bmp)
+        dc.SetBackground(self.resources.white_brush)
+        dc.Clear()
+        gc = wx.GraphicsContext.Create(dc)
+        gc.Scale(zoom, zoom)
+        gc.Translate(-x1, -y1)
+        self.paint(gc, rect, detail)
+        del gc  # flushes drawing operations to the bitmap
+        dc.SelectObject(wx.NullBitmap)
+        if not bmp.SaveFile(filename, bitmap_type):
+            raise OSError(f"Cannot write {filename}")
+        return width, height
+
+    @profiled("paint")
+    def paint(self, gc, rect, zoom=None):
+        """Paints all elements that intersect rect.
+
+        Arguments:
+        gc -- a wx graphics context, transformed to schematic coordinates.
+        rect -- the area (x1, y1, x2, y2) to paint in schematic coordinates.
+        zoom -- the scale of gc that selects the level of detail, defaults to the current
+                zoom, math.inf paints all details.
+        """
+        if zoom is None:
+            zoom = self.zoom
+        show_text = zoom >= self.lod_text_zoom
+        show_junctions = zoom >= self.lod_junction_zoom
+        show_symbols = zoom >= self.lod_box_zoom
+
+        x1, y1, x2, y2 = rect
+        m = self.pen_margin
+        rect = (x1 - m, y1 - m, x2 + m, y2 + m)
+        if self.instance_lookup_key != (id(self.schematic), self.schematic.revision):
+            self.index_instances()
+
+        path = gc.CreatePath()
+        ends = set()
+        for entry in self.wire_lookup.query(rect):
+            wire = entry.data
+            path.MoveToPoint(wire.x0, wire.y0)
+            path.AddLineToPoint(wire.x1, wire.y1)
+            ends.add((wire.x0, wire.y0))
+            ends.add((wire.x1, wire.y1))
+        if show_junctions:
+            for end in ends:
+                wire_point = self.wire_points[end]
+                # add dots representing wire connection
+                if wire_point.junction:
+                    path.AddRectangle(wire_point.x - 2, wire_point.y - 2, 4, 4)
+        flags = [entry.data for entry in self.flag_lookup.query(rect)]
+        for flag in flags:
+            flag_path = self.flag_paths.get((flag["x"], flag["y"]))
+            if flag_path:
+                path.AddPath(flag_path)
+
+        instances = [entry.data for entry in self.instance_lookup.query(rect)]
+        if not show_symbols:
+            # draw extent boxes, except for instances that are painted by the user
+            detailed = []
+            for instance in instances:
+                if instance.has_user_paint():
+                    detailed.append(instance)
+                    continue
+                x0, y0, x1, y1 = instance.get_extent()
+                path.AddRectangle(x0, y0, x1 - x0, y1 - y0)
+            instances = detailed
         gc.SetPen(self.black_pen)
-        gc.StrokePath(self.path)
-        gc.SetFont(self.fonts[1])
-        for flag in self.flags.values():
-            if flag["net"] == "0":
-                continue
-            gc.DrawText(flag["net"], flag["x"], flag["y"])
+        gc.StrokePath(path)
 
-        for instance in self.symbol_instances.values():
-            instance.paint(gc)
+        if show_text:
+            gc.SetFont(self.fonts[1])
+            for flag in flags:
+                if flag["net"] == "0":
+                    continue
+                gc.DrawText(flag["net"], flag["x"], flag["y"])
 
-        for text in self.texts:
-            gc.SetFont(self.fonts[text["size"]])
-            gc.DrawText(text["text"], text["x"], text["y"])
+        for instance in instances:
+            instance.paint(gc, self, show_text)
+        profiler.count("instances drawn", len(instances))
+
+        if show_text:
+            for entry in self.text_lookup.query(rect):
+                text = entry.data
+                gc.SetFont(self.fonts[text["size"]])
+                gc.DrawText(text["text"], *text["pos"])
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class BoundedCanvas:
     """A mixin that keeps track of canvas size."""
 
@@ -38,5 +41,18 @@ class BoundedCanvas:
         self.w = self.x2 - self.x1
         self.h = self.y2 - self.y1
 
+    def check_extent_array(self, xs, ys):
+        """Grows the canvas like check_extent() for arrays of coordinates, which are
+        checked in one vectorized pass. Empty arrays are ignored.
+
+        Arguments:
+        xs --- array of x values to check.
+        ys --- array of y values to check.
+        """
+        if len(xs) and len(ys):
+            self.check_extent(
+                [int(np.min(xs)), int(np.max(xs))], [int(np.min(ys)), int(np.max(ys))]
+            )
+
     def get_extent(self):
         return self.x1, self.y1, self.x2, self.y2
@@ -0,0 +1,154 @@
+import bisect
+import numpy as np
+
+
+class UnionFind:
+    """Disjoint sets of the integers 0 to n - 1, with union by size and path halving.
+
+    Arguments:
+    n -- the number of elements, each starts in a set of its own
+    """
+
+    def __init__(self, n=0):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        """Returns the representative element of the set that contains i."""
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """Merges the sets that contain i and j and returns the new representative."""
+        i = self.find(i)
+        j = self.find(j)
+        if i == j:
+            return i
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return i
+
+
+def end_directions(coords):
+    """Returns the directions that wires set at their ends, as an array with a row
+    (d0, d1) for each wire: 1 is left, 2 top, 3 right and 0 no change, see
+    WirePoint.direction. Vertical wires set top at their upper end, horizontal wires set
+    left and right, and the horizontal rule wins for wires of zero length.
+
+    Arguments:
+    coords -- an array with a row (x0, y0, x1, y1) for each wire
+    """
+    x0, y0, x1, y1 = np.asarray(coords).reshape(-1, 4).T
+    directions = np.zeros((len(x0), 2), dtype=np.int8)
+    vertical = x0 == x1
+    directions[vertical & (y0 < y1), 0] = 2
+    directions[vertical & (y0 >= y1), 1] = 2
+    horizontal = y0 == y1
+    directions[horizontal] = np.where((x0 < x1)[horizontal, None], [1, 3], [3, 1])
+    return directions
+
+
+class WireEnds:
+    """The distinct end points of wires and the wire ends at each of them, found with
+    vectorized operations instead of a dict lookup per wire end.
+
+    Arguments:
+    coords -- an integer array with a row (x0, y0, x1, y1) for each wire
+
+    Attributes:
+    positions -- an array with a row (x, y) for each distinct end point, in the order
+                 in which they first appear as wire ends
+    ends -- an array with the indices into positions of both ends of each wire
+    order, starts -- the wire ends at position i are order[starts[i]:starts[i + 1]],
+                     numbered 2 * wire + end and in that order
+    degrees -- the number of wire ends at each position
+    directions -- the direction at each position as set by the last wire end with a
+                  direction, 0 for none, see end_directions()
+    """
+
+    def __init__(self, coords):
+        points = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        # one sortable key per point is much faster than np.unique(axis=0)
+        keys = (points[:, 0] << 32) | (points[:, 1] & 0xFFFFFFFF)
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # number positions in the order they first appear, like a dict of wire ends
+        appearance = np.argsort(first)
+        rank = np.empty_like(appearance)
+        rank[appearance] = np.arange(len(appearance))
+        inverse = rank[inverse.reshape(-1)]
+        self.positions = points[first[appearance]]
+        self.ends = inverse.reshape(-1, 2)
+        self.order = np.argsort(inverse, kind="stable")
+        self.degrees = np.bincount(inverse, minlength=len(keys))
+        self.starts = np.zeros(len(keys) + 1, dtype=np.intp)
+        np.cumsum(self.degrees, out=self.starts[1:])
+
+        directions = end_directions(coords).reshape(-1)
+        last = np.full(len(keys), -1, dtype=np.intp)
+        setting = np.flatnonzero(directions)
+        np.maximum.at(last, inverse[setting], setting)
+        self.directions = np.where(last >= 0, directions[last], 0)
+
+
+def _lines(points, axis):
+    """Groups point indices by one coordinate and sorts them by the other.
+
+    Returns a dict from the coordinate on axis to (sorted other coordinates, indices).
+    """
+    other = 1 - axis
+    if len(points) == 0:
+        return {}
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    order = np.lexsort((points[:, other], points[:, axis]))
+    keys = points[order, axis]
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = [0] + bounds.tolist()
+    ends = bounds.tolist() + [len(order)]
+    keys = keys[starts].tolist()
+    coords = points[order, other].tolist()
+    indices = order.tolist()
+    return {
+        key: (coords[start:end], indices[start:end])
+        for key, start, end in zip(keys, starts, ends)
+    }
+
+
+def interior_points(points, segments):
+    """Finds the points that lie on the interior of horizontal and vertical segments.
+
+    Points and segments are sorted into rows and columns once, and each segment looks up
+    the points between its ends by bisection, so this takes O((n + m) log n + k) for n
+    points, m segments and k results. Points on segment ends and diagonal segments are
+    not reported.
+
+    Arguments:
+    points -- a list of (x, y) tuples
+    segments -- a list of (x0, y0, x1, y1) tuples
+
+    Yields (point index, segment index) pairs.
+    """
+    rows = None
+    columns = None
+    for s, (x0, y0, x1, y1) in enumerate(segments):
+        if y0 == y1 and x0 != x1:
+            if rows is None:
+                rows = _lines(points, 1)
+            line, lo, hi = rows.get(y0), min(x0, x1), max(x0, x1)
+        elif x0 == x1 and y0 != y1:
+            if columns is None:
+                columns = _lines(points, 0)
+            line, lo, hi = columns.get(x0), min(y0, y1), max(y0, y1)
+        else:
+            continue
+        if line is None:
+            continue
+        coords, indices = line
+        start = bisect.bisect_right(coords, lo)
+        end = bisect.bisect_left(coords, hi, start)
+        for i in indices[start:end]:
+            yield i, s
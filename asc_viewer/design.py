@@ -0,0 +1,153 @@
+import os
+from asc_viewer.schematic import Schematic
+from asc_viewer.symbol_library import SymbolLibrary
+
+
+def is_global_net(name):
+    """Returns True for nets that connect across the hierarchy, ground and $G_ nets."""
+    return name == "0" or name.upper().startswith("$G_")
+
+
+class SubcircuitView:
+    """A place in the hierarchy of a Design where a template schematic is instantiated.
+
+    Views don't copy the template, they only add a hierarchical prefix to its names.
+
+    Arguments:
+    design -- the Design the view belongs to
+    schematic -- the template Schematic
+    prefix -- the hierarchical instance name, e.g. "X1.X3", empty for the top level
+    instance -- the block SymbolInstance in the parent schematic, None for the top level
+    parent -- the SubcircuitView of the parent schematic, None for the top level
+    """
+
+    __slots__ = ("design", "schematic", "prefix", "instance", "parent")
+
+    def __init__(self, design, schematic, prefix="", instance=None, parent=None):
+        self.design = design
+        self.schematic = schematic
+        self.prefix = prefix
+        self.instance = instance
+        self.parent = parent
+
+    def qualify(self, name):
+        """Returns the hierarchical name of an instance of the template."""
+        return f"{self.prefix}.{name}" if self.prefix else name
+
+    def qualify_net(self, name):
+        """Returns the hierarchical name of a net of the template."""
+        return name if is_global_net(name) else self.qualify(name)
+
+    def instances(self):
+        """Yields (hierarchical name, SymbolInstance) for the instances of the template."""
+        for name, instance in self.schematic.symbol_instances.items():
+            yield self.qualify(name), instance
+
+    def children(self):
+        """Yields a SubcircuitView for each hierarchical block in the template."""
+        for name, instance in self.schematic.symbol_instances.items():
+            filename = self.design.block_file(instance)
+            if filename is None:
+                continue
+            if self.is_ancestor(filename):
+                self.design.report(
+                    f"Recursive block {self.qualify(name)} in {filename}"
+                )
+                continue
+            template = self.design.template(filename)
+            yield SubcircuitView(
+                self.design, template, self.qualify(name), instance, self
+            )
+
+    def is_ancestor(self, filename):
+        view = self
+        while view is not None:
+            if view.schematic.filename == filename:
+                return True
+            view = view.parent
+        return False
+
+    def walk(self):
+        """Yields this view and all views below it, depth first."""
+        stack = [self]
+        while stack:
+            view = stack.pop()
+            yield view
+            stack.extend(reversed(list(view.children())))
+
+    def __repr__(self):
+        return f"SubcircuitView({self.prefix!r}, {self.schematic.filename!r})"
+
+
+class Design:
+    """A hierarchical LTspice design, a top-level schematic and its hierarchical blocks.
+
+    A hierarchical block is a symbol with an asc file of the same name next to it. The
+    symbols next to a schematic take precedence over the library, see SymbolLibrary. Each
+    asc file is parsed once into a template Schematic, however often it is used, and
+    each use is a lightweight SubcircuitView.
+
+    Arguments:
+    filename -- the top-level asc file
+    symbols -- a SymbolLibrary, a new one without library directories by default
+    """
+
+    def __init__(self, filename, symbols=None):
+        if symbols is None:
+            symbols = SymbolLibrary()
+        self.symbols = symbols
+        self.filename = os.path.abspath(filename)
+        self.templates = {}  # absolute asc filename to Schematic
+        self.blocks = {}  # asy filename to asc filename or None
+        self.diagnostics = []  # problems found in the hierarchy, see report()
+        self.top = SubcircuitView(self, self.template(self.filename))
+
+    def report(self, message):
+        """Records and prints a problem with the hierarchy. Views are walked again and
+        again, so each problem is only reported once."""
+        if message in self.diagnostics:
+            return
+        self.diagnostics.append(message)
+        print(message)
+
+    def template(self, filename):
+        """Returns the Schematic of an asc file, it is parsed on first use."""
+        filename = os.path.abspath(filename)
+        schematic = self.templates.get(filename)
+        if schematic is None:
+            schematic = Schematic(self.symbols)
+            schematic.load(filename)
+            self.templates[filename] = schematic
+        return schematic
+
+    def block_file(self, instance):
+        """Returns the asc file of a hierarchical block instance, or None."""
+        symbol = instance.symbol
+        if symbol is None:
+            return None
+        if symbol.filename not in self.blocks:
+            filename = os.path.splitext(symbol.filename)[0] + ".asc"
+            self.blocks[symbol.filename] = (
+                os.path.abspath(filename) if os.path.isfile(filename) else None
+            )
+        return self.blocks[symbol.filename]
+
+    def view(self, prefix):
+        """Returns the SubcircuitView of a hierarchical instance name, or None.
+
+        Arguments:
+        prefix -- the hierarchical instance name, e.g. "X1.X3", empty for the top level
+        """
+        view = self.top
+        for name in prefix.split(".") if prefix else ():
+            for child in view.children():
+                if child.instance is view.schematic.symbol_instances.get(name):
+                    view = child
+                    break
+            else:
+                return None
+        return view
+
+    def walk(self):
+        """Yields all views of the design, depth first."""
+        return self.top.walk()
@@ -0,0 +1,50 @@
+import os
+
+
+class FileWatcher:
+    """Detects changes of files by polling their modification time and size.
+
+    Polling works on every platform and is cheap for the few files a viewer shows. It
+    has no thread of its own, call poll() periodically, e.g. from a wx.Timer.
+
+    Arguments:
+    filenames -- the files to watch
+    """
+
+    def __init__(self, filenames=()):
+        self.stats = {}  # filename to (mtime_ns, size), None if it doesn't exist
+        for filename in filenames:
+            self.watch(filename)
+
+    @staticmethod
+    def stat(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def watch(self, filename):
+        """Starts watching a file, changes before this call are not reported."""
+        self.stats[filename] = self.stat(filename)
+
+    def unwatch(self, filename):
+        self.stats.pop(filename, None)
+
+    def poll(self):
+        """Returns the watched files that changed since the last call.
+
+        A file that is being rewritten may be missing for a moment, it is reported once
+        it exists again.
+        """
+        changed = []
+        for filename, old in self.stats.items():
+            new = self.stat(filename)
+            if new != old and new is not None:
+                changed.append(filename)
+            if new is not None:
+                self.stats[filename] = new
+        return changed
+
+    def __contains__(self, filename):
+        return filename in self.stats
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def segment_distances(px, py, coords):
+    """Returns the distances between points and line segments.
+
+    Unlike the distance to the infinite line through a segment, this is the distance to
+    the closest point of the segment, and it is well-defined for zero-length segments.
+
+    Arguments:
+    px, py -- arrays of point coordinates, broadcast against the rows of coords
+    coords -- an array with a row (x0, y0, x1, y1) for each segment
+    """
+    x0, y0, x1, y1 = coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]
+    dx = x1 - x0
+    dy = y1 - y0
+    length2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px - x0) * dx + (py - y0) * dy) / length2
+    t = np.clip(np.nan_to_num(t, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+    return np.hypot(x0 + t * dx - px, y0 + t * dy - py)
+
+
+def nearest_segments(points, coords, candidates):
+    """Finds the closest candidate segment of each point in one vectorized pass.
+
+    Arguments:
+    points -- an array with a row (x, y) for each point
+    coords -- an array with a row (x0, y0, x1, y1) for each segment
+    candidates -- a list with an array of segment indices for each point
+
+    Returns two arrays, the index of the closest segment and its distance for each
+    point. Points without candidates get index -1 and distance infinity.
+    """
+    counts = np.array([len(c) for c in candidates], dtype=np.intp)
+    nearest = np.full(len(points), -1, dtype=np.intp)
+    distance = np.full(len(points), np.inf)
+    if counts.sum() == 0:
+        return nearest, distance
+    segments = np.concatenate([np.asarray(c, dtype=np.intp) for c in candidates])
+    owners = np.repeat(np.arange(len(points)), counts)
+    d = segment_distances(points[owners, 0], points[owners, 1], coords[segments])
+    # sort by point, then distance, the first pair of each point is its nearest segment
+    order = np.lexsort((d, owners))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = owners[order][1:] != owners[order][:-1]
+    best = order[first]
+    nearest[owners[best]] = segments[best]
+    distance[owners[best]] = d[best]
+    return nearest, distance
@@ -0,0 +1,236 @@
+import os
+from asc_viewer.design import Design, is_global_net
+
+# attributes that follow the nodes of an element line, in this order
+value_attrs = ("SpiceModel", "Value", "Value2", "SpiceLine", "SpiceLine2")
+
+
+def pin_nets(schematic):
+    """Returns a dict from each symbol instance to the net names of its pins, in the
+    order of SpiceOrder. Unconnected pins are None. Instances are keyed by identity, so
+    instances without or with duplicate InstNames are included."""
+    nets = {}
+    for instance in schematic.instances:
+        if instance.symbol is not None:
+            nets[instance] = [None] * len(instance.symbol.pins)
+    for net in schematic.nets.values():
+        for connection in net.connections:
+            nets[connection.instance][connection.pin.symbol_pin.index] = net.name
+    return nets
+
+
+def element_name(instance, name):
+    """Returns the SPICE element name of an instance, which starts with its prefix."""
+    prefix = instance.attrs.get("Prefix", "")
+    if prefix and not name.upper().startswith(prefix.upper()):
+        return prefix + name
+    return name
+
+
+def block_name(filename):
+    """Returns the subcircuit name of the asc file of a hierarchical block."""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def block_ports(design, filename):
+    """Returns the port names of a block, the pin names of its symbol in SpiceOrder."""
+    for asy, asc in design.blocks.items():
+        if asc == filename:
+            symbol = design.symbols.symbols.get(asy)
+            if symbol is not None:
+                return [pin.name for pin in symbol.pins]
+    return []
+
+
+class NetlistWriter:
+    """Streams a SPICE netlist of a Schematic or a Design line by line.
+
+    Lines are generated on demand, so the netlist of a large design never has to be
+    held in memory. Connectivity of each template schematic is computed once and
+    shared by all of its hierarchical instances.
+
+    Arguments:
+    source -- a Schematic, a Design or an AscCanvas
+    flatten -- False to write hierarchical blocks as .subckt definitions, True to
+               expand them into their elements with hierarchical names
+    """
+
+    def __init__(self, source, flatten=False):
+        self.schematic = getattr(source, "schematic", source)  # AscCanvas
+        self.design = source if isinstance(source, Design) else None
+        if self.design is not None:
+            self.schematic = self.design.top.schematic
+        self.flatten = flatten
+        self.pin_nets = {}  # id of template Schematic to pin_nets()
+        self.unconnected = 0
+        self.diagnostics = []  # problems found while writing, see report()
+
+    def report(self, message):
+        """Records and prints a problem with the netlist."""
+        self.diagnostics.append(message)
+        print(message)
+
+    def get_pin_nets(self, schematic):
+        nets = self.pin_nets.get(id(schematic))
+        if nets is None:
+            nets = self.pin_nets[id(schematic)] = pin_nets(schematic)
+        return nets
+
+    def block_file(self, instance):
+        if self.design is None:
+            return None
+        return self.design.block_file(instance)
+
+    def nodes(self, schematic, instance, net_map):
+        nodes = []
+        for net in self.get_pin_nets(schematic)[instance]:
+            if net is None:
+                self.unconnected += 1
+                nodes.append(f"NC_{self.unconnected:02d}")
+            else:
+                nodes.append(net_map(net))
+        return nodes
+
+    def element(self, schematic, instance, name, net_map):
+        """Returns the element line of a symbol instance."""
+        words = [name] + self.nodes(schematic, instance, net_map)
+        filename = self.block_file(instance)
+        if filename is not None:
+            words.append(block_name(filename))
+        else:
+            words.extend(
+                instance.attrs[attr] for attr in value_attrs if instance.attrs.get(attr)
+            )
+        return " ".join(words)
+
+    def elements(self, schematic, prefix="", net_map=str):
+        """Yields the element lines of the primitive instances of a schematic.
+
+        Arguments:
+        schematic -- a template Schematic
+        prefix -- the hierarchical prefix of flattened element names
+        net_map -- a function from net names of the schematic to netlist node names
+        """
+        names = set()
+        for instance in schematic.instances:
+            if instance.symbol is None:
+                continue
+            if self.flatten and self.block_file(instance) is not None:
+                continue
+            name = instance.attrs.get("InstName")
+            if name is None:
+                self.report(
+                    f"Skipping the instance of {instance.name} at {instance.x}, "
+                    f"{instance.y} in {schematic.filename}, it has no InstName"
+                )
+                continue
+            if name in names:
+                self.report(f"Duplicate instance name {name} in {schematic.filename}")
+            names.add(name)
+            name = element_name(instance, name)
+            if prefix:
+                name = f"{name[0]}.{prefix}.{name}"  # keeps the element type letter
+            yield self.element(schematic, instance, name, net_map)
+
+    def directives(self, schematic):
+        """Yields the SPICE directives of a schematic, texts that start with "!"."""
+        for text in schematic.texts:
+            if text["text"].startswith("!"):
+                yield from text["text"][1:].split("\\n")
+
+    def flat_views(self):
+        """Yields (view, net_map) for every view of the design, depth first."""
+        stack = [(self.design.top, str)]
+        while stack:
+            view, net_map = stack.pop()
+            yield view, net_map
+            children = []
+            nets = self.get_pin_nets(view.schematic)
+            for child in view.children():
+                ports = block_ports(self.design, child.schematic.filename)
+                port_nets = dict(zip(ports, nets[child.instance]))
+                children.append((child, self.child_net_map(child, port_nets, net_map)))
+            stack.extend(reversed(children))
+
+    def child_net_map(self, view, port_nets, parent_map):
+        ports = {}
+        for port, net in port_nets.items():
+            if net is None:
+                self.unconnected += 1
+                ports[port] = f"NC_{self.unconnected:02d}"
+            else:
+                ports[port] = parent_map(net)
+
+        def net_map(name):
+            if is_global_net(name):
+                return name
+            node = ports.get(name)
+            return view.qualify_net(name) if node is None else node
+
+        return net_map
+
+    def subcircuits(self):
+        """Yields the template filenames of all blocks below the top level, once each."""
+        seen = {self.schematic.filename}
+        stack = [self.schematic]
+        while stack:
+            schematic = stack.pop()
+            for instance in schematic.instances:
+                if instance.symbol is None:
+                    continue
+                filename = self.block_file(instance)
+                if filename is None or filename in seen:
+                    continue
+                seen.add(filename)
+                yield filename
+                stack.append(self.design.template(filename))
+
+    def lines(self):
+        """Yields the lines of the netlist without line terminators."""
+        self.unconnected = 0
+        self.diagnostics = []
+        yield f"* {self.schematic.filename}"
+        if self.flatten and self.design is not None:
+            for view, net_map in self.flat_views():
+                yield from self.elements(view.schematic, view.prefix, net_map)
+            yield from self.directives(self.schematic)
+            for filename in self.subcircuits():
+                yield from self.directives(self.design.template(filename))
+        else:
+            yield from self.elements(self.schematic)
+            yield from self.directives(self.schematic)
+            if self.design is not None:
+                for filename in self.subcircuits():
+                    yield from self.subcircuit(filename)
+        yield ".end"
+
+    def subcircuit(self, filename):
+        """Yields the lines of the .subckt definition of a block."""
+        name = block_name(filename)
+        schematic = self.design.template(filename)
+        ports = block_ports(self.design, filename)
+        yield ""
+        yield " ".join([".subckt", name] + ports)
+        yield from self.elements(schematic)
+        yield from self.directives(schematic)
+        yield f".ends {name}"
+
+    def __iter__(self):
+        return self.lines()
+
+    def write(self, f):
+        """Writes the netlist to a file object or filename and returns the line count."""
+        if isinstance(f, (str, os.PathLike)):
+            with open(f, "w", encoding="utf-8") as file:
+                return self.write(file)
+        count = 0
+        for line in self.lines():
+            f.write(line)
+            f.write("\n")
+            count += 1
+        return count
+
+
+def write_netlist(source, f, flatten=False):
+    """Writes the SPICE netlist of a Schematic, Design or AscCanvas, see NetlistWriter."""
+    return NetlistWriter(source, flatten).write(f)
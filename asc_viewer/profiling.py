@@ -0,0 +1,124 @@
+import functools
+import time
+
+
+class Span:
+    """Times a with block and records it as a span of a Profiler."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+
+
+class NoSpan:
+    """A with block that isn't timed, returned while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_no_span = NoSpan()
+
+
+class Profiler:
+    """Collects named timing spans and counters, e.g. of loading and painting.
+
+    While the profiler is disabled, span() returns a shared no-op context manager and
+    count() returns at once, so instrumentation can stay in place at little cost.
+
+    Arguments:
+    enabled -- True to start recording at once
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Discards all recorded spans and counters."""
+        self.spans = {}  # name to [calls, total seconds, maximum seconds]
+        self.counters = {}  # name to count
+
+    def span(self, name):
+        """Returns a context manager that records the time of a with block as span name."""
+        if not self.enabled:
+            return _no_span
+        return Span(self, name)
+
+    def add_time(self, name, seconds):
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = [0, 0.0, 0.0]
+        span[0] += 1
+        span[1] += seconds
+        if seconds > span[2]:
+            span[2] = seconds
+
+    def count(self, name, n=1):
+        """Adds n to the counter name."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stats(self):
+        """Returns the recorded spans and counters as a dict with the keys "spans", a dict
+        from name to a dict with calls, total, mean and max in seconds, and "counters".
+        """
+        spans = {
+            name: dict(calls=calls, total=total, mean=total / calls, max=maximum)
+            for name, (calls, total, maximum) in self.spans.items()
+        }
+        return dict(spans=spans, counters=dict(self.counters))
+
+    def report(self):
+        """Returns the recorded spans and counters as a table, slowest spans first."""
+        lines = [f"{'span':<24} {'calls':>7} {'total [ms]':>11} {'mean [ms]':>10} "]
+        lines[0] += f"{'max [ms]':>9}"
+        spans = sorted(self.spans.items(), key=lambda item: -item[1][1])
+        for name, (calls, total, maximum) in spans:
+            lines.append(
+                f"{name:<24} {calls:>7} {total * 1e3:>11.2f} "
+                f"{total / calls * 1e3:>10.3f} {maximum * 1e3:>9.2f}"
+            )
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<24} {'count':>7}")
+            for name, count in sorted(self.counters.items()):
+                lines.append(f"{name:<24} {count:>7}")
+        return "\n".join(lines)
+
+
+# the profiler of the asc_viewer package, it is disabled by default
+profiler = Profiler()
+
+
+def profiled(name):
+    """Decorates a function to record each of its calls as span name of the profiler."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add_time(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,85 @@
+import wx
+
+# font sizes available in LTspice
+font_size_factors = [0.625, 1, 1.5, 2, 2.5, 3.5, 5, 7]
+
+
+class DrawingResources:
+    """The pens, brushes and fonts that schematics are painted with.
+
+    They don't depend on a window, so one set is created per application and shared by
+    all canvases, see shared() and acquire(). Text extents are measured and cached here
+    as well, because they only depend on the fonts. Fonts are created by the default
+    graphics renderer, which is the one used by wx.GraphicsContext.Create().
+    """
+
+    _shared = None
+    _users = 0  # see acquire()
+
+    def __init__(self):
+        self.black_pen = wx.Pen(wx.Colour(0, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
+        self.red_pen = wx.Pen(wx.Colour(255, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
+        self.blue_pen = wx.Pen(wx.Colour(0, 255, 0), width=2, style=wx.PENSTYLE_SOLID)
+        self.no_pen = wx.Pen(wx.Colour(0, 0, 0), style=wx.PENSTYLE_TRANSPARENT)
+        self.orange_brush = wx.Brush(
+            wx.Colour(250, 150, 150), style=wx.BRUSHSTYLE_SOLID
+        )
+        self.no_brush = wx.Brush(wx.Colour(0, 0, 0), style=wx.BRUSHSTYLE_TRANSPARENT)
+        self.white_brush = wx.Brush(wx.Colour(255, 255, 255, 255))
+
+        self.font_styles = {}  # id() of a font to (points, rgba), see add_font()
+        self.fonts = [self.add_font(factor) for factor in font_size_factors]
+        font_size = 0.8
+        self.black_font = self.add_font(font_size, wx.BLACK)
+        self.blue_font = self.add_font(font_size, wx.BLUE)
+        self.red_font = self.add_font(font_size, wx.RED)
+        self.gray_font = self.add_font(font_size, wx.Colour(50, 50, 50, 50))
+
+        self.text_extents = {}  # (text, font size) to (width, height)
+
+        # measures texts and creates paths, it isn't bound to a window
+        self.bitmap = wx.Bitmap(1, 1)
+        self.dc = wx.MemoryDC(self.bitmap)
+        self.gc = wx.GraphicsContext.Create(self.dc)
+
+    @classmethod
+    def shared(cls):
+        """Returns the resources of the application, creating them on first use. This
+        must not be called before the wx.App exists."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def acquire(cls):
+        """Returns the shared resources and counts a user. Each call must be matched by a
+        call of release()."""
+        cls._users += 1
+        return cls.shared()
+
+    @classmethod
+    def release(cls):
+        """Ends a use of the shared resources. They are dropped with the last user, and
+        the next user creates them again."""
+        cls._users -= 1
+        if cls._users == 0:
+            cls._shared = None
+
+    def add_font(self, size, color=wx.BLACK):
+        """Creates a font and remembers its size and color, which graphics fonts don't
+        expose, for painting into a VectorContext."""
+        font = self.create_font(size, color)
+        self.font_styles[id(font)] = (int(10 * size), tuple(color.Get(True)))
+        return font
+
+    @staticmethod
+    def create_font(size, color=wx.BLACK):
+        return wx.GraphicsRenderer.GetDefaultRenderer().CreateFont(
+            wx.Font(
+                int(10 * size),
+                wx.FONTFAMILY_DEFAULT,
+                wx.FONTSTYLE_NORMAL,
+                wx.FONTWEIGHT_NORMAL,
+            ),
+            color,
+        )
@@ -0,0 +1,918 @@
+import contextlib
+import gc
+import os
+import threading
+import numpy as np
+from asc_viewer.bounded_canvas import BoundedCanvas
+from asc_viewer.connectivity import UnionFind, WireEnds, interior_points
+from asc_viewer.hit_test import nearest_segments, segment_distances
+from asc_viewer.profiling import profiled, profiler
+from asc_viewer.search import SearchIndex
+from asc_viewer.spatial_index import GridIndex
+from asc_viewer.symbol import window_types
+from asc_viewer.symbol_instance import SymbolInstance
+
+
+class Net:
+    """A net as used in LtSpice."""
+
+    __slots__ = ("name", "connections", "type", "wires")
+
+    def __init__(self, name):
+        self.name = name
+        self.connections = []  # see Connection class below
+        self.type = None  # denotes spur type as string
+        self.wires = set()
+
+
+class Connection:
+    """A connection between a net and an instance."""
+
+    __slots__ = ("instance", "pin", "pin_name")
+
+    def __init__(self, instance, pin, pin_name):
+        self.instance = instance
+        self.pin = pin
+        self.pin_name = pin_name
+
+
+class WirePoint:
+    """An endpoint of a wire."""
+
+    __slots__ = ("x", "y", "direction", "wires", "net", "junction")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.direction = (
+            None  # direction for orientation of symbols attached to endpoints
+        )
+        self.wires = []
+        self.net = None  # is set after wires are connected to nets
+        self.junction = False  # True if wires meet here in a T or cross, see connect()
+
+
+class Wire:
+    """A wire as drawn in LtSpice."""
+
+    __slots__ = ("x0", "y0", "x1", "y1", "net", "index")
+
+    def __init__(self, x0, y0, x1, y1):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.net = None
+        self.index = None  # row in Schematic.wire_coords
+
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0  # loads that currently run, see _gc_paused()
+_gc_enabled = False  # whether the collector was enabled before the first of them
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Disables the cyclic garbage collector while loads run, also concurrent ones in
+    worker threads. It is enabled again when the last of them ends, if it was enabled
+    when the first one started."""
+    global _gc_pauses, _gc_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_enabled:
+                gc.enable()
+
+
+class LoadCancelled(Exception):
+    """Raised by Schematic.load() when loading is cancelled."""
+
+
+class Schematic(BoundedCanvas):
+    """The model of an LtSpice schematic: wires, nets, flags, texts and symbol instances.
+
+    It parses asc files and connects wires to nets without depending on wx, so it can be
+    used in scripts and batch jobs. AscCanvas displays a Schematic.
+
+    Arguments:
+    symbols -- a mapping from symbol names to Symbol objects
+    instance_name -- the instance name of this schematic, this is only useful it the schematic is an instantiated subcircuit
+
+    Instances, nets, wires and flags are looked up by position with spatial indexes of
+    type index_class, which are bulk loaded after parsing.
+    """
+
+    index_class = GridIndex
+    probe_cell_size = 64  # probe points in a cell share a query, see nearest_wires()
+
+    def __init__(self, symbols=None, instance_name=""):
+        super().__init__()
+        self.symbols = {} if symbols is None else symbols
+        self.instance_name = instance_name
+        self.filename = None
+        self.revision = 0  # incremented when the appearance of the schematic changes
+        self.progress = None  # see load()
+        self.cancel = None
+        self.reset()
+
+    def reset(self):
+        self.revision += 1
+        self.wires = []
+        self.wire_coords = np.zeros((0, 4))  # a row (x0, y0, x1, y1) for each wire
+        self.wire_points = {}
+        self.net_counter = 0  # for auto-labeling nets
+        self.diagnostics = []  # problems found while loading, see report()
+        self.flags = {}  # off-schematic connectors or io pins
+        self.texts = []
+        self.rtree = self.index_class()  # instances and nets of flags
+        self.wire_lookup = self.index_class()
+        self.flag_lookup = self.index_class()  # flags by the area of symbol and label
+        self.nets = {}  # name to net
+        self.symbol_instances = {}
+        self.instances = []  # all instances in file order, also those without symbol
+        self.flag_nets = {}  # flag position to Net
+        self.sheet = (0, 0)
+        self.search_index = None  # built at the end of load()
+
+    def instance_at(self, x, y):
+        """Returns the symbol instance or the net of a flag at a position, or None."""
+        for entry in self.rtree.query((x, y)):
+            return entry.data
+        return None
+
+    def empty_box(self, x, y, size, radius):
+        """Returns a square (x1, y1, x2, y2) of edge length size around a point, in which
+        no instance or net of a flag is hit and no wire is within radius, or None if
+        something is too close. Hovering can't change inside it.
+        """
+        h = size / 2
+        box = (x - h, y - h, x + h, y + h)
+        for entry in self.rtree.query(box):
+            return None
+        near = (box[0] - radius, box[1] - radius, box[2] + radius, box[3] + radius)
+        for entry in self.wire_lookup.query(near):
+            return None
+        return box
+
+    def wire_candidates(self, x, y, radius):
+        """Returns the indices of wires whose bounding boxes are within radius of a point."""
+        rect = (x - radius, y - radius, x + radius, y + radius)
+        return [entry.data.index for entry in self.wire_lookup.query(rect)]
+
+    def probe_candidates(self, points, radius):
+        """Returns the wire candidates of each point of an array for nearest_wires().
+        Points in the same cell of probe_cell_size share one index query over their
+        bounding box, unless most cells hold a single point."""
+        if len(points) > 1:
+            cells = np.floor(points / self.probe_cell_size).astype(np.int64)
+            order = np.lexsort((cells[:, 1], cells[:, 0]))
+            cells = cells[order]
+            starts = np.flatnonzero(np.any(cells[1:] != cells[:-1], axis=1)) + 1
+            if len(starts) < len(points) // 2:
+                starts = np.concatenate(([0], starts))
+                lower = np.minimum.reduceat(points[order], starts) - radius
+                upper = np.maximum.reduceat(points[order], starts) + radius
+                ends = starts.tolist()[1:] + [len(order)]
+                order = order.tolist()
+                candidates = [None] * len(points)
+                for start, end, (x1, y1), (x2, y2) in zip(
+                    starts.tolist(), ends, lower.tolist(), upper.tolist()
+                ):
+                    rect = (x1, y1, x2, y2)
+                    found = [entry.data.index for entry in self.wire_lookup.query(rect)]
+                    for i in order[start:end]:
+                        candidates[i] = found
+                return candidates
+        return [self.wire_candidates(x, y, radius) for x, y in points.tolist()]
+
+    def net_at(self, x, y, radius=5):
+        """Returns the net of the wire closest to a point, or None if no wire is within radius."""
+        return self.nearest_nets([(x, y)], radius)[0]
+
+    def nets_within(self, x, y, radius):
+        """Returns the nets with wires within radius of a point, closest first."""
+        candidates = np.array(self.wire_candidates(x, y, radius), dtype=np.intp)
+        if len(candidates) == 0:
+            return []
+        d = segment_distances(x, y, self.wire_coords[candidates])
+        nets = []
+        for i in np.argsort(d, kind="stable"):
+            if d[i] > radius:
+                break
+            net = self.wires[candidates[i]].net
+            if net not in nets:
+                nets.append(net)
+        return nets
+
+    def nearest_wires(self, points, radius=5):
+        """Returns the wire closest to each point, or None for points without a wire
+        within radius. All points are measured in a single vectorized pass, which is
+        useful for scripted probing.
+
+        Arguments:
+        points -- a sequence of (x, y) points or an array with a row for each point
+        radius -- the maximum distance between a point and a wire
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        candidates = self.probe_candidates(points, radius)
+        nearest, distance = nearest_segments(points, self.wire_coords, candidates)
+        return [
+            self.wires[i] if d <= radius else None
+            for i, d in zip(nearest.tolist(), distance.tolist())
+        ]
+
+    def nearest_nets(self, points, radius=5):
+        """Returns the net closest to each point like nearest_wires()."""
+        return [wire and wire.net for wire in self.nearest_wires(points, radius)]
+
+    def search(self, query, mode="substring", case_sensitive=False):
+        """Returns ranked SearchHit objects for instance names, net names, attribute
+        values and texts that match a query, see SearchIndex.search()."""
+        if self.search_index is None:
+            self.search_index = SearchIndex(self)
+        return self.search_index.search(query, mode, case_sensitive)
+
+    def report(self, message):
+        """Records and prints a problem with the schematic."""
+        self.diagnostics.append(message)
+        print(message)
+
+    @profiled("connect_wires")
+    def connect(self, pin_positions, wires=None, flags=None, ends=None, previous=None):
+        """Connects wires, pins and flags to nets.
+
+        Wire ends, pins and flags at the same position are connected, as are positions
+        on the interior of a wire (T-junctions) and flags with the same name. If several
+        flag names end up on one net, the first one wins and the conflict is reported.
+        Nets without a flag are named N001, N002, ... unless they keep a previous name.
+
+        Arguments:
+        pin_positions -- a dict from (x, y) to a list of (instance, pin) at that position
+        wires -- the wires to connect, all wires if None
+        flags -- a dict from (x, y) to the flags to connect, all flags if None
+        ends -- the WireEnds of all wires if wires is None, to save finding them again
+        previous -- a dict from (x, y) to the automatic name of the net that was there
+                    before, see reload(). A net without a flag keeps the lowest of
+                    these names at its positions, unless another net kept it already.
+
+        Returns a dict from flag positions to the Net of the flag.
+        """
+        if wires is None:
+            wires = self.wires
+            coords = self.wire_coords.astype(np.int64)
+        else:
+            coords = np.array([(w.x0, w.y0, w.x1, w.y1) for w in wires], dtype=np.int64)
+            coords = coords.reshape(-1, 4)
+        if flags is None:
+            flags = self.flags
+
+        # every distinct position is a node of the union-find, wire ends come first
+        bulk = ends is not None  # then add_wire_points_bulk() has set the junctions
+        if not bulk:
+            ends = WireEnds(coords)
+        wire_ends = ends.ends.tolist()
+        positions = list(map(tuple, ends.positions.tolist()))
+        node = dict(zip(positions, range(len(positions))))
+        wire_points = [self.wire_points[pos] for pos in positions]
+        for pos in list(pin_positions) + list(flags):
+            if pos not in node:
+                node[pos] = len(positions)
+                positions.append(pos)
+        sets = UnionFind(len(positions))
+
+        if not bulk:
+            for wire_point in wire_points:
+                wire_point.junction = len(wire_point.wires) > 2
+        for i, j in wire_ends:
+            sets.union(i, j)
+        for i, s in interior_points(positions, coords.tolist()):
+            sets.union(i, wire_ends[s][0])
+            if i < len(wire_points):
+                wire_points[i].junction = True
+        named = {}  # flag name to node
+        for pos, flag in flags.items():
+            sets.union(node[pos], named.setdefault(flag["net"], node[pos]))
+
+        names = {}  # set representative to net name
+        for pos, flag in flags.items():
+            root = sets.find(node[pos])
+            name = names.setdefault(root, flag["net"])
+            if name != flag["net"]:
+                self.report(
+                    f"Conflicting net names {name} and {flag['net']} at {pos}, "
+                    f"using {name}"
+                )
+
+        reuse = {}  # set representative to a previous automatic name
+        claims = {}  # previous name to the set representatives at its positions
+        for pos, name in (previous or {}).items():
+            if pos in node:
+                claims.setdefault(name, set()).add(sets.find(node[pos]))
+        for name in sorted(claims, key=lambda name: (len(name), name)):
+            for root in sorted(claims[name]):
+                if root not in reuse and root not in names:
+                    reuse[root] = name  # the other parts of a split net get new names
+                    break
+
+        nets = {}  # set representative to Net
+
+        def get_net(root):
+            net = nets.get(root)
+            if net is None:
+                name = names.get(root) or reuse.get(root)
+                if name is None:
+                    self.net_counter += 1
+                    name = f"N{self.net_counter:03d}"
+                net = nets[root] = self.nets[name] = Net(name)
+            return net
+
+        for i, wire_point in enumerate(wire_points):
+            wire_point.net = get_net(sets.find(i))
+        for wire, (i, _) in zip(wires, wire_ends):
+            wire.net = wire_points[i].net
+            wire.net.wires.add(wire)
+
+        # pins only form a net of their own if they touch other pins
+        pin_counts = {}
+        for pos, pins in pin_positions.items():
+            root = sets.find(node[pos])
+            pin_counts[root] = pin_counts.get(root, 0) + len(pins)
+        for pos, pins in pin_positions.items():
+            root = sets.find(node[pos])
+            if root not in nets and root not in names and pin_counts[root] < 2:
+                continue  # unconnected pin
+            net = get_net(root)
+            for instance, pin in pins:
+                pin_name = str(pin.symbol_pin.index)
+                net.connections.append(Connection(instance, pin, pin_name))
+
+        return {pos: get_net(sets.find(node[pos])) for pos in flags}
+
+    @profiled("load_asc")
+    def load(self, filename, progress=None, cancel=None):
+        """Loads an LtSpice schematic from the given filename.
+
+        Arguments:
+        filename -- the asc file
+        progress -- a function progress(phase, count) that is called now and then while
+                    loading. The phase is "parse" with the number of lines read so far,
+                    "symbols" with the number of instances, "connect" with the number of
+                    wires or "index" with the number of elements.
+        cancel -- a threading.Event, loading stops with LoadCancelled when it is set
+        """
+        self.filename = filename
+        self.progress = progress
+        self.cancel = cancel
+        try:
+            # loading creates many objects that live on, collecting garbage meanwhile
+            # would only scan them again and again
+            with _gc_paused():
+                self.reset()
+                self.parse(filename)
+                self.build()
+        finally:
+            self.progress = None
+            self.cancel = None
+
+    def step(self, phase, count):
+        """Reports the progress of load() and stops it if it was cancelled."""
+        if self.cancel is not None and self.cancel.is_set():
+            raise LoadCancelled(self.filename)
+        if self.progress is not None:
+            self.progress(phase, count)
+
+    def add_wire_points(self, wire):
+        """Adds the endpoints of a wire to wire_points."""
+        # save endpoints and determine direction of wire ends that is used for some connector symbols and ground
+        # default direction at wire end is down
+        d0, d1 = _end_directions(wire)
+        wire_point0 = self.wire_points.get((wire.x0, wire.y0))
+        if wire_point0 is None:
+            wire_point0 = WirePoint(wire.x0, wire.y0)
+            self.wire_points[(wire.x0, wire.y0)] = wire_point0
+        wire_point1 = self.wire_points.get((wire.x1, wire.y1))
+        if wire_point1 is None:
+            wire_point1 = WirePoint(wire.x1, wire.y1)
+            self.wire_points[(wire.x1, wire.y1)] = wire_point1
+        wire_point0.wires.append(wire)
+        wire_point1.wires.append(wire)
+        if d0 is not None:
+            wire_point0.direction = d0
+        if d1 is not None:
+            wire_point1.direction = d1
+
+    def add_wire_points_bulk(self, ends):
+        """Creates the endpoints of all wires at once, with the directions and junctions
+        that add_wire_points() and connect() would give them.
+
+        Arguments:
+        ends -- the WireEnds of all wires
+        """
+        wires = self.wires
+        order = [wires[end >> 1] for end in ends.order.tolist()]
+        starts = ends.starts.tolist()
+        directions = ends.directions.tolist()
+        junctions = (ends.degrees > 2).tolist()
+        for i, (x, y) in enumerate(ends.positions.tolist()):
+            wire_point = WirePoint(x, y)
+            wire_point.direction = directions[i] or None
+            wire_point.junction = junctions[i]
+            wire_point.wires = order[starts[i] : starts[i + 1]]
+            self.wire_points[(x, y)] = wire_point
+
+    def remove_wire_points(self, wire):
+        """Removes a wire from its endpoints, endpoints without wires are deleted."""
+        for pos in ((wire.x0, wire.y0), (wire.x1, wire.y1)):
+            wire_point = self.wire_points.get(pos)
+            if wire_point is None or wire not in wire_point.wires:
+                continue
+            wire_point.wires.remove(wire)
+            if not wire_point.wires:
+                del self.wire_points[pos]
+                continue
+            # the direction is set by the remaining wires, the last one wins
+            wire_point.direction = None
+            for other in wire_point.wires:
+                d0, d1 = _end_directions(other)
+                if pos == (other.x0, other.y0) and d0 is not None:
+                    wire_point.direction = d0
+                if pos == (other.x1, other.y1) and d1 is not None:
+                    wire_point.direction = d1
+
+    @profiled("parse")
+    def parse(self, filename):
+        """Reads the elements of an asc file and looks up their symbols, without
+        connecting them, see build()."""
+        self.reset_extent()
+        ints = {}  # repeated coordinates share one int object
+        wire_xy = []  # x0, y0, x1, y1 of all wires
+        xs, ys = [], []  # positions of other elements, for the extent
+        with open(filename, encoding="iso-8859-1") as f:
+            for count, line in enumerate(f):
+                if count % 4096 == 0:
+                    self.step("parse", count)
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                words = line.split(" ")
+                if words[0] == "WIRE":
+                    xy = [ints.get(w) or ints.setdefault(w, int(w)) for w in words[1:5]]
+                    wire = Wire(*xy)
+                    wire_xy += xy
+                    wire.index = len(self.wires)
+                    self.wires.append(wire)
+                elif words[0] == "TEXT":
+                    x = int(words[1])
+                    y = int(words[2])
+                    align = words[3]
+                    size = int(words[4])
+                    text = " ".join(words[5:])
+                    xs.append(x - 15)
+                    ys.append(y - 15)
+                    # text is aligned when it is painted, because that requires font metrics
+                    t = dict(x=x, y=y, align=align, size=size, text=text)
+                    self.texts.append(t)
+                elif words[0] == "SHEET":
+                    self.sheet = (int(words[2]), int(words[3]))
+                elif words[0] == "FLAG":
+                    last_flag = dict(
+                        x=int(words[1]), y=int(words[2]), net=words[3], type=None
+                    )
+                    xs.append(last_flag["x"])
+                    ys.append(last_flag["y"])
+                    self.flags[(last_flag["x"], last_flag["y"])] = last_flag
+                elif words[0] == "IOPIN":
+                    last_flag["type"] = words[3]
+                elif words[0] == "SYMATTR":
+                    attr = " ".join(words[2:])
+                    if words[1] == "InstName" and self.instance_name != "":
+                        attr = self.instance_name + "." + attr
+                    self.instances[-1].attrs[words[1]] = attr
+                elif words[0] == "SYMBOL":
+                    instance = SymbolInstance(
+                        self,
+                        words[1],
+                        int(words[2]),
+                        int(words[3]),
+                        words[4][0] == "M",
+                        int(words[4][1:]),
+                    )
+                    self.instances.append(instance)
+                    xs.append(instance.x)
+                    ys.append(instance.y)
+                elif words[0] == "WINDOW":
+                    x = int(words[2])
+                    y = int(words[3])
+                    window = dict(
+                        type=window_types[words[1]],
+                        x=x,
+                        y=y,
+                        align=words[4],
+                        size=int(words[5]),
+                    )
+                    self.instances[-1].windows[window["type"]] = window
+
+        # parse all referenced symbols at once, in parallel if the library supports it
+        self.step("symbols", len(self.instances))
+        with profiler.span("load_symbols"):
+            names = {instance.name for instance in self.instances}
+            preload = getattr(self.symbols, "preload", None)
+            if preload:
+                # a SymbolLibrary prefers the symbols next to the schematic, like LTspice
+                directory = os.path.dirname(os.path.abspath(filename))
+                preload(names, directory=directory)
+                found = {
+                    name: self.symbols.get(name, directory=directory) for name in names
+                }
+            else:
+                found = {name: self.symbols.get(name) for name in names}
+
+            # load symbol instances
+            for instance in self.instances:
+                s = found[instance.name]
+                if s is None:
+                    self.report(f"Symbol not found {instance.name}")
+                    continue
+                s.load()
+                # default attrs from the symbol file are overridden by SYMATTR lines
+                instance.attrs = s.attrs | instance.attrs
+                instance.set_symbol(s)
+                name = instance.attrs.get("InstName")
+                if name is None:
+                    self.report(
+                        f"Instance of {instance.name} at {instance.x}, {instance.y} "
+                        "has no InstName"
+                    )
+                elif name in self.symbol_instances:
+                    self.report(f"Duplicate instance name {name}")
+                else:
+                    self.symbol_instances[name] = instance
+                xs += [instance.x + s.x1, instance.x + s.x2]
+                ys += [instance.y + s.y1, instance.y + s.y2]
+
+        self.wire_coords = np.array(wire_xy, dtype=float).reshape(-1, 4)
+        self.check_extent_array(self.wire_coords[:, 0::2], self.wire_coords[:, 1::2])
+        self.check_extent_array(np.array(xs), np.array(ys))
+        self.x1 -= 10
+        self.y1 -= 10
+        self.x2 = max(self.x2, self.sheet[0])
+        self.y2 = max(self.y2, self.sheet[1])
+        self.w = self.x2 - self.x1
+        self.h = self.y2 - self.y1
+
+    def build(self):
+        """Connects parsed elements to nets and bulk loads the lookup indexes."""
+        self.step("connect", len(self.wires))
+        with profiler.span("wire_points"):
+            ends = WireEnds(self.wire_coords)
+            self.add_wire_points_bulk(ends)
+        self.flag_nets = self.connect(self.pin_positions(), ends=ends)
+        self.step("index", len(self.wires) + len(self.instances) + len(self.flags))
+        with profiler.span("build_index"):
+            self.rtree = self.index_class(
+                [
+                    (instance, self.instance_rect(instance))
+                    for instance in self.instances
+                ]
+                + [
+                    (self.flag_nets[pos], self.flag_net_rect(f))
+                    for pos, f in self.flags.items()
+                ]
+            )
+            self.wire_lookup = self.index_class(
+                [(wire, self.wire_rect(wire)) for wire in self.wires]
+            )
+            self.flag_lookup = self.index_class(
+                [(flag, self.flag_rect(flag)) for flag in self.flags.values()]
+            )
+        with profiler.span("search_index"):
+            self.search_index = SearchIndex(self)
+
+    def pin_positions(self):
+        """Returns a dict from (x, y) to a list of (instance, pin) at that position."""
+        pin_positions = {}
+        for instance in self.instances:
+            for pin in instance.pins:
+                pin_positions.setdefault((pin.x, pin.y), []).append((instance, pin))
+        return pin_positions
+
+    def instance_rect(self, instance):
+        """Returns the area of an instance in the main index."""
+        x, y = instance.x, instance.y
+        s = instance.symbol
+        if s is None:
+            return (x - 5, y - 5, x + 5, y + 5)
+        x1, y1 = instance.matrix.transform_point(s.x1, s.y1)
+        x2, y2 = instance.matrix.transform_point(s.x2, s.y2)
+        if x1 > x2:
+            x1, x2 = x2, x1
+        if y1 > y2:
+            y1, y2 = y2, y1
+        return (x + x1, y + y1, x + x2, y + y2)
+
+    def wire_rect(self, wire):
+        min_x, min_y = min(wire.x0, wire.x1), min(wire.y0, wire.y1)
+        max_x, max_y = max(wire.x0, wire.x1), max(wire.y0, wire.y1)
+        return (min_x, min_y, max_x + 1, max_y + 1)
+
+    def flag_net_rect(self, flag):
+        """Returns the area of a flag where its net is found in the main index."""
+        return (flag["x"], flag["y"], flag["x"] + 20, flag["y"] + 20)
+
+    def flag_rect(self, flag):
+        """Returns the area of a flag symbol and its label."""
+        # flag symbols extend 20 units in any direction, labels extend to the right
+        x, y = flag["x"], flag["y"]
+        return (x - 20, y - 20, x + 20 + 10 * len(flag["net"]), y + 20)
+
+    def reload(self):
+        """Parses the file again and applies the differences to this schematic.
+
+        Elements are compared by their definition in the file. Unchanged wires,
+        instances, flags and texts keep their objects and cached state. Index entries
+        are only replaced for changed elements, and only the nets that changed elements
+        belong to or touch are connected again. The revision isn't incremented, so a
+        canvas only needs to repaint the changed areas.
+
+        Returns a SchematicChanges object.
+        """
+        new = Schematic(self.symbols, self.instance_name)
+        new.parse(self.filename)
+        changes = SchematicChanges()
+
+        wires, changes.wires = _merge(self.wires, new.wires, _wire_key)
+        instances, changes.instances = _merge(
+            self.instances, new.instances, _instance_key
+        )
+        flags, changes.flags = _merge(
+            list(self.flags.values()), list(new.flags.values()), _flag_key
+        )
+        self.texts, changes.texts = _merge(self.texts, new.texts, _text_key)
+        if not changes:
+            return changes
+        removed_wires, added_wires = changes.wires
+        removed_instances, added_instances = changes.instances
+        removed_flags, added_flags = changes.flags
+
+        # find the nets that changed elements belong to or touch
+        flag_names = {flag["net"] for flag in self.flags.values()}
+        pin_nets = {}  # id of pin to net
+        for net in self.nets.values():
+            for connection in net.connections:
+                pin_nets[id(connection.pin)] = net
+        affected = {}  # id of net to net
+
+        def touch(net):
+            if net is not None:
+                affected[id(net)] = net
+
+        for wire in removed_wires:
+            touch(wire.net)
+        for instance in removed_instances:
+            for pin in instance.pins:
+                touch(pin_nets.get(id(pin)))
+        for flag in removed_flags:
+            touch(self.flag_nets.get((flag["x"], flag["y"])))
+        names = {flag["net"] for flag in removed_flags + added_flags}
+        for name in names:
+            touch(self.nets.get(name))
+        changed_pins = []  # pins that are connected again
+        for wire in added_wires:
+            for entry in self.wire_lookup.query(self.wire_rect(wire)):
+                other = entry.data
+                if _touches(wire, other) or _touches(other, wire):
+                    touch(other.net)
+            for entry in self.rtree.query(self.wire_rect(wire)):
+                instance = entry.data
+                if isinstance(instance, SymbolInstance):
+                    for pin in instance.pins:
+                        if _on_wire(pin.x, pin.y, wire):
+                            touch(pin_nets.get(id(pin)))
+                            changed_pins.append(pin)
+            for entry in self.flag_lookup.query(self.wire_rect(wire)):
+                flag = entry.data
+                if _on_wire(flag["x"], flag["y"], wire):
+                    touch(self.flag_nets.get((flag["x"], flag["y"])))
+        for instance in added_instances:
+            for pin in instance.pins:
+                changed_pins.append(pin)
+                touch(self.flag_nets.get((pin.x, pin.y)))
+                for entry in self.wire_lookup.query((pin.x, pin.y)):
+                    if _on_wire(pin.x, pin.y, entry.data):
+                        touch(entry.data.net)
+                for entry in self.rtree.query((pin.x, pin.y)):
+                    other = entry.data
+                    if isinstance(other, SymbolInstance):
+                        for other_pin in other.pins:
+                            if (other_pin.x, other_pin.y) == (pin.x, pin.y):
+                                touch(pin_nets.get(id(other_pin)))
+                                changed_pins.append(other_pin)
+        for flag in added_flags:
+            pos = (flag["x"], flag["y"])
+            for entry in self.wire_lookup.query(pos):
+                if _on_wire(*pos, entry.data):
+                    touch(entry.data.net)
+            for entry in self.rtree.query(pos):
+                instance = entry.data
+                if isinstance(instance, SymbolInstance):
+                    for pin in instance.pins:
+                        if (pin.x, pin.y) == pos:
+                            touch(pin_nets.get(id(pin)))
+
+        # replace changed elements
+        for wire in removed_wires:
+            self.remove_wire_points(wire)
+        for wire in added_wires:
+            self.add_wire_points(wire)
+        self.wires = wires
+        for i, wire in enumerate(wires):
+            wire.index = i
+        self.wire_coords = np.array(
+            [(w.x0, w.y0, w.x1, w.y1) for w in self.wires], dtype=float
+        ).reshape(-1, 4)
+        for instance in added_instances:
+            instance.parent = self
+        # the first instance of a duplicate name wins, like in parse()
+        self.symbol_instances = {}
+        for instance in instances:
+            name = instance.attrs.get("InstName")
+            if instance.symbol is not None and name is not None:
+                self.symbol_instances.setdefault(name, instance)
+        self.instances = instances
+        self.flags = {(flag["x"], flag["y"]): flag for flag in flags}
+        self.diagnostics = list(new.diagnostics)
+
+        # connect the elements of affected nets and added elements again, nets without
+        # a flag keep their names, so that labels and netlists don't change on every save
+        previous = {}  # position to the automatic name of an affected net
+        for net in affected.values():
+            if self.nets.get(net.name) is net:
+                del self.nets[net.name]
+            if net.name in flag_names:
+                continue
+            for wire in net.wires:
+                previous[(wire.x0, wire.y0)] = net.name
+                previous[(wire.x1, wire.y1)] = net.name
+            for connection in net.connections:
+                previous[(connection.pin.x, connection.pin.y)] = net.name
+        region_wires = [w for w in wires if w.net is None or id(w.net) in affected]
+        pins = {id(pin) for pin in changed_pins}
+        pins.update(id(c.pin) for net in affected.values() for c in net.connections)
+        region_pins = {}
+        for instance in instances:
+            for pin in instance.pins:
+                if id(pin) in pins:
+                    region_pins.setdefault((pin.x, pin.y), []).append((instance, pin))
+        region_flags = {
+            pos: flag
+            for pos, flag in self.flags.items()
+            if id(self.flag_nets.get(pos)) in affected or pos not in self.flag_nets
+        }
+        old_flag_nets = self.flag_nets
+        self.flag_nets = {
+            pos: net for pos, net in old_flag_nets.items() if pos in self.flags
+        }
+        self.flag_nets.update(
+            self.connect(region_pins, region_wires, region_flags, previous=previous)
+        )
+
+        # update indexes
+        self.wire_lookup.remove(removed_wires)
+        self.wire_lookup.bulk_load([(w, self.wire_rect(w)) for w in added_wires])
+        self.flag_lookup.remove(removed_flags)
+        self.flag_lookup.bulk_load([(f, self.flag_rect(f)) for f in added_flags])
+        # flags are found by their net in the main index, replace the nets that changed
+        self.rtree.remove(list(affected.values()) + removed_instances)
+        self.rtree.bulk_load(
+            [(instance, self.instance_rect(instance)) for instance in added_instances]
+            + [
+                (net, self.flag_net_rect(self.flags[pos]))
+                for pos, net in self.flag_nets.items()
+                if old_flag_nets.get(pos) is not net
+            ]
+        )
+        self.search_index = None  # rebuilt on the next search
+
+        for wire in removed_wires + added_wires:
+            changes.rects.append(self.wire_rect(wire))
+        for instance in removed_instances + added_instances:
+            changes.rects.append(self.instance_rect(instance))
+        for flag in removed_flags + added_flags:
+            changes.rects.append(self.flag_rect(flag))
+
+        extent = new.get_extent()
+        changes.extent_changed = extent != self.get_extent()
+        self.x1, self.y1, self.x2, self.y2 = extent
+        self.w = self.x2 - self.x1
+        self.h = self.y2 - self.y1
+        return changes
+
+
+class SchematicChanges:
+    """The differences found by Schematic.reload().
+
+    wires, instances, flags, texts -- (removed, added) lists of elements
+    rects -- areas (x1, y1, x2, y2) of changed wires, instances and flags
+    extent_changed -- True if the extent of the schematic changed
+    """
+
+    def __init__(self):
+        self.wires = ([], [])
+        self.instances = ([], [])
+        self.flags = ([], [])
+        self.texts = ([], [])
+        self.rects = []
+        self.extent_changed = False
+
+    def __bool__(self):
+        return any(
+            removed or added
+            for removed, added in (self.wires, self.instances, self.flags, self.texts)
+        )
+
+
+def _end_directions(wire):
+    """Returns the directions that a wire sets at its two ends, None for no change."""
+    d0 = d1 = None
+    if wire.x0 == wire.x1:  # vertical
+        if wire.y0 < wire.y1:
+            d0 = 2  # top
+        else:
+            d1 = 2
+    if wire.y0 == wire.y1:  # horizontal
+        if wire.x0 < wire.x1:
+            d0, d1 = 1, 3  # left, right
+        else:
+            d0, d1 = 3, 1
+    return d0, d1
+
+
+def _on_wire(x, y, wire):
+    """Returns True if a point is on a wire, including its ends."""
+    if not (
+        min(wire.x0, wire.x1) <= x <= max(wire.x0, wire.x1)
+        and min(wire.y0, wire.y1) <= y <= max(wire.y0, wire.y1)
+    ):
+        return False
+    return (wire.x1 - wire.x0) * (y - wire.y0) == (wire.y1 - wire.y0) * (x - wire.x0)
+
+
+def _touches(wire, other):
+    """Returns True if an end of wire is on other."""
+    return _on_wire(wire.x0, wire.y0, other) or _on_wire(wire.x1, wire.y1, other)
+
+
+def _wire_key(wire):
+    return (wire.x0, wire.y0, wire.x1, wire.y1)
+
+
+def _instance_key(instance):
+    windows = tuple(
+        (name, tuple(window.items())) for name, window in instance.windows.items()
+    )
+    return (
+        instance.name,
+        instance.x,
+        instance.y,
+        instance.mirror,
+        instance.rotation,
+        tuple(instance.attrs.items()),
+        windows,
+    )
+
+
+def _flag_key(flag):
+    return (flag["x"], flag["y"], flag["net"], flag["type"])
+
+
+def _text_key(text):
+    return (text["x"], text["y"], text["align"], text["size"], text["text"])
+
+
+def _merge(old, new, key):
+    """Matches elements of a reloaded file with the current ones by key.
+
+    Returns a list in the order of new that reuses matching old elements, and a tuple
+    (removed old elements, added new elements).
+    """
+    unmatched = {}
+    for element in old:
+        unmatched.setdefault(key(element), []).append(element)
+    merged = []
+    added = []
+    for element in new:
+        matches = unmatched.get(key(element))
+        if matches:
+            merged.append(matches.pop(0))
+        else:
+            merged.append(element)
+            added.append(element)
+    removed = [element for matches in unmatched.values() for element in matches]
+    return merged, (removed, added)
@@ -0,0 +1,175 @@
+import bisect
+import re
+
+# kinds of searchable items in order of their rank
+KINDS = ("instance", "net", "attribute", "text")
+
+# match classes in order of their rank
+EXACT, PREFIX, OTHER = 0, 1, 2
+
+MODES = ("exact", "prefix", "substring", "regex")
+
+
+class SearchHit:
+    """A search result.
+
+    kind -- one of KINDS
+    text -- the matching instance name, net name, attribute value or text
+    data -- the SymbolInstance, Net or text dict the text belongs to
+    field -- the attribute name for attribute hits, None otherwise
+    x, y -- the location of the hit in schematic coordinates
+    match -- EXACT, PREFIX or OTHER
+    """
+
+    __slots__ = ("kind", "text", "data", "field", "x", "y", "match")
+
+    def __init__(self, kind, text, data, field, x, y, match):
+        self.kind = kind
+        self.text = text
+        self.data = data
+        self.field = field
+        self.x = x
+        self.y = y
+        self.match = match
+
+    def rank(self):
+        return (
+            self.match,
+            KINDS.index(self.kind),
+            len(self.text),
+            self.text,
+            self.y,
+            self.x,
+        )
+
+
+class SearchIndex:
+    """A sorted index of instance names, net names, attribute values and texts of a
+    schematic that answers exact, prefix, substring and regex queries.
+
+    Arguments:
+    schematic -- a loaded Schematic
+    """
+
+    def __init__(self, schematic):
+        items = []  # (lowercase text, text, kind, data, field, x, y)
+        for name, instance in schematic.symbol_instances.items():
+            x, y = instance.x, instance.y
+            items.append((name.lower(), name, "instance", instance, None, x, y))
+            for field, value in instance.attrs.items():
+                if field == "InstName" or not value:
+                    continue
+                items.append((value.lower(), value, "attribute", instance, field, x, y))
+
+        # nets are found at their flags or, without flags, at one of their wires
+        net_positions = {}
+        for flag in schematic.flags.values():
+            net_positions.setdefault(flag["net"], (flag["x"], flag["y"]))
+        for name, net in schematic.nets.items():
+            pos = net_positions.get(name)
+            if pos is None and net.wires:
+                wire = min(net.wires, key=lambda wire: (wire.y0, wire.x0))
+                pos = (wire.x0, wire.y0)
+            if pos is None and net.connections:
+                pin = net.connections[0].pin
+                pos = (pin.x, pin.y)
+            if pos is None:
+                continue
+            items.append((name.lower(), name, "net", net, None, *pos))
+
+        for text in schematic.texts:
+            value = text["text"]
+            items.append(
+                (value.lower(), value, "text", text, None, text["x"], text["y"])
+            )
+
+        items.sort(key=lambda item: item[0])
+        self.items = items
+        self.keys = [item[0] for item in items]
+        # the needle, case sensitivity and candidates of the last substring search
+        self.last_substring = None
+
+    def search(self, query, mode="substring", case_sensitive=False):
+        """Returns the hits for a query, best matches first.
+
+        Arguments:
+        query -- the text to search for, or a regular expression in regex mode
+        mode -- one of MODES
+        case_sensitive -- True to match case
+        """
+        if not query:
+            return []
+        lower = query.lower()
+        if mode in ("exact", "prefix"):
+            start = bisect.bisect_left(self.keys, lower)
+            if mode == "exact":
+                end = bisect.bisect_right(self.keys, lower, start)
+            else:
+                end = bisect.bisect_left(self.keys, lower + "\U0010ffff", start)
+            candidates = self.items[start:end]
+            if case_sensitive:
+                test = (
+                    (lambda text: text == query)
+                    if mode == "exact"
+                    else (lambda text: text.startswith(query))
+                )
+                candidates = [item for item in candidates if test(item[1])]
+        elif mode == "substring":
+            needle, field = (query, 1) if case_sensitive else (lower, 0)
+            items = self.items
+            last = self.last_substring
+            if last and last[1] == case_sensitive and last[0] in needle:
+                # typing into the find dialog only narrows the previous candidates
+                items = last[2]
+            candidates = [item for item in items if needle in item[field]]
+            self.last_substring = (needle, case_sensitive, candidates)
+        elif mode == "regex":
+            pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+            candidates = [item for item in self.items if pattern.search(item[1])]
+        else:
+            raise ValueError(f"Unknown search mode {mode}, expected one of {MODES}")
+
+        hits = []
+        for key, text, kind, data, field, x, y in candidates:
+            compare = text if case_sensitive else key
+            needle = query if case_sensitive else lower
+            if compare == needle:
+                match = EXACT
+            elif compare.startswith(needle):
+                match = PREFIX
+            else:
+                match = OTHER
+            hits.append(SearchHit(kind, text, data, field, x, y, match))
+        hits.sort(key=SearchHit.rank)
+        return hits
+
+
+class SearchResults:
+    """Steps through the hits of a search without searching again.
+
+    Arguments:
+    hits -- a list of SearchHit objects
+    """
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.position = -1
+
+    def next(self):
+        """Returns the next hit, wrapping around, or None if there are no hits."""
+        return self.step(1)
+
+    def previous(self):
+        """Returns the previous hit, wrapping around, or None if there are no hits."""
+        return self.step(-1)
+
+    def step(self, delta):
+        if not self.hits:
+            return None
+        if self.position < 0 and delta < 0:
+            self.position = 0
+        self.position = (self.position + delta) % len(self.hits)
+        return self.hits[self.position]
+
+    def __len__(self):
+        return len(self.hits)
@@ -0,0 +1,197 @@
+import math
+from collections import namedtuple
+import rtreelib as rt
+from asc_viewer.profiling import profiler
+
+Rect = namedtuple("Rect", "min_x min_y max_x max_y")
+
+
+class IndexEntry:
+    """An item of a spatial index, with the same attributes as rtreelib entries."""
+
+    __slots__ = ("data", "rect")
+
+    def __init__(self, data, rect):
+        self.data = data
+        self.rect = rect
+
+
+def _query_rect(loc):
+    """Returns a Rect for a query location, which is a point (x, y) or a rect (x1, y1, x2, y2)."""
+    if len(loc) == 2:
+        return Rect(loc[0], loc[1], loc[0], loc[1])
+    return Rect(*loc)
+
+
+class GridIndex:
+    """A spatial index that buckets items into the cells of a uniform grid.
+
+    Items are best added in bulk, because the cell size is chosen from the extent and
+    number of items. Schematics are spread fairly evenly over a sheet, so a grid answers
+    window and point queries with a few dict lookups, and building it is linear.
+
+    Arguments:
+    items -- an iterable of (data, rect) tuples, rect is (x1, y1, x2, y2)
+    cell_size -- edge length of grid cells, chosen from the items if None
+    """
+
+    def __init__(self, items=(), cell_size=None):
+        self.entries = []
+        self.cells = {}  # (column, row) to list of entries
+        self.cell_size = cell_size
+        self.bulk_load(items)
+
+    def bulk_load(self, items):
+        """Adds many items at once. The cell size is chosen from the first items added."""
+        entries = [IndexEntry(data, Rect(*rect)) for data, rect in items]
+        if not entries:
+            return
+        self.entries.extend(entries)
+        if self.cell_size is None:
+            self.rebuild()
+        else:
+            for entry in entries:
+                self._add(entry)
+
+    def rebuild(self, cell_size=None):
+        """Redistributes all entries into cells, choosing a cell size if none is given."""
+        if cell_size is None:
+            min_x = min(e.rect.min_x for e in self.entries)
+            min_y = min(e.rect.min_y for e in self.entries)
+            max_x = max(e.rect.max_x for e in self.entries)
+            max_y = max(e.rect.max_y for e in self.entries)
+            area = max(max_x - min_x, 1) * max(max_y - min_y, 1)
+            # about one item per cell, but not smaller than typical grid snapping
+            cell_size = max(16, math.sqrt(area / len(self.entries)) * 2)
+        self.cell_size = cell_size
+        self.cells = {}
+        for entry in self.entries:
+            self._add(entry)
+
+    def _cell_range(self, rect):
+        s = self.cell_size
+        return (
+            range(math.floor(rect.min_x / s), math.floor(rect.max_x / s) + 1),
+            range(math.floor(rect.min_y / s), math.floor(rect.max_y / s) + 1),
+        )
+
+    def _add(self, entry):
+        cols, rows = self._cell_range(entry.rect)
+        for col in cols:
+            for row in rows:
+                self.cells.setdefault((col, row), []).append(entry)
+
+    def insert(self, data, rect):
+        entry = IndexEntry(data, Rect(*rect))
+        self.entries.append(entry)
+        if self.cell_size is None:
+            self.rebuild()
+        else:
+            self._add(entry)
+
+    def remove(self, data):
+        """Removes the entries of the given data objects, which are compared by identity."""
+        ids = {id(d) for d in data}
+        if not ids:
+            return
+        removed = [entry for entry in self.entries if id(entry.data) in ids]
+        if not removed:
+            return
+        self.entries = [entry for entry in self.entries if id(entry.data) not in ids]
+        for entry in removed:
+            cols, rows = self._cell_range(entry.rect)
+            for col in cols:
+                for row in rows:
+                    cell = self.cells[(col, row)]
+                    cell.remove(entry)
+                    if not cell:
+                        del self.cells[(col, row)]
+
+    def query(self, loc):
+        """Yields the entries that intersect a point (x, y) or a rect (x1, y1, x2, y2)."""
+        if not self.entries:
+            return
+        q = _query_rect(loc)
+        cols, rows = self._cell_range(q)
+        seen = set() if len(cols) > 1 or len(rows) > 1 else None
+        cells = self.cells
+        if profiler.enabled:
+            profiler.count("index cells visited", len(cols) * len(rows))
+            tested = sum(len(cells.get((col, row), ())) for col in cols for row in rows)
+            profiler.count("index entries tested", tested)
+        for col in cols:
+            for row in rows:
+                for entry in cells.get((col, row), ()):
+                    r = entry.rect
+                    if (
+                        r.min_x <= q.max_x
+                        and r.max_x >= q.min_x
+                        and r.min_y <= q.max_y
+                        and r.max_y >= q.min_y
+                    ):
+                        if seen is not None:
+                            if id(entry) in seen:
+                                continue
+                            seen.add(id(entry))
+                        yield entry
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RTreeIndex:
+    """A spatial index backed by rtreelib with the same interface as GridIndex.
+
+    Items are inserted one by one, which is slower to build than GridIndex but doesn't
+    depend on an even distribution of items. Unlike GridIndex, rtreelib only finds items
+    that overlap the query with a positive area, so rects of points and straight wires
+    need to be widened.
+    """
+
+    def __init__(self, items=()):
+        self.tree = rt.RTree()
+        self.size = 0
+        self.bulk_load(items)
+
+    def bulk_load(self, items):
+        for data, rect in items:
+            self.insert(data, rect)
+
+    def insert(self, data, rect):
+        self.tree.insert(data, rt.Rect(*rect))
+        self.size += 1
+
+    def remove(self, data):
+        """Removes the entries of the given data objects by rebuilding the tree, because
+        rtreelib doesn't support deletion."""
+        ids = {id(d) for d in data}
+        if not ids:
+            return
+        items = [
+            (entry.data, entry.rect) for entry in self if id(entry.data) not in ids
+        ]
+        self.tree = rt.RTree()
+        self.size = 0
+        self.bulk_load(items)
+
+    def query(self, loc):
+        if profiler.enabled:
+            # traverses the tree again, only while profiling
+            nodes = sum(1 for _ in self.tree.query_nodes(loc, leaves=False))
+            profiler.count("tree nodes visited", nodes)
+            entries = sum(len(node.entries) for node in self.tree.query_nodes(loc))
+            profiler.count("index entries tested", entries)
+        for entry in self.tree.query(loc):
+            r = entry.rect
+            yield IndexEntry(entry.data, Rect(r.min_x, r.min_y, r.max_x, r.max_y))
+
+    def __iter__(self):
+        for entry in self.tree.get_leaf_entries():
+            r = entry.rect
+            yield IndexEntry(entry.data, Rect(r.min_x, r.min_y, r.max_x, r.max_y))
+
+    def __len__(self):
+        return self.size
@@ -1,6 +1,8 @@
-import wx
+import marshal
 import math
+import threading
 from asc_viewer.bounded_canvas import BoundedCanvas
+from asc_viewer.profiling import profiled, profiler
 
 window_types = {
     "0": "InstName",
@@ -14,6 +16,8 @@ window_types = {
 class Pin:
     """An LtSpice symbol pin as defined in an .asy file"""
 
+    __slots__ = ("name", "order", "align", "x", "y", "text_x", "text_y", "index")
+
     def __init__(self):
         self.name = None
         self.order = None
@@ -22,17 +26,26 @@ class Pin:
         self.y = None
         self.text_x = None
         self.text_y = None
+        self.index = None  # zero-based, assigned in pin order after loading
 
     def rect(self):
         return (self.x - 5, self.y - 5, 10, 10)
 
 
 class Symbol(BoundedCanvas):
-    """An LtSpice symbol as defined in an .asy file"""
+    """An LtSpice symbol as defined in an .asy file.
+
+    Loading a symbol only parses its geometry and does not need wx. The path that
+    draws the symbol is created on demand by get_path() when it is painted. Symbols
+    may be loaded from several threads, e.g. by schematics that load in the background
+    and share a SymbolLibrary, each symbol is parsed once.
+    """
+
+    # serializes parsing, so that threads never see or extend a half-loaded symbol
+    load_lock = threading.RLock()
 
-    def __init__(self, parent, filename):
+    def __init__(self, filename):
         """Arguments:
-        parent -- A wx class that provides a graphics context, i.e., AscViewer
         filename -- the full filename of the .asy file
         """
         super().__init__()
@@ -47,15 +60,50 @@ class Symbol(BoundedCanvas):
         self.texts = []
         self.rectangles = []
         self.attrs = {}
-        self.parent = parent
+        # (type of graphics context, orientation or None) to paths, the paths of a wx
+        # context and of a VectorContext can't be mixed, see get_path() and get_paths()
+        self.paths = {}
+        self.text_positions = None  # aligned texts, see align_texts()
+
+    def __getstate__(self):
+        # graphics paths are bound to wx and text positions depend on font metrics,
+        # both are recreated after unpickling
+        state = self.__dict__.copy()
+        state["paths"] = {}
+        state["text_positions"] = None
+        return state
+
+    def get_state(self):
+        """Returns the parsed geometry as plain dicts, lists and tuples, which marshal
+        can serialize much faster than pickle can serialize the symbol."""
+        state = self.__getstate__()
+        state["pins"] = [
+            tuple(getattr(pin, name) for name in Pin.__slots__) for pin in self.pins
+        ]
+        return state
+
+    def set_state(self, state):
+        """Restores the geometry of get_state() and marks the symbol loaded."""
+        pins = []
+        for values in state["pins"]:
+            pin = Pin()
+            for name, value in zip(Pin.__slots__, values):
+                setattr(pin, name, value)
+            pins.append(pin)
+        self.__dict__.update(state, pins=pins, loaded=False)
+        self.loaded = True  # last, other threads only use complete symbols
 
     def load(self):
-        """Loads the symbol from file."""
+        """Loads the symbol from file, unless it is loaded."""
         if self.loaded:
             return
-        dc = wx.ClientDC(self.parent)
-        gc = wx.GraphicsContext.Create(dc)
+        with self.load_lock:
+            if not self.loaded:  # another thread may have loaded it meanwhile
+                self.parse()
 
+    @profiled("Symbol.load")
+    def parse(self):
+        """Parses the asy file, see load()."""
         f = open(self.filename, encoding="iso-8859-1")
         self.reset_extent()
         last_pin = None
@@ -99,7 +147,15 @@ class Symbol(BoundedCanvas):
                 if angle2 > angle1:
                     angle2 -= 360
                 coords = [cx, cy, rx, ry, angle1, angle2]
-                c = dict(style=words[1], coords=coords)
+                # tessellate the arc into a polyline
+                points = [
+                    (
+                        cx + rx * math.cos(a / 180 * math.pi),
+                        cy + ry * math.sin(a / 180 * math.pi),
+                    )
+                    for a in [angle1] + list(range(angle1, angle2, -10))
+                ]
+                c = dict(style=words[1], coords=coords, points=points)
                 self.arcs.append(c)
             elif words[0] == "TEXT":
                 x = int(words[1])
@@ -108,11 +164,8 @@ class Symbol(BoundedCanvas):
                 size = int(words[4])
                 text = " ".join(words[5:])
                 self.check_extent(x - 15, y - 15)
-
-                x, y, y2 = self.parent.align_text(
-                    x, y, text, align, size, 0, gc.CreateMatrix()
-                )
-                t = dict(x=x, y=y, size=size, text=text)
+                # text is aligned when it is painted, because that requires font metrics
+                t = dict(x=x, y=y, align=align, size=size, text=text)
                 self.texts.append(t)
             elif words[0] == "WINDOW":
                 x = int(words[2])
@@ -169,15 +222,26 @@ class Symbol(BoundedCanvas):
                     assert f"Unknown pin attribute {key}"
             elif words[0] == "SYMATTR":
                 self.attrs[words[1]] = " ".join(words[2:])
-        self.loaded = True
+        f.close()
 
         # assign zero-based pin indices
         self.pins.sort(key=lambda pin: pin.order)
         for i, pin in enumerate(self.pins):
             pin.index = i
+        self.loaded = True  # last, other threads only use complete symbols
+        profiler.count("symbols parsed")
+
+    def get_path(self, gc):
+        """Returns a graphics path that draws the symbol, creating it on first use.
 
-        # create the path that draws the symbol
-        path = self.parent.gc.CreatePath()
+        Arguments:
+        gc -- a wx graphics context or a VectorContext that creates the path.
+        """
+        key = (type(gc), None)
+        path = self.paths.get(key)
+        if path is not None:
+            return path
+        path = gc.CreatePath()
         for line in self.lines:
             c = line["coords"]
             path.MoveToPoint(c[0], c[1])
@@ -185,71 +249,139 @@ class Symbol(BoundedCanvas):
         for circle in self.circles:
             path.AddEllipse(*circle["coords"])
         for arc in self.arcs:
-            c = arc["coords"]
-            path.MoveToPoint(
-                c[0] + c[2] * math.cos(c[4] / 180 * math.pi),
-                c[1] + c[3] * math.sin(c[4] / 180 * math.pi),
-            )
-            for a in range(c[4], c[5], -10):
-                path.AddLineToPoint(
-                    c[0] + c[2] * math.cos(a / 180 * math.pi),
-                    c[1] + c[3] * math.sin(a / 180 * math.pi),
-                )
-        self.path = path
+            points = arc["points"]
+            path.MoveToPoint(*points[0])
+            for point in points[1:]:
+                path.AddLineToPoint(*point)
+        self.paths[key] = path
+        return path
 
-    def paint(self, gc, old_m, rotation, attrs, windows):
-        """Paints the symbol in its instantiated representation as part of a larger schematic.
-        Arguments:
+    def layout_text(self, canvas, matrix, rotation, attrs, windows):
+        """Places the pin names and window texts of an instance. The result only depends on
+        the instance, so it is computed once and reused for painting.
 
-        gc -- A wx graphics context.
-        old_m -- A matrix to be used for drawing the symbol, rotation is supplied separately.
+        Arguments:
+        canvas -- The AscCanvas that provides text alignment.
+        matrix -- The Affine orientation of the symbol instance.
         rotation -- Symbol rotation in degrees.
         attrs -- Attributes of the symbol instance.
         windows -- Windows supplied by the symbold instance.
-        """
-        gc.StrokePath(self.path)
-        for text in self.texts:
-            gc.SetFont(self.parent.fonts[text["size"]])
-            gc.DrawText(text["text"], text["x"], text["y"])
-        for rect in self.rectangles:
-            gc.DrawRectangle(*rect["coords"])
-
-        combined_windows = self.windows | windows
-
-        m = gc.GetTransform()
-        gc.SetTransform(old_m)  # un-rotated transform
-        # get text rotation matrix
-        text_m = gc.CreateMatrix(*old_m.Get())
-        text_m.Invert()
-        text_m.Concat(m)
 
+        Returns a list of (size, text, x, y, angle) tuples relative to the instance position.
+        """
+        layout = []
         for pin in self.pins:
             if not pin.name:
                 continue  # unnamed pin
             if not pin.align or pin.align == "None":
                 continue  # hidden pin
-            x, y, y2 = self.parent.align_text(
-                pin.text_x, pin.text_y, pin.name, pin.align, 2, 0, text_m
+            x, y, y2 = canvas.align_text(
+                pin.text_x, pin.text_y, pin.name, pin.align, 2, 0, matrix
             )  # pin names have a fixed size of 1.5
-            gc.DrawText(pin.name, x, y, angle=0)
+            layout.append((2, pin.name, x, y, 0))
 
-        for type, window in combined_windows.items():
-            gc.SetFont(self.parent.fonts[window["size"]])
+        for type, window in (self.windows | windows).items():
             text = attrs.get(type)
             if text is None:
                 text = self.attrs.get(type, "NA")  # use default attr from symbol
-            x, y, y2 = self.parent.align_text(
+            x, y, y2 = canvas.align_text(
                 window["x"],
                 window["y"],
                 text,
                 window["align"],
                 window["size"],
                 rotation,
-                text_m,
+                matrix,
             )
             angle = 90 if window["align"][0] == "V" else 0
             if rotation == 270 or rotation == 90:
                 angle -= 90
             if angle:
                 y = y2
-            gc.DrawText(text, x, y, angle=angle / 180 * math.pi)
+            layout.append((window["size"], text, x, y, angle / 180 * math.pi))
+        return layout
+
+    def get_paths(self, gc, matrix):
+        """Returns the paths that draw the symbol and its rectangles in the orientation of
+        an instance. There are only 8 orientations, so transformed paths are cached.
+
+        Arguments:
+        gc -- a wx graphics context or a VectorContext that creates the paths.
+        matrix -- the Affine orientation of an instance.
+        """
+        key = (type(gc), matrix)
+        paths = self.paths.get(key)
+        if paths is None:
+            m = gc.CreateMatrix(*matrix.get())
+            path = gc.CreatePath()
+            path.AddPath(self.get_path(gc))
+            path.Transform(m)
+            rectangles = gc.CreatePath()
+            for rect in self.rectangles:
+                rectangles.AddRectangle(*rect["coords"])
+            rectangles.Transform(m)
+            paths = self.paths[key] = (path, rectangles)
+        return paths
+
+    def paint(self, gc, canvas, matrix, text_layout, show_text=True):
+        """Paints the symbol in its instantiated representation as part of a larger schematic.
+        Arguments:
+
+        gc -- A wx graphics context, translated to the instance position but not rotated.
+        canvas -- The AscCanvas that provides fonts.
+        matrix -- The Affine orientation of the instance.
+        text_layout -- Pin names and window texts of the instance, see layout_text().
+        show_text -- False to skip pin names and windows, e.g., when zoomed out.
+        """
+        path, rectangles = self.get_paths(gc, matrix)
+        gc.StrokePath(path)
+        if self.rectangles:
+            gc.DrawPath(rectangles)  # rectangles are filled with the current brush
+        if not show_text:
+            return
+        font_size = None
+        for size, text, x, y, angle in text_layout:
+            if size != font_size:
+                gc.SetFont(canvas.fonts[size])
+                font_size = size
+            gc.DrawText(text, x, y, angle=angle)
+
+    def align_texts(self, canvas):
+        """Returns the positions (x, y) of the texts of the symbol file in symbol
+        coordinates. They are computed once because alignment requires font metrics,
+        and they aren't stored in the SymbolCache.
+
+        Arguments:
+        canvas -- The AscCanvas that provides text alignment.
+        """
+        if self.text_positions is None:
+            positions = []
+            for text in self.texts:
+                x, y, y2 = canvas.align_text(
+                    text["x"], text["y"], text["text"], text["align"], text["size"], 0
+                )
+                positions.append((x, y))
+            self.text_positions = positions
+        return self.text_positions
+
+    def paint_texts(self, gc, canvas):
+        """Paints the texts of the symbol file.
+
+        Arguments:
+        gc -- A wx graphics context, transformed to the position and orientation of an instance.
+        canvas -- The AscCanvas that provides fonts and text alignment.
+        """
+        for text, pos in zip(self.texts, self.align_texts(canvas)):
+            gc.SetFont(canvas.fonts[text["size"]])
+            gc.DrawText(text["text"], *pos)
+
+
+def parse_symbols(filenames):
+    """Parses asy files in a worker process of SymbolLibrary.preload(). Returns the
+    states of the symbols, see Symbol.get_state(), serialized by marshal."""
+    states = []
+    for filename in filenames:
+        symbol = Symbol(filename)
+        symbol.parse()
+        states.append(symbol.get_state())
+    return marshal.dumps(states)
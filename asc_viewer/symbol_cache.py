@@ -0,0 +1,103 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from asc_viewer.symbol import Symbol
+
+# increment whenever the pickled layout of Symbol changes
+CACHE_VERSION = 5
+
+
+def default_cache_dir():
+    """Returns the directory for cache files, following the XDG convention."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "asc_viewer")
+
+
+class SymbolCache:
+    """A persistent cache of parsed symbols for one directory of asy files.
+
+    The cache is a single file per directory that is read in bulk on first use. Its
+    name and a header that is read before the symbols hold the cache version, so files
+    written by other versions are never unpickled. Each entry is keyed by the path,
+    modification time and size of an asy file, so symbols that haven't changed are
+    restored without parsing, and edited or deleted files are dropped.
+
+    Arguments:
+    directory -- a directory that contains asy files
+    cache_dir -- the directory where the cache file is stored, see default_cache_dir()
+    """
+
+    def __init__(self, directory, cache_dir=None):
+        self.directory = os.path.abspath(directory)
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        key = hashlib.sha1(self.directory.encode("utf-8")).hexdigest()[:16]
+        self.filename = os.path.join(
+            cache_dir, f"symbols-{key}-v{CACHE_VERSION}.pickle"
+        )
+        self.entries = None  # asy filename to ((mtime, size), Symbol), read lazily
+        self.symbols = {}  # asy filename to Symbol, for symbols handed out by get()
+        self.stats = {}  # asy filename to (mtime, size)
+        self.cached = set()  # asy filenames whose cache entries are up to date
+
+    def read(self):
+        """Returns the entries of the cache file, or an empty dict if the file is
+        missing, unreadable or was written by a different version."""
+        try:
+            with open(self.filename, "rb") as f:
+                if pickle.load(f) != (CACHE_VERSION, self.directory):
+                    return {}
+                return pickle.load(f)
+        except Exception:
+            # a stale or damaged cache is only a cache miss, whatever unpickling raises
+            return {}
+
+    def get(self, filename):
+        """Returns the symbol for an asy file in the directory. An unchanged symbol is
+        restored from the cache, otherwise it is created unloaded and parsed on first use.
+        """
+        if self.entries is None:
+            self.entries = self.read()  # all entries are read in bulk
+        filename = os.path.join(self.directory, os.path.basename(filename))
+        st = os.stat(filename)
+        stat = (st.st_mtime_ns, st.st_size)
+        entry = self.entries.get(filename)
+        if entry and entry[0] == stat:
+            symbol = entry[1]
+            self.cached.add(filename)
+        else:
+            symbol = Symbol(filename)
+        self.symbols[filename] = symbol
+        self.stats[filename] = stat
+        return symbol
+
+    def save(self):
+        """Writes symbols that were parsed since they were handed out by get() to the
+        cache file. Entries of other files are kept unless the files were deleted."""
+        loaded = {f for f, symbol in self.symbols.items() if symbol.loaded}
+        if loaded <= self.cached:
+            return
+        entries = {
+            f: entry
+            for f, entry in (self.entries or {}).items()
+            if f not in self.symbols and os.path.exists(f)
+        }
+        for f in loaded:
+            entries[f] = (self.stats[f], self.symbols[f])
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            # write to a temporary file first, so concurrent readers never see a partial cache
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.filename))
+            with os.fdopen(fd, "wb") as f:
+                # the header is a separate pickle, see read()
+                pickle.dump((CACHE_VERSION, self.directory), f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(entries, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.filename)
+        except OSError as e:
+            print(f"Cannot write symbol cache {self.filename}: {e}")
+            return
+        self.entries = entries
+        self.cached = loaded
@@ -1,16 +1,47 @@
-import wx
-import math
+from asc_viewer.affine import Affine
 
 
 class Pin:
+    __slots__ = ("symbol_pin", "x", "y")
+
     def __init__(self, symbol_pin):
         self.symbol_pin = symbol_pin
         self.x = None
         self.y = None
 
 
+def no_user_paint(instance, gc, user_data):
+    pass
+
+
 class SymbolInstance:
+    __slots__ = (
+        "parent",
+        "prefix",
+        "name",
+        "x",
+        "y",
+        "rotation",
+        "mirror",
+        "attrs",
+        "symbol",
+        "pins",
+        "windows",
+        "text_layout",
+        "matrix",
+        "user_data",
+        "user_paint",
+    )
+
     def __init__(self, parent, name, x, y, mirror, rotation):
+        """Arguments:
+        parent -- the schematic that contains the instance, provides the instance_name prefix
+        name -- the name of the symbol
+        x, y -- position of the instance
+        mirror -- True if the symbol is mirrored
+        rotation -- rotation in degrees
+        """
+        self.parent = parent
         self.prefix = parent.instance_name
         self.name = name
         self.x = x
@@ -21,32 +52,18 @@ class SymbolInstance:
         self.symbol = None
         self.pins = []
         self.windows = {}
+        self.text_layout = None  # placed pin names and windows, computed on first paint
 
-        self.matrix = parent.gc.CreateMatrix()
-        if self.mirror:
-            a, b, c, d, x, y = self.matrix.Get()
-            self.matrix.Set(a=-a)
-        self.matrix.Rotate(self.rotation / 180 * math.pi)
+        self.matrix = Affine.orientation(self.mirror, self.rotation)
 
         self.user_data = None  # links arbitrary user data to this instance
-
-        self.black_pen = wx.Pen(wx.Colour(0, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
-        self.red_pen = wx.Pen(wx.Colour(255, 0, 0), width=2, style=wx.PENSTYLE_SOLID)
-        self.blue_pen = wx.Pen(wx.Colour(0, 255, 0), width=2, style=wx.PENSTYLE_SOLID)
-        self.no_pen = wx.Pen(wx.Colour(0, 0, 0), style=wx.PENSTYLE_TRANSPARENT)
-        self.orange_brush = wx.Brush(
-            wx.Colour(250, 150, 150), style=wx.BRUSHSTYLE_SOLID
-        )
-        self.no_brush = wx.Brush(wx.Colour(0, 0, 0), style=wx.BRUSHSTYLE_TRANSPARENT)
-        self.user_paint = (
-            lambda self, gc, user_data: None
-        )  # hook for a user-defined paint function
+        self.user_paint = no_user_paint  # hook for a user-defined paint function
 
     def set_symbol(self, symbol):
         self.symbol = symbol
         for symbol_pin in self.symbol.pins:
             pin = Pin(symbol_pin)
-            dx, dy = self.matrix.TransformPoint(symbol_pin.x, symbol_pin.y)
+            dx, dy = self.matrix.transform_point(symbol_pin.x, symbol_pin.y)
             pin.x = self.x + round(
                 dx
             )  # rounding is important for pins and wires to line up and connect
@@ -56,8 +73,8 @@ class SymbolInstance:
     def get_extent(self):
         # returns the extent of the instance on the canvas
         x0, y0, x1, y1 = self.symbol.get_extent()
-        x0, y0 = self.matrix.TransformPoint(x0, y0)
-        x1, y1 = self.matrix.TransformPoint(x1, y1)
+        x0, y0 = self.matrix.transform_point(x0, y0)
+        x1, y1 = self.matrix.transform_point(x1, y1)
         x0 += self.x
         x1 += self.x
         y0 += self.y
@@ -67,25 +84,55 @@ class SymbolInstance:
 
     def set_user_data(self, user_data):
         self.user_data = user_data
+        self.parent.revision += 1  # cached renderings are out of date
 
     def set_user_paint_func(self, func):
         self.user_paint = func
+        self.parent.revision += 1
 
-    def paint(self, gc):
-        old_m = gc.GetTransform()
-        gc.Translate(self.x, self.y)
-        old_m2 = gc.GetTransform()  # translated to symbol position, but no rotation
+    def layout_text(self, canvas):
+        """Returns the placed pin names and windows, see Symbol.layout_text(). They are
+        placed on first use.
+
+        Arguments:
+        canvas -- the AscCanvas that provides text alignment.
+        """
+        if self.text_layout is None:
+            self.text_layout = self.symbol.layout_text(
+                canvas, self.matrix, self.rotation, self.attrs, self.windows
+            )
+        return self.text_layout
+
+    def reset_text_layout(self):
+        """Places pin names and windows again on the next paint, e.g., after attrs changed."""
+        self.text_layout = None
+        self.parent.revision += 1
 
-        # concat order was inconsistent (https://github.com/wxWidgets/wxWidgets/issues/17670), fixed now
-        m2 = gc.CreateMatrix(*old_m2.Get())
-        m2.Concat(self.matrix)
-        gc.SetTransform(m2)
+    def has_user_paint(self):
+        return self.user_paint is not no_user_paint
 
+    def paint(self, gc, canvas, show_text=True):
+        """Paints the instance.
+
+        Arguments:
+        gc -- a wx graphics context.
+        canvas -- the AscCanvas that provides fonts, pens and text alignment.
+        show_text -- False to skip texts, pin names and windows.
+        """
         if not self.symbol:
             return
-        self.user_paint(self, gc, self.user_data)
+        gc.Translate(self.x, self.y)
+        if self.has_user_paint() or (show_text and self.symbol.texts):
+            # only these need a transform with the orientation of the instance
+            gc.PushState()
+            gc.ConcatTransform(gc.CreateMatrix(*self.matrix.get()))
+            self.user_paint(self, gc, self.user_data)
+            if show_text:
+                self.symbol.paint_texts(gc, canvas)
+            gc.PopState()
 
-        self.symbol.paint(gc, old_m2, self.rotation, self.attrs, self.windows)
-        gc.SetBrush(self.no_brush)
-        gc.SetPen(self.black_pen)
-        gc.SetTransform(old_m)
+        text_layout = self.layout_text(canvas) if show_text else None
+        self.symbol.paint(gc, canvas, self.matrix, text_layout, show_text)
+        gc.SetBrush(canvas.no_brush)
+        gc.SetPen(canvas.black_pen)
+        gc.Translate(-self.x, -self.y)
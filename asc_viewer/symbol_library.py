@@ -0,0 +1,278 @@
+import marshal
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from asc_viewer.symbol import Symbol, parse_symbols
+from asc_viewer.symbol_cache import SymbolCache
+
+
+def normalize_name(name):
+    """Returns the lookup key of a symbol name as used in asc files.
+
+    LTspice refers to symbols in subdirectories of its library with backslashes,
+    e.g. "Opamps\\\\LT1001" or "Misc\\\\signal". Names are case insensitive.
+    """
+    name = name.replace("\\", "/").lower()
+    while "//" in name:
+        name = name.replace("//", "/")
+    return name.strip("/")
+
+
+class SymbolLibrary:
+    """An index of the symbols in one or more directory trees.
+
+    Directory trees are scanned once when they are added. Symbols are looked up by
+    their path relative to a library root, e.g. "Opamps\\\\LT1001", or by their bare
+    name, e.g. "LT1001". Symbol objects are only created when they are first looked
+    up, and unchanged symbols are restored from a SymbolCache. Like in LTspice, a bare
+    name is first looked up in the directory of the schematic that uses it, if that is
+    given, so that a block symbol next to a schematic wins over a library symbol of the
+    same name. A library can be shared
+    by several schematics and AscCanvas windows, see acquire(). Its methods may be
+    called from several threads, e.g. by schematics that load in the background.
+
+    Arguments:
+    symbol_paths -- a directory or a list of directories that contain asy files
+    use_cache -- restore unchanged symbols from a persistent cache, see SymbolCache
+    cache_dir -- the directory where cache files are stored
+    """
+
+    # preload() parses fewer symbols than this in the calling process, submitting them
+    # to the workers takes longer than parsing them
+    parallel_threshold = 256
+    chunk_size = 64  # symbols per task of a worker process
+
+    _shared = None  # see acquire()
+    _users = 0
+
+    def __init__(self, symbol_paths=[], use_cache=True, cache_dir=None):
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.files = {}  # normalized qualified name to asy filename
+        self.bare_names = {}  # normalized bare name to asy filename, first match wins
+        self.symbols = {}  # asy filename to Symbol
+        self.overrides = {}  # normalized name to user-defined Symbol
+        self.caches = {}  # directory to SymbolCache
+        self.local = {}  # directory to (mtime, normalized bare name to asy filename)
+        self.lock = threading.RLock()  # guards the dicts above and the caches
+        self.executor = None  # worker processes of preload(), started on first use
+        self.executor_workers = 0
+        self.add_paths(symbol_paths)
+
+    @classmethod
+    def acquire(cls, symbol_paths=[]):
+        """Returns the library shared by the application and adds symbol_paths to it.
+        The library is created for the first user, and each call must be matched by a
+        call of release(). Symbols are parsed once for all schematics that use it.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        cls._users += 1
+        cls._shared.add_paths(symbol_paths)
+        return cls._shared
+
+    @classmethod
+    def release(cls):
+        """Ends a use of the shared library. When the last user releases it, parsed
+        symbols are written to the symbol cache and the library is dropped, so that
+        its symbols can be freed."""
+        cls._users -= 1
+        if cls._users == 0:
+            cls._shared.save_cache()
+            cls._shared.close()
+            cls._shared = None
+
+    def add_paths(self, symbol_paths, recursive=True):
+        """Scans directory trees for asy files.
+
+        Arguments:
+        symbol_paths -- a directory or a list of directories
+        recursive -- False to only scan the given directories, not their subdirectories
+        """
+        if isinstance(symbol_paths, str):
+            symbol_paths = [symbol_paths]
+        for root in symbol_paths:
+            root = os.path.abspath(root)
+            found = []  # (qualified name, bare name, filename)
+            for dirpath, dirnames, filenames in os.walk(root):
+                if recursive:
+                    dirnames.sort()  # deterministic precedence of bare names
+                else:
+                    dirnames.clear()
+                for name in sorted(filenames):
+                    if not name.lower().endswith(".asy"):
+                        continue
+                    filename = os.path.join(dirpath, name)
+                    qualified = os.path.relpath(filename, root)[:-4]
+                    found.append((qualified, name[:-4], filename))
+            with self.lock:
+                for qualified, name, filename in found:
+                    self.files.setdefault(normalize_name(qualified), filename)
+                    self.bare_names.setdefault(normalize_name(name), filename)
+
+    def local_files(self, directory):
+        """Returns a dict from normalized bare names to the asy files in a directory. The
+        directory is listed on first use and again when it has changed."""
+        directory = os.path.abspath(directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return {}
+        with self.lock:
+            entry = self.local.get(directory)
+            if entry is None or entry[0] != mtime:
+                files = {}
+                for name in sorted(os.listdir(directory)):
+                    if name.lower().endswith(".asy"):
+                        filename = os.path.join(directory, name)
+                        files.setdefault(normalize_name(name[:-4]), filename)
+                entry = self.local[directory] = (mtime, files)
+            return entry[1]
+
+    def find(self, name, directory=None):
+        """Returns the asy filename of a symbol name, or None if it is unknown.
+
+        Arguments:
+        name -- a symbol name as used in asc files
+        directory -- the directory of the schematic, its asy files take precedence
+        """
+        key = normalize_name(name)
+        if directory is not None:
+            filename = self.local_files(directory).get(key)
+            if filename is not None:
+                return filename
+        filename = self.files.get(key)
+        if filename is None:
+            filename = self.bare_names.get(key.rsplit("/", 1)[-1])
+        return filename
+
+    def get(self, name, default=None, directory=None):
+        """Returns the symbol with the given name, or default if it is unknown.
+
+        Arguments:
+        name -- a symbol name as used in asc files
+        default -- the result for unknown names
+        directory -- the directory of the schematic, its asy files take precedence
+        """
+        with self.lock:
+            symbol = self.overrides.get(normalize_name(name))
+            if symbol is not None:
+                return symbol
+            filename = self.find(name, directory)
+            if filename is None:
+                return default
+            symbol = self.symbols.get(filename)
+            if symbol is None:
+                symbol = self.create_symbol(filename)
+                self.symbols[filename] = symbol
+            return symbol
+
+    def preload(self, names, gc=None, max_workers=None, directory=None):
+        """Parses the named symbols that aren't loaded yet across a process pool.
+
+        The pool is started on first use and kept until close(). Its processes are
+        spawned rather than forked, because preload() runs in worker threads of the wx
+        application when schematics load in the background, and forking a threaded wx
+        process can deadlock the child. While the workers parse chunks of symbols from
+        the front, the calling thread parses the chunks that no worker has started from
+        the back, so preload() isn't slower than parsing alone while the pool starts.
+
+        Arguments:
+        names -- symbol names as used in asc files, unknown names are ignored
+        gc -- a wx graphics context, if given the paths that draw the symbols are created
+        max_workers -- the number of worker processes, defaults to the number of CPUs
+        directory -- the directory of the schematic, its asy files take precedence
+        """
+        symbols = {}
+        for name in names:
+            symbol = self.get(name, directory=directory)
+            if symbol is not None:
+                symbols[id(symbol)] = symbol
+        symbols = list(symbols.values())
+        pending = [symbol for symbol in symbols if not symbol.loaded]
+        workers = max_workers or os.cpu_count() or 1
+        if len(pending) < self.parallel_threshold or workers < 2:
+            for symbol in pending:
+                symbol.load()
+        else:
+            self.parse_parallel(pending, workers)
+        if gc is not None:
+            for symbol in symbols:
+                symbol.get_path(gc)
+
+    def parse_parallel(self, symbols, workers):
+        executor = self.get_executor(workers)
+        size = self.chunk_size
+        chunks = [symbols[i : i + size] for i in range(0, len(symbols), size)]
+        futures = [
+            executor.submit(parse_symbols, [symbol.filename for symbol in chunk])
+            for chunk in chunks
+        ]
+        for chunk, future in zip(reversed(chunks), reversed(futures)):
+            if future.done() and not future.cancelled():
+                states = marshal.loads(future.result())
+                with Symbol.load_lock:
+                    for symbol, state in zip(chunk, states):
+                        if not symbol.loaded:  # unless another thread loaded it
+                            # keep the identity of symbols that may be referenced
+                            symbol.set_state(state)
+            else:
+                # not started, or a running chunk that would keep this thread waiting
+                future.cancel()
+                for symbol in chunk:
+                    symbol.load()
+
+    def get_executor(self, workers):
+        """Returns the process pool of preload(), it is started on first use."""
+        with self.lock:
+            if self.executor is None or self.executor_workers != workers:
+                self.close()
+                self.executor = ProcessPoolExecutor(
+                    workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self.executor_workers = workers
+            return self.executor
+
+    def close(self):
+        """Stops the worker processes of preload(), a later preload() starts new ones."""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def create_symbol(self, filename):
+        if not self.use_cache:
+            return Symbol(filename)
+        directory = os.path.dirname(filename)
+        cache = self.caches.get(directory)
+        if cache is None:
+            cache = self.caches[directory] = SymbolCache(directory, self.cache_dir)
+        return cache.get(filename)
+
+    def save_cache(self):
+        """Stores symbols that have been parsed since they were looked up in the cache."""
+        with self.lock:
+            for cache in self.caches.values():
+                cache.save()
+
+    def __getitem__(self, name):
+        symbol = self.get(name)
+        if symbol is None:
+            raise KeyError(name)
+        return symbol
+
+    def __setitem__(self, name, symbol):
+        """Adds a symbol that isn't in a library directory, it takes precedence over files."""
+        with self.lock:
+            self.overrides[normalize_name(name)] = symbol
+
+    def __contains__(self, name):
+        with self.lock:
+            return normalize_name(name) in self.overrides or self.find(name) is not None
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
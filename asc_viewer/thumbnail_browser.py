@@ -0,0 +1,210 @@
+import wx
+import wx.lib.newevent
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from asc_viewer.thumbnail_cache import ThumbnailCache
+
+# posted by ThumbnailBrowser when a thumbnail is double clicked or activated with the
+# keyboard, the event has the attribute filename
+ThumbnailActivatedEvent, EVT_THUMBNAIL_ACTIVATED = wx.lib.newevent.NewEvent()
+
+# the offscreen canvas of a worker process, see _init_worker()
+_app = _frame = _canvas = None
+
+
+def _init_worker(symbol_paths):
+    global _app, _frame, _canvas
+    from asc_viewer.asc_canvas import AscCanvas
+
+    _app = wx.App(False)
+    _frame = wx.Frame(None)
+    _canvas = AscCanvas(_frame, symbol_paths)
+    # the workers already run in parallel, they parse symbols in their own process
+    _canvas.symbols.parallel_threshold = float("inf")
+
+
+def _render_thumbnail(filename, thumbnail, size):
+    """Renders a schematic into a thumbnail file, this runs in a worker process. Returns
+    an error message or None."""
+    try:
+        _canvas.load_asc(filename)
+        os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+        tmp = f"{thumbnail}.{os.getpid()}.png"
+        _canvas.export(tmp, size=size, full_detail=False)
+        os.replace(tmp, thumbnail)  # other processes never see a partial thumbnail
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def find_schematics(directory):
+    """Returns the asc files in a directory tree, sorted by path."""
+    filenames = []
+    for dirpath, dirnames, names in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(names):
+            if name.lower().endswith(".asc"):
+                filenames.append(os.path.join(dirpath, name))
+    return filenames
+
+
+class ThumbnailBrowser(wx.ListCtrl):
+    """Shows thumbnails of the asc files in a directory tree.
+
+    Thumbnails are read from a ThumbnailCache. Missing and stale thumbnails are rendered
+    by a pool of worker processes, each with an offscreen AscCanvas and its own symbol
+    library. Thumbnails fit whole schematics into a few pixels, so they are painted at
+    the lowest level of detail, with symbols as boxes. Files are hashed in a background
+    thread, so the window stays responsive while a large project is scanned.
+
+    Arguments:
+    parent -- the parent window
+    symbol_paths -- directories of asy files for rendering
+    cache -- a ThumbnailCache, by default one with thumbnails of 160 x 120 pixels
+    max_workers -- the number of worker processes, defaults to the number of CPUs
+    """
+
+    def __init__(self, parent, symbol_paths=[], cache=None, max_workers=None):
+        super().__init__(
+            parent, style=wx.LC_ICON | wx.LC_AUTOARRANGE | wx.LC_SINGLE_SEL
+        )
+        self.symbol_paths = list(symbol_paths)
+        if cache is None:
+            cache = ThumbnailCache()
+        self.cache = cache
+        self.max_workers = max_workers
+        self.executor = None  # created when the first thumbnail is rendered
+        self.futures = set()  # pending renderings, see on_rendered()
+        self.futures_lock = threading.Lock()  # done callbacks run in pool threads
+        self.directory = None
+        self.filenames = []
+        self.generation = 0  # incremented when the directory changes
+        self.create_image_list()
+
+        self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_activated)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+
+    def create_image_list(self):
+        w, h = self.cache.size
+        image_list = wx.ImageList(w, h)
+        placeholder = wx.Bitmap(w, h)
+        dc = wx.MemoryDC(placeholder)
+        dc.SetBackground(wx.Brush(wx.Colour(240, 240, 240)))
+        dc.Clear()
+        dc.SetPen(wx.Pen(wx.Colour(200, 200, 200)))
+        dc.SetBrush(wx.TRANSPARENT_BRUSH)
+        dc.DrawRectangle(0, 0, w, h)
+        dc.SelectObject(wx.NullBitmap)
+        image_list.Add(placeholder)
+        self.SetImageList(image_list, wx.IMAGE_LIST_NORMAL)
+        self.image_list = image_list  # the list control doesn't own it
+
+    def set_symbol_paths(self, symbol_paths):
+        """Sets the symbol directories and shows the thumbnails rendered with them."""
+        self.symbol_paths = list(symbol_paths)
+        if self.directory is None:
+            self.shutdown()  # workers load symbols once, when they start
+        else:
+            self.set_directory(self.directory)
+
+    def set_directory(self, directory):
+        """Shows the asc files of a directory tree. Thumbnails are shown as soon as they
+        are read from the cache or rendered."""
+        self.shutdown()
+        self.generation += 1
+        self.directory = os.path.abspath(directory)
+        self.filenames = find_schematics(self.directory)
+        self.DeleteAllItems()
+        self.create_image_list()
+        for i, filename in enumerate(self.filenames):
+            self.InsertItem(i, os.path.relpath(filename, self.directory), 0)
+        threading.Thread(
+            target=self.scan,
+            args=(self.generation, list(self.filenames)),
+            daemon=True,
+        ).start()
+
+    def scan(self, generation, filenames):
+        """Looks up the thumbnails of filenames and renders the stale ones, this runs in a
+        background thread."""
+        for i, filename in enumerate(filenames):
+            if generation != self.generation:
+                return  # the directory changed
+            try:
+                thumbnail = self.cache.get(filename, self.symbol_paths)
+            except OSError:
+                continue  # the file was deleted
+            if os.path.exists(thumbnail):
+                wx.CallAfter(self.show_thumbnail, generation, i, thumbnail)
+            else:
+                wx.CallAfter(self.render, generation, i, filename, thumbnail)
+        self.cache.save()
+
+    def render(self, generation, index, filename, thumbnail):
+        """Renders a thumbnail on a worker process."""
+        if not self or generation != self.generation:
+            return
+        if self.executor is None:
+            # spawned workers don't inherit the state of the wx application
+            self.executor = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.symbol_paths,),
+            )
+        future = self.executor.submit(
+            _render_thumbnail, filename, thumbnail, self.cache.size
+        )
+        with self.futures_lock:
+            self.futures.add(future)
+        # added last, the callback runs at once if the future is already done
+        future.add_done_callback(
+            functools.partial(self.on_rendered, generation, index, filename, thumbnail)
+        )
+
+    def on_rendered(self, generation, index, filename, thumbnail, future):
+        # this runs in a thread of the process pool
+        with self.futures_lock:
+            self.futures.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception() or future.result()
+        if error:
+            print(f"Cannot render a thumbnail of {filename}: {error}")
+            return
+        wx.CallAfter(self.show_thumbnail, generation, index, thumbnail)
+
+    def show_thumbnail(self, generation, index, thumbnail):
+        if not self or generation != self.generation:
+            return
+        image = wx.Image(thumbnail)
+        if not image.IsOk():
+            return
+        w, h = self.cache.size
+        if image.GetSize() != (w, h):
+            # thumbnails keep the aspect ratio of their schematic
+            iw, ih = image.GetSize()
+            image.Resize((w, h), ((w - iw) // 2, (h - ih) // 2), 255, 255, 255)
+        self.SetItemImage(index, self.image_list.Add(wx.Bitmap(image)))
+
+    def on_activated(self, event):
+        filename = self.filenames[event.GetIndex()]
+        wx.PostEvent(self, ThumbnailActivatedEvent(filename=filename))
+
+    def shutdown(self):
+        """Cancels pending thumbnails and stops the worker processes."""
+        with self.futures_lock:
+            futures, self.futures = self.futures, set()
+        for future in futures:
+            future.cancel()  # calls on_rendered() of pending futures
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self:
+            self.generation += 1  # stops a running scan
+            self.shutdown()
+        event.Skip()
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from asc_viewer.symbol_cache import default_cache_dir
+
+# increment whenever thumbnails are rendered differently
+THUMBNAIL_VERSION = 2
+
+
+class ThumbnailCache:
+    """A persistent cache of schematic thumbnails.
+
+    Thumbnails are png files named after the content hash of their asc file, the symbol
+    paths they were rendered with and the thumbnail size, so copies of a schematic share
+    a thumbnail. An index maps each asc filename to its modification time, size and
+    content hash: files whose modification time and size are unchanged aren't read
+    again, and files that were touched without changing keep their thumbnails. get() may
+    be called from a worker thread.
+
+    Arguments:
+    size -- (width, height) of thumbnails in pixels
+    cache_dir -- the directory where the cache is stored, see default_cache_dir()
+    """
+
+    def __init__(self, size=(160, 120), cache_dir=None):
+        self.size = tuple(size)
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.directory = os.path.join(cache_dir, f"thumbnails-{THUMBNAIL_VERSION}")
+        self.index_filename = os.path.join(self.directory, "index.pickle")
+        self.entries = None  # asc filename to ((mtime, size), hash), read lazily
+        self.changed = False  # True if entries differ from the index file
+        self.lock = threading.Lock()
+
+    def read(self):
+        """Returns the entries of the index file, or an empty dict if the file is
+        missing or unreadable."""
+        try:
+            with open(self.index_filename, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return {}
+
+    def get(self, filename, symbol_paths=()):
+        """Returns the thumbnail filename for the current content of an asc file. The
+        thumbnail is up to date if the file exists, otherwise it needs to be rendered.
+
+        Arguments:
+        filename -- the asc file
+        symbol_paths -- the symbol directories the thumbnail is rendered with
+        """
+        filename = os.path.abspath(filename)
+        st = os.stat(filename)
+        stat = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.read()
+            entry = self.entries.get(filename)
+        if entry and entry[0] == stat:
+            digest = entry[1]
+        else:
+            with open(filename, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            with self.lock:
+                self.entries[filename] = (stat, digest)
+                self.changed = True
+        # other symbol directories may draw the same file differently
+        paths = "\n".join(os.path.abspath(path) for path in symbol_paths)
+        key = hashlib.sha1(f"{digest}\n{paths}".encode()).hexdigest()
+        w, h = self.size
+        return os.path.join(self.directory, f"{key[:24]}-{w}x{h}.png")
+
+    def save(self):
+        """Writes the index if it changed. Entries of deleted files are dropped."""
+        with self.lock:
+            if not self.changed:
+                return
+            entries = {f: e for f, e in self.entries.items() if os.path.exists(f)}
+            self.changed = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write to a temporary file first, so concurrent readers never see a partial index
+            fd, tmp = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entries, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.index_filename)
+        except OSError as e:
+            print(f"Cannot write thumbnail index {self.index_filename}: {e}")
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+class TileCache:
+    """A least-recently-used cache of rendered tiles.
+
+    Tiles are square bitmaps of tile_size device pixels, keyed by (zoom, column, row).
+    The cache holds at most max_bytes of bitmap data, assuming 4 bytes per pixel. All
+    tiles are dropped when the cache is validated against a different state token,
+    e.g., after a schematic was reloaded.
+
+    Arguments:
+    tile_size -- edge length of a tile in device pixels
+    max_bytes -- memory bound for all tiles
+    """
+
+    def __init__(self, tile_size=256, max_bytes=64 * 2**20):
+        self.tile_size = tile_size
+        self.max_tiles = max(1, max_bytes // (4 * tile_size * tile_size))
+        self.tiles = OrderedDict()
+        self.token = None
+
+    def validate(self, token):
+        """Clears the cache if token differs from the token of the cached tiles."""
+        if token != self.token:
+            self.clear()
+            self.token = token
+
+    def clear(self):
+        self.tiles.clear()
+
+    def discard(self, rect):
+        """Drops tiles that intersect rect, given as (x1, y1, x2, y2) in logical coordinates."""
+        x1, y1, x2, y2 = rect
+        size = self.tile_size
+        for key in list(self.tiles):
+            zoom, col, row = key
+            if (
+                col * size < x2 * zoom
+                and (col + 1) * size > x1 * zoom
+                and row * size < y2 * zoom
+                and (row + 1) * size > y1 * zoom
+            ):
+                del self.tiles[key]
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        self.tiles[key] = tile
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+    def __len__(self):
+        return len(self.tiles)
@@ -0,0 +1,344 @@
+import math
+import zlib
+from xml.sax.saxutils import escape
+from asc_viewer.affine import Affine
+
+# control point distance of a cubic Bezier quarter circle
+KAPPA = 4 * (math.sqrt(2) - 1) / 3
+
+
+class VectorPath:
+    """A path of a VectorContext, with the methods of wx.GraphicsPath that painting uses.
+
+    The path is a list of operations in its own coordinates: ("M", x, y), ("L", x, y),
+    ("C", x1, y1, x2, y2, x, y) and ("Z",).
+    """
+
+    def __init__(self):
+        self.ops = []
+
+    def MoveToPoint(self, x, y):
+        self.ops.append(("M", x, y))
+
+    def AddLineToPoint(self, x, y):
+        self.ops.append(("L", x, y))
+
+    def AddCurveToPoint(self, cx1, cy1, cx2, cy2, x, y):
+        self.ops.append(("C", cx1, cy1, cx2, cy2, x, y))
+
+    def CloseSubpath(self):
+        self.ops.append(("Z",))
+
+    def AddRectangle(self, x, y, w, h):
+        self.MoveToPoint(x, y)
+        self.AddLineToPoint(x + w, y)
+        self.AddLineToPoint(x + w, y + h)
+        self.AddLineToPoint(x, y + h)
+        self.CloseSubpath()
+
+    def AddEllipse(self, x, y, w, h):
+        rx, ry = w / 2, h / 2
+        cx, cy = x + rx, y + ry
+        kx, ky = rx * KAPPA, ry * KAPPA
+        self.MoveToPoint(cx + rx, cy)
+        self.AddCurveToPoint(cx + rx, cy + ky, cx + kx, cy + ry, cx, cy + ry)
+        self.AddCurveToPoint(cx - kx, cy + ry, cx - rx, cy + ky, cx - rx, cy)
+        self.AddCurveToPoint(cx - rx, cy - ky, cx - kx, cy - ry, cx, cy - ry)
+        self.AddCurveToPoint(cx + kx, cy - ry, cx + rx, cy - ky, cx + rx, cy)
+        self.CloseSubpath()
+
+    def AddCircle(self, x, y, r):
+        self.AddEllipse(x - r, y - r, 2 * r, 2 * r)
+
+    def AddPath(self, path):
+        self.ops.extend(path.ops)
+
+    def Transform(self, matrix):
+        """Transforms the path by an Affine, e.g. from VectorContext.CreateMatrix()."""
+        self.ops = transform_ops(self.ops, matrix)
+
+
+def transform_ops(ops, m):
+    result = []
+    for op in ops:
+        if len(op) == 1:
+            result.append(op)
+            continue
+        coords = []
+        for i in range(1, len(op), 2):
+            coords.extend(m.transform_point(op[i], op[i + 1]))
+        result.append((op[0], *coords))
+    return result
+
+
+def _color(colour):
+    """Returns (r, g, b, a) of a wx.Colour or a tuple."""
+    if hasattr(colour, "Get"):
+        return tuple(colour.Get(True))
+    return tuple(colour) + (255,) * (4 - len(colour))
+
+
+def _number(value, digits=2):
+    return "%g" % round(value, digits)
+
+
+class VectorContext:
+    """Records painting into SVG or PDF files. It has the methods of wx.GraphicsContext
+    that AscCanvas.paint() and symbols use, because wx can't paint vector graphics with a
+    wx.GraphicsContext: wx.SVGFileDC doesn't support one and there is no PDF DC.
+
+    Paths are recorded in the coordinates of the output, which are pixels for SVG and
+    points for PDF. Texts are measured with a wx graphics context, so they are
+    aligned like on screen, and they are written with a generic sans-serif font.
+
+    Arguments:
+    width, height -- the size of the output
+    font_styles -- a dict from id() of a wx.GraphicsFont to (size in points, (r, g, b, a)),
+                   see DrawingResources.font_styles
+    measure -- a wx graphics context that measures texts, None to estimate text extents
+    """
+
+    def __init__(self, width, height, font_styles, measure=None):
+        self.width = width
+        self.height = height
+        self.font_styles = font_styles
+        self.measure = measure
+        self.items = []  # ("path", ops, stroke, fill) and ("text", ...), see save()
+        self.matrix = Affine()
+        self.pen = None  # (r, g, b, a) and width, None for no outline
+        self.brush = None  # (r, g, b, a), None for no fill
+        self.font = None
+        self.states = []
+        self.ascents = {}  # id() of a font to the height above the baseline
+
+    def CreatePath(self):
+        return VectorPath()
+
+    def CreateMatrix(self, a=1.0, b=0.0, c=0.0, d=1.0, tx=0.0, ty=0.0):
+        return Affine(a, b, c, d, tx, ty)
+
+    def PushState(self):
+        self.states.append((self.matrix, self.pen, self.brush, self.font))
+
+    def PopState(self):
+        self.matrix, self.pen, self.brush, self.font = self.states.pop()
+
+    def Translate(self, dx, dy):
+        self.matrix = self.matrix.translate(dx, dy)
+
+    def Scale(self, sx, sy):
+        self.matrix = self.matrix.concat(Affine(sx, 0, 0, sy))
+
+    def Rotate(self, angle):
+        self.matrix = self.matrix.rotate(angle)
+
+    def ConcatTransform(self, matrix):
+        self.matrix = self.matrix.concat(matrix)
+
+    def SetPen(self, pen):
+        if pen.IsTransparent():
+            self.pen = None
+        else:
+            self.pen = (_color(pen.GetColour()), pen.GetWidth())
+
+    def SetBrush(self, brush):
+        self.brush = None if brush.IsTransparent() else _color(brush.GetColour())
+
+    def SetFont(self, font):
+        self.font = font
+
+    def add_path(self, path, stroke, fill):
+        if not path.ops:
+            return
+        if stroke is not None:
+            m = self.matrix
+            stroke = (stroke[0], stroke[1] * math.sqrt(abs(m.a * m.d - m.b * m.c)))
+        self.items.append(("path", transform_ops(path.ops, self.matrix), stroke, fill))
+
+    def StrokePath(self, path):
+        if self.pen is not None:
+            self.add_path(path, self.pen, None)
+
+    def FillPath(self, path, fillStyle=None):
+        if self.brush is not None:
+            self.add_path(path, None, self.brush)
+
+    def DrawPath(self, path, fillStyle=None):
+        if self.pen is not None or self.brush is not None:
+            self.add_path(path, self.pen, self.brush)
+
+    def StrokeLine(self, x1, y1, x2, y2):
+        path = VectorPath()
+        path.MoveToPoint(x1, y1)
+        path.AddLineToPoint(x2, y2)
+        self.StrokePath(path)
+
+    def DrawRectangle(self, x, y, w, h):
+        path = VectorPath()
+        path.AddRectangle(x, y, w, h)
+        self.DrawPath(path)
+
+    def DrawEllipse(self, x, y, w, h):
+        path = VectorPath()
+        path.AddEllipse(x, y, w, h)
+        self.DrawPath(path)
+
+    def font_style(self):
+        return self.font_styles.get(id(self.font), (10, (0, 0, 0, 255)))
+
+    def GetFullTextExtent(self, text):
+        """Returns width, height, descent and external leading of text in the current font."""
+        if self.measure is not None:
+            self.measure.SetFont(self.font)
+            return self.measure.GetFullTextExtent(text)
+        size = self.font_style()[0] * 4 / 3  # points to pixels
+        return 0.55 * size * len(text), 1.2 * size, 0.25 * size, 0
+
+    def DrawText(self, text, x, y, angle=0.0):
+        """Draws text with its top left corner at x, y, rotated counterclockwise by angle
+        in radians."""
+        if not text:
+            return
+        ascent = self.ascents.get(id(self.font))
+        if ascent is None:
+            w, h, descent, leading = self.GetFullTextExtent("Ag")
+            ascent = self.ascents[id(self.font)] = h - descent
+        width = self.GetFullTextExtent(text)[0]
+        # maps text coordinates with the origin on the baseline to the output
+        m = self.matrix.translate(x, y).rotate(-angle).translate(0, ascent)
+        points, color = self.font_style()
+        self.items.append(("text", text, m, width, points * 4 / 3, color))
+
+    def save(self, filename):
+        """Writes the recorded drawing to an svg or pdf file, depending on its extension."""
+        if filename.lower().endswith(".pdf"):
+            with open(filename, "wb") as f:
+                f.write(self.get_pdf())
+        else:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(self.get_svg())
+
+    def get_svg(self):
+        """Returns the recorded drawing as an SVG document."""
+        w, h = _number(self.width), _number(self.height)
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" '
+            f'viewBox="0 0 {w} {h}">',
+            '<rect width="100%" height="100%" fill="white"/>',
+            '<g stroke-linecap="round" stroke-linejoin="round" '
+            'font-family="sans-serif">',
+        ]
+        for item in self.items:
+            if item[0] == "path":
+                ops, stroke, fill = item[1:]
+                d = " ".join(op[0] + " ".join(_number(v) for v in op[1:]) for op in ops)
+                attrs = _svg_paint("fill", fill)
+                if stroke is not None:
+                    attrs += _svg_paint("stroke", stroke[0])
+                    attrs += f' stroke-width="{_number(stroke[1])}"'
+                lines.append(f'<path d="{d}"{attrs}/>')
+            else:
+                text, m, width, size, color = item[1:]
+                matrix = " ".join(_number(v, 5) for v in m.get())
+                attrs = f' transform="matrix({matrix})" font-size="{_number(size)}"'
+                attrs += _svg_paint("fill", color)
+                if width > 0:
+                    attrs += f' textLength="{_number(width)}" lengthAdjust="spacingAndGlyphs"'
+                lines.append(f"<text{attrs}>{escape(text)}</text>")
+        lines.append("</g>")
+        lines.append("</svg>")
+        return "\n".join(lines) + "\n"
+
+    def get_pdf(self):
+        """Returns the recorded drawing as a single page PDF document. Texts use the
+        Helvetica font of PDF viewers, and transparency is ignored."""
+        # the content stream works in coordinates with the origin at the top left
+        content = [f"1 0 0 -1 0 {_number(self.height)} cm", "1 J 1 j"]
+        for item in self.items:
+            if item[0] == "path":
+                ops, stroke, fill = item[1:]
+                if stroke is not None and stroke[0][3] == 0:
+                    stroke = None
+                if fill is not None and fill[3] == 0:
+                    fill = None
+                if stroke is None and fill is None:
+                    continue
+                if stroke is not None:
+                    content.append(f"{_pdf_color(stroke[0])} RG")
+                    content.append(f"{_number(stroke[1])} w")
+                if fill is not None:
+                    content.append(f"{_pdf_color(fill)} rg")
+                for op in ops:
+                    coords = " ".join(_number(v) for v in op[1:])
+                    if op[0] == "M":
+                        content.append(f"{coords} m")
+                    elif op[0] == "L":
+                        content.append(f"{coords} l")
+                    elif op[0] == "C":
+                        content.append(f"{coords} c")
+                    else:
+                        content.append("h")
+                if fill is None:
+                    content.append("S")
+                else:
+                    content.append("f*" if stroke is None else "B*")
+            else:
+                text, m, width, size, color = item[1:]
+                if color[3] == 0:
+                    continue
+                # text coordinates of PDF point up
+                matrix = " ".join(_number(v, 5) for v in m.concat(Affine(d=-1)).get())
+                content.append(f"{_pdf_color(color)} rg")
+                content.append(
+                    f"BT /F1 {_number(size)} Tf {matrix} Tm {_pdf_string(text)} Tj ET"
+                )
+        stream = zlib.compress("\n".join(content).encode("latin-1"))
+
+        w, h = _number(self.width), _number(self.height)
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w} {h}] "
+            "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>".encode(),
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode()
+            + stream
+            + b"\nendstream",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+            b"/Encoding /WinAnsiEncoding >>",
+        ]
+        pdf = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for i, obj in enumerate(objects, 1):
+            offsets.append(len(pdf))
+            pdf += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+        xref = len(pdf)
+        pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        for offset in offsets:
+            pdf += f"{offset:010d} 00000 n \n".encode()
+        pdf += (
+            f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n"
+        ).encode()
+        return bytes(pdf)
+
+
+def _svg_paint(attribute, color):
+    if color is None:
+        return f' {attribute}="none"'
+    r, g, b, a = color
+    result = f' {attribute}="rgb({r},{g},{b})"'
+    if a < 255:
+        result += f' {attribute}-opacity="{_number(a / 255)}"'
+    return result
+
+
+def _pdf_color(color):
+    return " ".join(_number(c / 255) for c in color[:3])
+
+
+def _pdf_string(text):
+    text = text.encode("cp1252", "replace").decode("latin-1")
+    for c in "\\()":
+        text = text.replace(c, "\\" + c)
+    return f"({text})"
@@ -1,4 +1,5 @@
 import wx
+from asc_viewer.tile_cache import TileCache
 
 
 class Viewport(wx.ScrolledCanvas):
@@ -15,7 +16,7 @@ class Viewport(wx.ScrolledCanvas):
         self.dragging = ""
         self.w = 1
         self.h = 1
-        self.bmp = None
+        self.tile_cache = TileCache()  # rendered tiles for scrolling without repainting
         self.SetScrollRate(1, 1)
 
     def set_size(self, width, height):
@@ -28,6 +29,12 @@ class Viewport(wx.ScrolledCanvas):
         self.SetScale(self.zoom, self.zoom)
         self.SetVirtualSize(int(self.w * self.zoom), int(self.h * self.zoom))
 
+    def resize(self, width, height):
+        """Changes the size of the content, unlike set_size() zoom is kept."""
+        self.w = width
+        self.h = height
+        self.SetVirtualSize(int(self.w * self.zoom), int(self.h * self.zoom))
+
     def get_scroll_origin(self):
         return [x / self.zoom for x in self.GetViewStart()]
 
@@ -67,7 +74,8 @@ class Viewport(wx.ScrolledCanvas):
         self.dragging = ""
 
     def OnMotion(self, evt):
-        if not evt.Dragging():
+        evt.Skip()  # let other handlers, e.g., hover detection, see the event
+        if not evt.Dragging() or not self.dragging:
             return
         dc = wx.ClientDC(self)
         self.DoPrepareDC(dc)
@@ -88,11 +96,13 @@ class Viewport(wx.ScrolledCanvas):
                 self.drag_origin[1] += int(self.h - h - y)
             self.scroll_origin_x = max(min(x, self.w - w), 0)
             self.scroll_origin_y = max(min(y, self.h - h), 0)
+            # scrolling repaints only the exposed area
             self.Scroll(
                 int(self.scroll_origin_x * self.zoom),
                 int(self.scroll_origin_y * self.zoom),
             )
-        self.Refresh()
+        else:
+            self.Refresh()
         self.drag_pos = pos
 
     def OnWheel(self, evt):
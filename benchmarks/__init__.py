@@ -0,0 +1,3 @@
+"""Benchmarks of asc_viewer. The suite module runs all of them on synthetic projects
+from the generator module and compares the results with a baseline, the bench_*
+scripts measure single aspects in more detail."""
@@ -0,0 +1,36 @@
+"""Measures Schematic.load() on synthetic sheets of comb-shaped nets: each net is a
+horizontal wire with vertical taps whose ends sit on its interior (T-junctions) and a
+flag, so loading exercises parsing, connectivity and index building.
+
+Usage: python -m benchmarks.bench_load [number of wires ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from asc_viewer import Schematic
+from benchmarks.generator import TAPS, write_sheet
+
+
+def main(sizes):
+    print(f"{'wires':>8} {'load [s]':>9} {'us/wire':>8} {'nets':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            filename = os.path.join(directory, f"sheet{n}.asc")
+            nets = max(1, n // (TAPS + 1))
+            wires = nets * (TAPS + 1)
+            # every other net gets a flag
+            write_sheet(filename, wires, 0, nets // 2, 0, [])
+            schematic = Schematic()
+            t0 = time.perf_counter()
+            schematic.load(filename)
+            seconds = time.perf_counter() - t0
+            print(
+                f"{wires:>8} {seconds:>9.3f} {seconds / wires * 1e6:>8.1f} "
+                f"{len(schematic.nets):>7}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [1000, 10000, 100000])
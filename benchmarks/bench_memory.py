@@ -0,0 +1,109 @@
+"""Measures the memory that a loaded Schematic retains per wire, per instance, per
+flag and per text, including its indexes, and compares it with a stored baseline.
+
+The committed baseline was measured on the tree before the model objects got
+__slots__, so the report shows what slotting saves. Store a new one with
+--save-baseline.
+
+Usage: python -m benchmarks.bench_memory [number of elements] [--baseline FILE]
+           [--save-baseline]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from asc_viewer import Schematic, SymbolLibrary
+from benchmarks.generator import RES_ASY
+
+BASELINE = os.path.join(os.path.dirname(__file__), "memory_baseline.json")
+ELEMENTS = ("wires", "instances", "flags", "texts")
+
+
+def write_sheet(filename, wires=0, instances=0, flags=0, texts=0):
+    with open(filename, "w") as f:
+        f.write("Version 4\nSHEET 1 880 680\n")
+        for i in range(wires):
+            x, y = (i % 256) * 64, (i // 256) * 64
+            f.write(f"WIRE {x} {y} {x + 32} {y}\n")
+        for i in range(instances):
+            x, y = (i % 256) * 64, (i // 256) * 128
+            f.write(f"SYMBOL res {x} {y} R0\nSYMATTR InstName R{i}\n")
+            f.write(f"SYMATTR Value {i % 100}k\n")
+        for i in range(flags):
+            x, y = (i % 256) * 64, (i // 256) * 64
+            f.write(f"WIRE {x} {y} {x} {y + 32}\nFLAG {x} {y} net{i}\n")
+        for i in range(texts):
+            x, y = (i % 256) * 64, (i // 256) * 64
+            f.write(f"TEXT {x} {y} Left 2 ;comment {i}\n")
+
+
+def retained(filename, symbols):
+    """Returns the bytes retained by a loaded schematic."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    schematic = Schematic(symbols)
+    schematic.load(filename)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del schematic
+    return after - before
+
+
+def measure(n):
+    """Returns a dict from element kind to retained bytes per element, for n elements."""
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "res.asy"), "w") as f:
+            f.write(RES_ASY)
+        symbols = SymbolLibrary([directory], use_cache=False)
+        filename = os.path.join(directory, "sheet.asc")
+        write_sheet(filename, instances=1)  # loads the symbol once
+        baseline = retained(filename, symbols)
+        results = {}
+        for element in ELEMENTS:
+            write_sheet(filename, **{element: n})
+            results[element] = (retained(filename, symbols) - baseline) / n
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("n", type=int, nargs="?", default=20000, help="elements")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    results = measure(args.n)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"count": args.n, "results": results}, f, indent=2)
+    expected = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["count"] == args.n:
+            expected = baseline["results"]
+        else:
+            print("The count differs from the baseline, results are not compared")
+    print(
+        f"{'element':>10} {'count':>7} {'bytes/element':>14} {'baseline':>9} {'change':>7}"
+    )
+    for element, size in results.items():
+        line = f"{element:>10} {args.n:>7} {size:>14.0f}"
+        if element in expected:
+            before = expected[element]
+            line += f" {before:>9.0f} {(size - before) / before:>+7.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measures the throughput of NetlistWriter in lines per second on a synthetic
+hierarchical design: a top level with many instances of a block, which is a chain of
+resistors.
+
+Usage: python -m benchmarks.bench_netlist [number of block instances [resistors per block]]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from asc_viewer import Design, NetlistWriter, SymbolLibrary
+from benchmarks.generator import BLOCK_ASY, RES_ASY
+
+
+def write_design(directory, instances, resistors):
+    """Writes the symbols and schematics of the synthetic design to directory."""
+    with open(os.path.join(directory, "res.asy"), "w") as f:
+        f.write(RES_ASY)
+    with open(os.path.join(directory, "block.asy"), "w") as f:
+        f.write(BLOCK_ASY)
+    with open(os.path.join(directory, "block.asc"), "w") as f:
+        f.write("Version 4\nSHEET 1 880 680\n")
+        for i in range(resistors):
+            # resistor pins are at y and y + 80, chained by wires of 16 units
+            y = i * 96
+            f.write(f"WIRE 16 {y} 16 {y - 16}\n")
+            f.write(f"SYMBOL res 0 {y - 16} R0\nSYMATTR InstName R{i}\n")
+            f.write(f"SYMATTR Value {i + 1}k\n")
+        f.write("FLAG 16 -16 in\nIOPIN 16 -16 In\n")
+        y = resistors * 96
+        f.write(f"WIRE 16 {y - 16} 16 {y}\nFLAG 16 {y} out\nIOPIN 16 {y} Out\n")
+    with open(os.path.join(directory, "top.asc"), "w") as f:
+        f.write("Version 4\nSHEET 1 880 680\n")
+        for i in range(instances):
+            x, y = (i % 32) * 200, (i // 32) * 200
+            f.write(f"WIRE {x - 32} {y} {x - 64} {y}\nFLAG {x - 64} {y} 0\n")
+            f.write(f"WIRE {x + 32} {y} {x + 64} {y}\nFLAG {x + 64} {y} N{i}\n")
+            f.write(f"SYMBOL block {x} {y} R0\nSYMATTR InstName X{i}\n")
+    return os.path.join(directory, "top.asc")
+
+
+def bench(design, flatten):
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as f:
+        lines = NetlistWriter(design, flatten).write(f)
+    return lines, time.perf_counter() - t0
+
+
+def main(instances=256, resistors=64):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = write_design(directory, instances, resistors)
+        t0 = time.perf_counter()
+        design = Design(filename, SymbolLibrary(use_cache=False))
+        print(
+            f"load: {time.perf_counter() - t0:.3f} s, {len(design.templates)} templates"
+        )
+        for flatten in (False, True):
+            lines, seconds = bench(design, flatten)
+            mode = "flat" if flatten else "hierarchical"
+            print(
+                f"{mode:>12}: {lines:>8} lines in {seconds:.3f} s, "
+                f"{lines / seconds:,.0f} lines/s"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,56 @@
+"""Compares the build and query times of GridIndex with the rtreelib based RTreeIndex
+on random schematic-like wires.
+
+Usage: python -m benchmarks.bench_spatial_index [number of wires ...]
+"""
+
+import random
+import sys
+import time
+from asc_viewer.spatial_index import GridIndex, RTreeIndex
+
+
+def random_wires(n, seed=0):
+    """Returns n horizontal and vertical wires on a 16 unit grid, as (data, rect) items."""
+    rnd = random.Random(seed)
+    side = int((n**0.5) * 100)
+    items = []
+    for i in range(n):
+        x = rnd.randrange(0, side, 16)
+        y = rnd.randrange(0, side, 16)
+        length = rnd.randrange(16, 320, 16)
+        if rnd.random() < 0.5:
+            rect = (x, y, x + length + 1, y + 1)
+        else:
+            rect = (x, y, x + 1, y + length + 1)
+        items.append((i, rect))
+    return items, side
+
+
+def bench(index_class, items, side, queries=2000, seed=1):
+    rnd = random.Random(seed)
+    t0 = time.perf_counter()
+    index = index_class(items)
+    t1 = time.perf_counter()
+    hits = 0
+    for _ in range(queries):
+        x, y = rnd.uniform(0, side), rnd.uniform(0, side)
+        hits += sum(1 for _ in index.query((x - 5, y - 5, x + 5, y + 5)))
+    t2 = time.perf_counter()
+    return t1 - t0, (t2 - t1) / queries, hits
+
+
+def main(sizes):
+    print(
+        f"{'wires':>8} {'index':>12} {'build [s]':>10} {'query [us]':>11} {'hits':>6}"
+    )
+    for n in sizes:
+        items, side = random_wires(n)
+        for index_class in (GridIndex, RTreeIndex):
+            build, query, hits = bench(index_class, items, side)
+            name = index_class.__name__
+            print(f"{n:>8} {name:>12} {build:>10.3f} {query * 1e6:>11.1f} {hits:>6}")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,174 @@
+"""Writes synthetic LTspice projects for benchmarks: a library of cell symbols and a
+hierarchy of schematics at a configurable scale.
+
+Every sheet has comb-shaped nets of wires with T-junctions, chains of cell instances
+whose pins touch, flags that join pairs of combs by name, and comments. Sheets
+above the given hierarchy depth also instantiate the block of the next level, whose
+schematic is stored next to its symbol, as Design expects.
+"""
+
+import os
+
+TAPS = 15  # vertical wires per comb net
+CHAIN = 16  # instances per chain of touching pins
+
+CELL_ASY = """Version 4
+SymbolType CELL
+LINE Normal 16 88 16 96
+LINE Normal 16 16 16 24
+LINE Normal 0 80 {a} 88
+RECTANGLE Normal 0 24 32 88
+CIRCLE Normal 8 40 24 56
+ARC Normal 0 56 32 88 32 72 0 72
+TEXT 40 {b} Left 2 cell {index}
+WINDOW 0 36 40 Left 2
+WINDOW 3 36 76 Left 2
+SYMATTR Value {index}k
+SYMATTR Prefix R
+PIN 16 16 NONE 0
+PINATTR PinName A
+PINATTR SpiceOrder 1
+PIN 16 96 NONE 0
+PINATTR PinName B
+PINATTR SpiceOrder 2
+"""
+
+# a two-pin cell like a resistor, with pins at (16, 16) and (16, 96)
+RES_ASY = """Version 4
+SymbolType CELL
+LINE Normal 16 88 16 96
+LINE Normal 16 16 16 24
+RECTANGLE Normal 0 24 32 88
+ARC Normal 0 56 32 88 32 72 0 72
+TEXT 40 8 Left 2 res
+WINDOW 0 36 40 Left 2
+WINDOW 3 36 76 Left 2
+SYMATTR Value R
+SYMATTR Prefix R
+PIN 16 16 NONE 0
+PINATTR PinName A
+PINATTR SpiceOrder 1
+PIN 16 96 NONE 0
+PINATTR PinName B
+PINATTR SpiceOrder 2
+"""
+
+# a hierarchical block with pins at (-32, 0) and (32, 0)
+BLOCK_ASY = """Version 4
+SymbolType BLOCK
+RECTANGLE Normal -32 -32 32 32
+PIN -32 0 LEFT 8
+PINATTR PinName in
+PINATTR SpiceOrder 1
+PIN 32 0 RIGHT 8
+PINATTR PinName out
+PINATTR SpiceOrder 2
+"""
+
+
+def write_symbols(directory, count):
+    """Writes count cell symbols into subdirectories of directory, like the groups of
+    the LTspice library, and returns their names."""
+    names = []
+    for i in range(count):
+        group = os.path.join(directory, f"group{i % 8}")
+        os.makedirs(group, exist_ok=True)
+        with open(os.path.join(group, f"cell{i}.asy"), "w") as f:
+            f.write(CELL_ASY.format(index=i, a=i % 16, b=i % 64))
+        names.append(f"cell{i}")
+    return names
+
+
+def write_sheet(
+    filename, wires, instances, flags, texts, symbols, block=None, blocks=0
+):
+    """Writes one schematic.
+
+    Arguments:
+    filename -- the asc file
+    wires, instances, flags, texts -- the number of elements of each kind
+    symbols -- names of the cell symbols, used in turn by the instances
+    block -- the name of a block symbol to instantiate, None for a leaf sheet
+    blocks -- the number of block instances
+    """
+    lines = ["Version 4", "SHEET 1 880 680"]
+    # comb nets, the flag of each comb shares its name with the next comb
+    nets = -(-wires // (TAPS + 1))
+    columns = int(nets**0.5) + 1
+    for i in range(nets):
+        x = (i % columns) * (TAPS + 2) * 32
+        y = (i // columns) * 96
+        lines.append(f"WIRE {x} {y} {x + (TAPS + 1) * 32} {y}")
+        for j in range(1, TAPS + 1):
+            lines.append(f"WIRE {x + j * 32} {y} {x + j * 32} {y + 64}")
+        if i < flags:
+            lines.append(f"FLAG {x} {y} net{i // 2}")
+    bottom = (nets // columns + 1) * 96 + 64
+    for i in range(nets, flags):  # more flags than combs, the rest stand alone
+        j = i - nets
+        lines.append(f"FLAG {(j % 256) * 32} {bottom + j // 256 * 32} net{i // 2}")
+    bottom += 96 + max(0, flags - nets) // 256 * 32
+
+    # chains of instances, the lower pin of each touches the upper pin of the next
+    for i in range(instances):
+        x = (i // CHAIN) * 64
+        y = bottom + (i % CHAIN) * 80
+        lines.append(f"SYMBOL {symbols[i % len(symbols)]} {x} {y} R0")
+        lines.append(f"SYMATTR InstName R{i}")
+        if i % 3 == 0:
+            lines.append(f"SYMATTR Value {i % 1000}k")
+    if instances:
+        bottom += CHAIN * 80 + 96
+
+    # blocks of the next level, wired to a flag at each port
+    for i in range(blocks):
+        x, y = 96 + (i % 16) * 192, bottom + (i // 16) * 192
+        lines.append(f"WIRE {x - 32} {y} {x - 64} {y}")
+        lines.append(f"FLAG {x - 64} {y} in{i}")
+        lines.append(f"WIRE {x + 32} {y} {x + 64} {y}")
+        lines.append(f"FLAG {x + 64} {y} out{i}")
+        lines.append(f"SYMBOL {block} {x} {y} R0")
+        lines.append(f"SYMATTR InstName X{i}")
+    if blocks:
+        bottom += (blocks // 16 + 1) * 192
+
+    # the ports of a block schematic
+    lines.append(f"FLAG -64 {bottom} in")
+    lines.append(f"IOPIN -64 {bottom} In")
+    lines.append(f"FLAG -64 {bottom + 32} out")
+    lines.append(f"IOPIN -64 {bottom + 32} Out")
+
+    for i in range(texts):
+        x, y = (i % 64) * 160, bottom + 96 + (i // 64) * 64
+        lines.append(f"TEXT {x} {y} Left 2 ;comment {i}")
+
+    with open(filename, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_project(
+    directory, wires, instances, flags, texts=0, depth=0, fanout=4, symbols=32
+):
+    """Writes a synthetic project and returns the filename of its top schematic.
+
+    Symbols are stored in directory/sym. Every sheet gets the given numbers of elements,
+    and the sheets of levels 0 to depth - 1 instantiate fanout blocks of the next level.
+
+    Arguments:
+    directory -- an existing directory
+    wires, instances, flags, texts -- the number of elements of each kind per sheet
+    depth -- the number of hierarchy levels below the top sheet
+    fanout -- the number of block instances per sheet above the lowest level
+    symbols -- the number of cell symbols in the library
+    """
+    names = write_symbols(os.path.join(directory, "sym"), symbols)
+    for level in range(depth, -1, -1):
+        if level == 0:
+            filename = os.path.join(directory, "top.asc")
+        else:
+            with open(os.path.join(directory, f"block{level}.asy"), "w") as f:
+                f.write(BLOCK_ASY)
+            filename = os.path.join(directory, f"block{level}.asc")
+        block, blocks = (f"block{level + 1}", fanout) if level < depth else (None, 0)
+        write_sheet(filename, wires, instances, flags, texts, names, block, blocks)
+    return os.path.join(directory, "top.asc")
@@ -0,0 +1,402 @@
+"""Runs the benchmark suite on a synthetic project and compares the results with a
+stored baseline, so that a slower load or paint path fails the run.
+
+Each benchmark is repeated and its fastest run is reported. Paint benchmarks render
+offscreen into a wx.MemoryDC, they need wxPython and a display, e.g. run the suite
+under xvfb-run. Without them, or without a baseline time for them, they are reported
+but don't fail the run. Any other benchmark that is skipped or has no baseline time
+fails the run unless --allow-skip is given.
+
+Timings depend on the machine. A fixed calibration workload is timed with every run
+and stored with the baseline, and baseline times are scaled by the ratio of the
+calibration times before they are compared.
+
+Usage: python -m benchmarks.suite [--wires N] [--instances M] [--flags K] [--depth D]
+           [--output results.json] [--baseline benchmarks/baseline.json] [--save-baseline]
+           [--allow-skip]
+
+The exit status is 1 if a benchmark is slower than its scaled baseline time multiplied
+by the threshold of the benchmark, see the "thresholds" of the baseline file, or if a
+benchmark other than the paint benchmarks was skipped or has no baseline.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from asc_viewer import Design, Schematic, SymbolLibrary
+from asc_viewer.connectivity import WireEnds
+from benchmarks.generator import write_project
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 1.5  # allowed slowdown relative to the baseline
+PAINT_SIZE = (1024, 768)  # size of the offscreen bitmap in pixels
+# benchmarks that need wx and a display, they may be skipped or lack a baseline time
+OPTIONAL = ("paint_detail", "paint_overview")
+
+
+class Skipped(Exception):
+    """Raised by a benchmark that can't run in this environment."""
+
+
+class Project:
+    """A synthetic project and the state that benchmarks share.
+
+    Arguments:
+    directory -- where the project is written
+    scale -- the keyword arguments of write_project()
+    """
+
+    def __init__(self, directory, scale):
+        self.directory = directory
+        self.filename = write_project(directory, **scale)
+        self.symbol_paths = [directory]
+        self.symbols = SymbolLibrary(self.symbol_paths, use_cache=False)
+        self.schematic = Schematic(self.symbols)
+        self.schematic.load(self.filename)
+        self.canvas = None  # created by the first paint benchmark
+
+    def random_points(self, n, seed=0):
+        rnd = random.Random(seed)
+        x1, y1, x2, y2 = self.schematic.get_extent()
+        return [(rnd.uniform(x1, x2), rnd.uniform(y1, y2)) for _ in range(n)]
+
+    def get_canvas(self):
+        if self.canvas is None:
+            try:
+                import wx
+                from asc_viewer import AscCanvas
+            except ImportError as e:
+                raise Skipped(f"{e.name} is not installed")
+            if not wx.App.IsDisplayAvailable():
+                raise Skipped("no display, run under xvfb-run")
+            self.app = wx.GetApp() or wx.App(False)
+            self.frame = wx.Frame(None, size=PAINT_SIZE)
+            self.canvas = AscCanvas(self.frame, symbol_library=self.symbols)
+            self.canvas.set_schematic(self.schematic)
+        return self.canvas
+
+
+def bench_load_symbols(project):
+    """Indexes and parses the symbol library without the symbol cache."""
+    t0 = time.perf_counter()
+    symbols = SymbolLibrary(project.symbol_paths, use_cache=False)
+    symbols.preload(symbols.bare_names)
+    return time.perf_counter() - t0
+
+
+def bench_load_symbols_cached(project):
+    """Loads the symbol library from a warm symbol cache."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        symbols = SymbolLibrary(project.symbol_paths, cache_dir=cache_dir)
+        symbols.preload(symbols.bare_names)
+        symbols.save_cache()
+        t0 = time.perf_counter()
+        symbols = SymbolLibrary(project.symbol_paths, cache_dir=cache_dir)
+        for name in symbols.bare_names:
+            symbols.get(name).load()
+        return time.perf_counter() - t0
+
+
+def bench_load_asc(project):
+    """Loads the top schematic with parsed symbols."""
+    t0 = time.perf_counter()
+    Schematic(project.symbols).load(project.filename)
+    return time.perf_counter() - t0
+
+
+def bench_load_design(project):
+    """Loads the hierarchy of the top schematic, each block schematic once."""
+    t0 = time.perf_counter()
+    for view in Design(project.filename, project.symbols).walk():
+        pass
+    return time.perf_counter() - t0
+
+
+def bench_connectivity(project):
+    """Connects the wires, pins and flags of the parsed top schematic to nets."""
+    schematic = Schematic(project.symbols)
+    schematic.parse(project.filename)
+    t0 = time.perf_counter()
+    ends = WireEnds(schematic.wire_coords)
+    schematic.add_wire_points_bulk(ends)
+    schematic.connect(schematic.pin_positions(), ends=ends)
+    return time.perf_counter() - t0
+
+
+def bench_hit_test(project):
+    """Looks up the net and the instance under 2000 mouse positions, like hovering."""
+    schematic = project.schematic
+    points = project.random_points(2000)
+    t0 = time.perf_counter()
+    for x, y in points:
+        schematic.net_at(x, y)
+        schematic.instance_at(x, y)
+    return time.perf_counter() - t0
+
+
+def bench_find(project):
+    """Searches instance names, nets and texts in every search mode."""
+    schematic = project.schematic
+    t0 = time.perf_counter()
+    for query, mode in (
+        ("R1", "exact"),
+        ("R1", "prefix"),
+        ("net1", "prefix"),
+        ("et1", "substring"),
+        ("comment 1", "substring"),
+        (r"^net\d+5$", "regex"),
+    ):
+        schematic.search(query, mode)
+    return time.perf_counter() - t0
+
+
+def _paint(canvas, rect, zoom):
+    import wx
+
+    bmp = wx.Bitmap(*PAINT_SIZE)
+    dc = wx.MemoryDC(bmp)
+    dc.SetBackground(canvas.resources.white_brush)
+    dc.Clear()
+    gc = wx.GraphicsContext.Create(dc)
+    gc.Scale(zoom, zoom)
+    gc.Translate(-rect[0], -rect[1])
+    t0 = time.perf_counter()
+    canvas.paint(gc, rect, zoom)
+    del gc  # flushes drawing operations to the bitmap
+    seconds = time.perf_counter() - t0
+    dc.SelectObject(wx.NullBitmap)
+    return seconds
+
+
+def bench_paint_detail(project):
+    """Paints a window sized area at zoom 1, with texts, pin names and junctions."""
+    canvas = project.get_canvas()
+    x1, y1, x2, y2 = project.schematic.get_extent()
+    x, y = (x1 + x2) / 2, (y1 + y2) / 2
+    w, h = PAINT_SIZE
+    return _paint(canvas, (x - w / 2, y - h / 2, x + w / 2, y + h / 2), 1)
+
+
+def bench_paint_overview(project):
+    """Paints the whole schematic fitted into the window, at a low level of detail."""
+    canvas = project.get_canvas()
+    x1, y1, x2, y2 = project.schematic.get_extent()
+    zoom = min(PAINT_SIZE[0] / (x2 - x1), PAINT_SIZE[1] / (y2 - y1))
+    return _paint(canvas, (x1, y1, x2, y2), zoom)
+
+
+BENCHMARKS = [
+    ("load_symbols", bench_load_symbols),
+    ("load_symbols_cached", bench_load_symbols_cached),
+    ("load_asc", bench_load_asc),
+    ("load_design", bench_load_design),
+    ("connectivity", bench_connectivity),
+    ("hit_test", bench_hit_test),
+    ("find", bench_find),
+    ("paint_detail", bench_paint_detail),
+    ("paint_overview", bench_paint_overview),
+]
+
+
+def calibrate(repeat=9):
+    """Returns the fastest time of a fixed workload of Python objects, dicts and NumPy
+    arithmetic in seconds, a measure of the speed of this machine."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            table = {}
+            for i in range(100000):
+                table[(i % 997, i)] = str(i)
+            sorted(table.items(), key=lambda item: item[1])
+            a = np.arange(500000, dtype=float)
+            np.sort(np.sqrt(a * a + 1.0))
+            times.append(time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def run(scale, repeat=5, names=None):
+    """Runs the benchmarks on a project of the given scale and returns the results as
+    a dict from benchmark name to {"min", "median"} in seconds or {"skipped": reason}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        project = Project(directory, scale)
+        for name, bench in BENCHMARKS:
+            if names and name not in names:
+                continue
+            times = []
+            try:
+                for _ in range(repeat):
+                    # like timeit, garbage collection doesn't interfere with timing
+                    gc.collect()
+                    gc.disable()
+                    try:
+                        times.append(bench(project))
+                    finally:
+                        gc.enable()
+            except Skipped as e:
+                results[name] = {"skipped": str(e)}
+                continue
+            results[name] = {"min": min(times), "median": statistics.median(times)}
+        if project.canvas is not None:
+            project.frame.Destroy()
+    return results
+
+
+def compare(results, baseline, speed=1.0):
+    """Returns a list of (name, seconds, baseline seconds, threshold) of the benchmarks
+    that are slower than allowed by the baseline.
+
+    Arguments:
+    results, baseline -- see run() and main()
+    speed -- the calibration time of this machine divided by the one of the baseline,
+             baseline seconds are multiplied by it
+    """
+    thresholds = baseline.get("thresholds", {})
+    default = thresholds.get("default", DEFAULT_THRESHOLD)
+    regressions = []
+    for name, result in results.items():
+        expected = baseline["results"].get(name, {})
+        if "min" not in result or "min" not in expected:
+            continue
+        threshold = thresholds.get(name, default)
+        if result["min"] > expected["min"] * speed * threshold:
+            regressions.append(
+                (name, result["min"], expected["min"] * speed, threshold)
+            )
+    return regressions
+
+
+def unchecked(results, baseline=None):
+    """Returns a list of (name, reason, optional) of the benchmarks that were skipped,
+    or that can't be compared because the baseline has no time for them. Optional ones
+    are in OPTIONAL and don't fail the run."""
+    problems = []
+    for name, result in results.items():
+        if "skipped" in result:
+            reason = f"skipped: {result['skipped']}"
+        elif baseline is not None and "min" not in baseline["results"].get(name, {}):
+            reason = "no baseline, record one with --save-baseline"
+        else:
+            continue
+        problems.append((name, reason, name in OPTIONAL))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--wires", type=int, default=20000, help="wires per sheet")
+    parser.add_argument("--instances", type=int, default=2000, help="per sheet")
+    parser.add_argument("--flags", type=int, default=500, help="flags per sheet")
+    parser.add_argument("--texts", type=int, default=200, help="comments per sheet")
+    parser.add_argument("--depth", type=int, default=2, help="hierarchy levels")
+    parser.add_argument("--fanout", type=int, default=4, help="blocks per sheet")
+    parser.add_argument("--symbols", type=int, default=64, help="cell symbols")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="names of benchmarks to run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--allow-skip",
+        action="store_true",
+        help="don't fail if benchmarks are skipped or have no baseline",
+    )
+    args = parser.parse_args(argv)
+    scale = dict(
+        wires=args.wires,
+        instances=args.instances,
+        flags=args.flags,
+        texts=args.texts,
+        depth=args.depth,
+        fanout=args.fanout,
+        symbols=args.symbols,
+    )
+
+    calibration = calibrate()
+    results = run(scale, args.repeat, args.only)
+    # the machine may have been busy during one of the calibrations
+    calibration = min(calibration, calibrate())
+    report = {
+        "scale": scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration": calibration,
+        "results": results,
+    }
+    print(f"{'calibration':>20} {calibration * 1e3:>10.2f}")
+    print(f"{'benchmark':>20} {'min [ms]':>10} {'median [ms]':>12}")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:>20} skipped: {result['skipped']}")
+        else:
+            print(
+                f"{name:>20} {result['min'] * 1e3:>10.2f} "
+                f"{result['median'] * 1e3:>12.2f}"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        problems = [] if args.allow_skip else unchecked(results)
+        if any(not optional for name, reason, optional in problems):
+            for name, reason, optional in problems:
+                print(f"Not saving a baseline, {name} was {reason}")
+            return 1
+        # skipped benchmarks get no baseline time, a later run with them records one
+        report["results"] = {
+            name: result for name, result in results.items() if "min" in result
+        }
+        # keep the thresholds that were tuned by hand
+        thresholds = {"default": DEFAULT_THRESHOLD}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                thresholds = json.load(f).get("thresholds", thresholds)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(report, thresholds=thresholds), f, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline {args.baseline}, run with --save-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["scale"] != scale:
+        print("The scale differs from the baseline, results are not compared")
+        return 0
+    speed = 1.0
+    if "calibration" in baseline:
+        speed = calibration / baseline["calibration"]
+        print(f"Baseline times are scaled by {speed:.2f} for the speed of this machine")
+    regressions = compare(results, baseline, speed)
+    for name, seconds, expected, threshold in regressions:
+        print(
+            f"Regression: {name} took {seconds * 1e3:.2f} ms, the scaled baseline is "
+            f"{expected * 1e3:.2f} ms with a threshold of {threshold}"
+        )
+    failed = bool(regressions)
+    for name, reason, optional in unchecked(results, baseline):
+        print(f"Unchecked: {name} was not compared, {reason}")
+        failed |= not optional and not args.allow_skip
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
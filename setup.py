@@ -14,12 +14,13 @@ setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     url='http://github.com/ahaensler/asc_viewer',
-    scripts=["bin/asc_viewer"],
+    scripts=["bin/asc_viewer", "bin/asc_export"],
     packages=["asc_viewer"],
     author="Adrian Haensler",
     license='MIT',
     python_requires=">=3.8.0",
     install_requires=[
+        "numpy",
         "rtreelib>=0.2.0",
         "wxPython>=4.2.0",
     ],
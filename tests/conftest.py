@@ -0,0 +1,84 @@
+import os
+import pytest
+from asc_viewer.schematic import Schematic
+from asc_viewer.symbol_library import SymbolLibrary
+from benchmarks.generator import BLOCK_ASY, RES_ASY
+
+
+def write_file(filename, text):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w", encoding="iso-8859-1") as f:
+        f.write(text)
+    return filename
+
+
+def write_asc(filename, lines):
+    """Writes an asc file from its element lines, after the header."""
+    lines = ["Version 4", "SHEET 1 880 680"] + lines
+    return write_file(filename, "\n".join(lines) + "\n")
+
+
+# a voltage divider between the flags in and 0
+DIVIDER = [
+    "WIRE 16 -32 16 16",
+    "WIRE 16 96 16 128",
+    "WIRE 16 192 16 224",
+    "FLAG 16 -32 in",
+    "FLAG 16 224 0",
+    "SYMBOL res 0 0 R0",
+    "SYMATTR InstName R1",
+    "SYMATTR Value 1k",
+    "SYMBOL res 0 112 R0",
+    "SYMATTR InstName R2",
+    "SYMATTR Value 2k",
+    "TEXT 0 300 Left 2 !.op",
+]
+
+
+def write_design(directory):
+    """Writes a top level with two instances of a block that contains the divider, and
+    returns the filename of the top level."""
+    write_file(os.path.join(directory, "divider.asy"), BLOCK_ASY)
+    write_asc(
+        os.path.join(directory, "divider.asc"),
+        [line.replace("FLAG 16 224 0", "FLAG 16 224 out") for line in DIVIDER],
+    )
+    return write_asc(
+        os.path.join(directory, "top.asc"),
+        [
+            "WIRE -64 0 -32 0",
+            "WIRE 32 0 96 0",
+            "WIRE 160 0 224 0",
+            "FLAG -64 0 vin",
+            "FLAG 224 0 0",
+            "SYMBOL divider 0 0 R0",
+            "SYMATTR InstName X1",
+            "SYMBOL divider 128 0 R0",
+            "SYMATTR InstName X2",
+        ],
+    )
+
+
+@pytest.fixture
+def symbol_dir(tmp_path):
+    """A library directory with the res symbol of benchmarks.generator."""
+    directory = tmp_path / "lib"
+    write_file(str(directory / "res.asy"), RES_ASY)
+    return str(directory)
+
+
+@pytest.fixture
+def library(symbol_dir):
+    return SymbolLibrary(symbol_dir, use_cache=False)
+
+
+@pytest.fixture
+def load(tmp_path, library):
+    """Returns a function that writes element lines to an asc file and loads it."""
+
+    def load(lines, name="test.asc"):
+        schematic = Schematic(library)
+        schematic.load(write_asc(str(tmp_path / name), lines))
+        return schematic
+
+    return load
@@ -0,0 +1,49 @@
+import math
+import subprocess
+import sys
+import pytest
+from asc_viewer.affine import Affine
+
+
+@pytest.mark.parametrize(
+    "mirror, rotation, point",
+    [
+        (False, 0, (16, 96)),
+        (False, 90, (-96, 16)),
+        (False, 180, (-16, -96)),
+        (False, 270, (96, -16)),
+        (True, 0, (-16, 96)),
+        (True, 90, (96, 16)),
+    ],
+)
+def test_orientation(mirror, rotation, point):
+    assert Affine.orientation(mirror, rotation).transform_point(16, 96) == point
+
+
+def test_orientations_are_exact_and_hashable():
+    matrices = {
+        Affine.orientation(m, r) for m in (False, True) for r in range(0, 720, 90)
+    }
+    assert len(matrices) == 8
+    assert all(isinstance(v, int) for m in matrices for v in m.get())
+
+
+def test_concat_applies_other_first():
+    m = Affine().translate(10, 0).rotate(math.pi / 2)
+    x, y = m.transform_point(1, 0)
+    assert (round(x, 9), round(y, 9)) == (10, 1)
+
+
+def test_invert():
+    m = Affine.orientation(True, 90).translate(5, -3)
+    x, y = m.invert().transform_point(*m.transform_point(7, 11))
+    assert (round(x, 9), round(y, 9)) == (7, 11)
+
+
+def test_model_does_not_import_wx():
+    # with wx blocked any import of it fails, the model must work regardless
+    code = (
+        "import sys; sys.modules['wx'] = None; import asc_viewer; "
+        "asc_viewer.Schematic(); assert 'asc_viewer.asc_canvas' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
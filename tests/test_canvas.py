@@ -0,0 +1,114 @@
+import pytest
+
+wx = pytest.importorskip("wx")
+
+from conftest import write_asc
+from asc_viewer.asc_canvas import AscCanvas
+from asc_viewer.vector_context import VectorContext
+
+
+@pytest.fixture(scope="module")
+def app():
+    if not wx.App.IsDisplayAvailable():
+        pytest.skip("wxPython needs a display")
+    return wx.App(False)
+
+
+@pytest.fixture
+def canvas(app, library, tmp_path):
+    frame = wx.Frame(None)
+    canvas = AscCanvas(frame, symbol_library=library)
+    yield canvas
+    frame.Destroy()
+
+
+def show(canvas, tmp_path, lines):
+    canvas.load_asc(write_asc(str(tmp_path / "test.asc"), lines))
+    return canvas.schematic
+
+
+def paint(canvas, rect, zoom=1):
+    """Paints rect into a VectorContext and returns the recorded items."""
+    gc = VectorContext(100, 100, canvas.resources.font_styles, canvas.gc)
+    canvas.paint(gc, rect, zoom)
+    return gc.items
+
+
+def texts(items):
+    return [item[1] for item in items if item[0] == "text"]
+
+
+LONG_VALUE = "a_very_long_value_that_reaches_far_beyond_the_symbol"
+
+
+def test_instance_is_painted_where_only_its_texts_reach(canvas, tmp_path):
+    schematic = show(
+        canvas,
+        tmp_path,
+        ["SYMBOL res 0 0 R0", "SYMATTR InstName R1", f"SYMATTR Value {LONG_VALUE}"],
+    )
+    instance = schematic.symbol_instances["R1"]
+    x1, y1, x2, y2 = canvas.instance_rect(instance)
+    extent = instance.get_extent()
+    assert x2 > extent[2] + 2 * canvas.pen_margin + 10
+    # the end of the value, far right of the symbol
+    assert LONG_VALUE in texts(paint(canvas, (x2 - 10, y1, x2, y2)))
+    assert texts(paint(canvas, (x2 + 20, y1, x2 + 30, y2))) == []
+
+
+RC = [
+    "WIRE 16 96 16 160",
+    "WIRE 16 160 96 160",
+    "WIRE 16 160 16 224",
+    "SYMBOL res 0 0 R0",
+    "SYMATTR InstName R1",
+    "TEXT 96 32 Left 2 ;comment",
+]
+
+
+def test_texts_are_skipped_below_text_zoom(canvas, tmp_path):
+    schematic = show(canvas, tmp_path, RC)
+    rect = schematic.get_extent()
+    assert "comment" in texts(paint(canvas, rect, canvas.lod_text_zoom))
+    assert texts(paint(canvas, rect, canvas.lod_text_zoom * 0.9)) == []
+
+
+def ops(items):
+    return [op for item in items if item[0] == "path" for op in item[1]]
+
+
+def test_junctions_are_skipped_below_junction_zoom(canvas, tmp_path):
+    schematic = show(canvas, tmp_path, RC)
+    rect = schematic.get_extent()
+    with_dots = ops(paint(canvas, rect, canvas.lod_junction_zoom))
+    without = ops(paint(canvas, rect, canvas.lod_junction_zoom * 0.9))
+    # the dot of the T-junction at (16, 160)
+    assert ("M", 14, 158) in with_dots
+    assert ("M", 14, 158) not in without
+
+
+def test_symbols_are_boxes_below_box_zoom(canvas, tmp_path):
+    schematic = show(canvas, tmp_path, ["SYMBOL res 0 0 R0", "SYMATTR InstName R1"])
+    rect = schematic.get_extent()
+    boxes = ops(paint(canvas, rect, canvas.lod_box_zoom * 0.9))
+    x1, y1, x2, y2 = schematic.symbol_instances["R1"].get_extent()
+    assert boxes == [
+        ("M", x1, y1),
+        ("L", x2, y1),
+        ("L", x2, y2),
+        ("L", x1, y2),
+        ("Z",),
+    ]
+    assert len(ops(paint(canvas, rect, canvas.lod_box_zoom))) > len(boxes)
+
+
+def test_export_paints_all_details(canvas, tmp_path):
+    show(canvas, tmp_path, RC)
+    filename = str(tmp_path / "test.svg")
+    canvas.export(filename, zoom=0.1)
+    with open(filename, encoding="utf-8") as f:
+        assert "comment" in f.read()
+    # thumbnails skip details like the screen
+    canvas.export(filename, zoom=0.1, full_detail=False)
+    with open(filename, encoding="utf-8") as f:
+        assert "comment" not in f.read()
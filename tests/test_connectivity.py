@@ -0,0 +1,65 @@
+from asc_viewer.connectivity import UnionFind
+
+
+def net_of(schematic, x, y):
+    return schematic.wire_points[(x, y)].net
+
+
+def test_union_find():
+    sets = UnionFind(6)
+    sets.union(0, 1)
+    sets.union(2, 3)
+    sets.union(1, 3)
+    assert sets.find(0) == sets.find(2)
+    assert sets.find(4) != sets.find(0)
+    assert sets.size[sets.find(0)] == 4
+
+
+def test_t_junction_connects(load):
+    schematic = load(["WIRE 0 0 128 0", "WIRE 64 0 64 64"])
+    assert len(schematic.nets) == 1
+    assert schematic.wire_points[(64, 0)].junction
+
+
+def test_crossing_wires_stay_apart(load):
+    schematic = load(["WIRE 0 0 128 0", "WIRE 64 -64 64 64"])
+    assert len(schematic.nets) == 2
+
+
+def test_wire_ends_connect(load):
+    schematic = load(["WIRE 0 0 64 0", "WIRE 64 0 64 64", "WIRE 64 64 128 64"])
+    assert len(schematic.nets) == 1
+
+
+def test_flags_join_nets_by_name(load):
+    schematic = load(
+        ["WIRE 0 0 64 0", "WIRE 0 128 64 128", "FLAG 0 0 out", "FLAG 64 128 out"]
+    )
+    assert list(schematic.nets) == ["out"]
+    assert len(schematic.nets["out"].wires) == 2
+
+
+def test_pins_on_wire_ends_and_t_junctions(load):
+    schematic = load(
+        [
+            "WIRE -64 16 96 16",  # pin A touches the interior of this wire
+            "WIRE 16 96 16 160",  # pin B touches the end of this wire
+            "SYMBOL res 0 0 R0",
+            "SYMATTR InstName R1",
+        ]
+    )
+    top, bottom = net_of(schematic, -64, 16), net_of(schematic, 16, 160)
+    assert top is not bottom
+    assert [c.pin.symbol_pin.name for c in top.connections] == ["A"]
+    assert [c.pin.symbol_pin.name for c in bottom.connections] == ["B"]
+
+
+def test_automatic_names(load):
+    schematic = load(["WIRE 0 0 64 0", "WIRE 0 64 64 64", "FLAG 0 64 0"])
+    assert sorted(schematic.nets) == ["0", "N001"]
+
+
+def test_unknown_symbol_is_reported(load):
+    schematic = load(["WIRE 0 0 64 0", "SYMBOL nosuch 0 0 R0", "SYMATTR InstName X1"])
+    assert schematic.diagnostics == ["Symbol not found nosuch"]
+    assert len(schematic.nets) == 1
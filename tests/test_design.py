@@ -0,0 +1,42 @@
+import os
+from conftest import write_asc, write_design, write_file
+from asc_viewer.design import Design
+from benchmarks.generator import BLOCK_ASY
+
+
+def test_views_share_templates(tmp_path, library):
+    directory = str(tmp_path / "project")
+    design = Design(write_design(directory), library)
+    views = list(design.walk())
+    assert [view.prefix for view in views] == ["", "X1", "X2"]
+    assert views[1].schematic is views[2].schematic
+    assert len(design.templates) == 2
+    assert design.view("X2") is not None
+    assert design.view("X2").instance is design.top.schematic.symbol_instances["X2"]
+    assert design.view("X3") is None
+    assert [name for name, instance in views[1].instances()] == ["X1.R1", "X1.R2"]
+    assert views[1].qualify_net("N001") == "X1.N001"
+    assert views[1].qualify_net("0") == "0"
+
+
+def test_block_next_to_schematic_wins(tmp_path, symbol_dir, library):
+    # a library symbol of the same name as the block, without a schematic
+    write_file(os.path.join(symbol_dir, "divider.asy"), BLOCK_ASY)
+    library.add_paths(symbol_dir)
+    directory = str(tmp_path / "project")
+    design = Design(write_design(directory), library)
+    instance = design.top.schematic.symbol_instances["X1"]
+    assert instance.symbol.filename == os.path.join(directory, "divider.asy")
+    assert design.block_file(instance) == os.path.join(directory, "divider.asc")
+    assert [view.prefix for view in design.walk()] == ["", "X1", "X2"]
+
+
+def test_library_symbol_is_no_block(tmp_path, symbol_dir, library):
+    write_file(os.path.join(symbol_dir, "divider.asy"), BLOCK_ASY)
+    library.add_paths(symbol_dir)
+    top = write_asc(
+        str(tmp_path / "project" / "top.asc"),
+        ["SYMBOL divider 0 0 R0", "SYMATTR InstName X1"],
+    )
+    design = Design(top, library)
+    assert [view.prefix for view in design.walk()] == [""]
@@ -0,0 +1,88 @@
+import math
+import random
+import numpy as np
+from asc_viewer.hit_test import nearest_segments, segment_distances
+
+
+def test_segment_distances():
+    coords = np.array([[0, 0, 10, 0], [0, 0, 0, 0], [5, 5, 5, 15]], dtype=float)
+    d = segment_distances(13, 4, coords)
+    assert d.tolist() == [5, math.hypot(13, 4), math.hypot(8, 1)]
+
+
+def test_nearest_segments():
+    coords = np.array([[0, 0, 10, 0], [0, 10, 10, 10]], dtype=float)
+    points = np.array([[5, 2], [5, 9], [5, 6]], dtype=float)
+    nearest, distance = nearest_segments(points, coords, [[0, 1], [0, 1], []])
+    assert nearest.tolist() == [0, 1, -1]
+    assert distance.tolist() == [2, 1, math.inf]
+
+
+def brute_force(schematic, x, y, radius):
+    """Returns the distance to the closest of all wires, or None if it exceeds radius."""
+    d = segment_distances(x, y, schematic.wire_coords).min()
+    return d if d <= radius else None
+
+
+def random_wires(rng, count):
+    lines = []
+    for _ in range(count):
+        x, y = rng.randrange(0, 40) * 16, rng.randrange(0, 40) * 16
+        if rng.random() < 0.5:
+            lines.append(f"WIRE {x} {y} {x + rng.randrange(1, 8) * 16} {y}")
+        else:
+            lines.append(f"WIRE {x} {y} {x} {y + rng.randrange(1, 8) * 16}")
+    return lines
+
+
+def test_nearest_wires_match_brute_force(load):
+    rng = random.Random(1)
+    schematic = load(random_wires(rng, 200))
+    radius = 5
+    sparse = [(rng.uniform(0, 700), rng.uniform(0, 700)) for _ in range(50)]
+    # many points per cell share their index queries
+    dense = [(x + 0.3, y + 0.7) for x in range(0, 700, 7) for y in range(0, 700, 7)]
+    for points in (sparse, dense, sparse[:1]):
+        wires = schematic.nearest_wires(points, radius)
+        # compares distances, ties between wires may resolve either way
+        found = [
+            wire and segment_distances(x, y, schematic.wire_coords[[wire.index]])[0]
+            for wire, (x, y) in zip(wires, points)
+        ]
+        assert found == [brute_force(schematic, x, y, radius) for x, y in points]
+
+
+def test_nearest_nets(load):
+    schematic = load(["WIRE 0 0 64 0", "WIRE 0 32 64 32", "FLAG 0 32 out"])
+    nets = schematic.nearest_nets([(32, 3), (32, 30), (32, 16)])
+    assert nets[0] is schematic.wires[0].net
+    assert nets[1].name == "out"
+    assert nets[2] is None
+    assert schematic.net_at(32, 30).name == "out"
+    assert schematic.nearest_wires(np.zeros((0, 2))) == []
+
+
+def test_empty_box_has_nothing_to_hover(load):
+    rng = random.Random(2)
+    schematic = load(
+        random_wires(rng, 50) + ["SYMBOL res 320 320 R0", "SYMATTR InstName R1"]
+    )
+    boxes = 0
+    for _ in range(200):
+        x, y = rng.uniform(0, 700), rng.uniform(0, 700)
+        box = schematic.empty_box(x, y, 32, 5)
+        if box is None:
+            continue
+        boxes += 1
+        x1, y1, x2, y2 = box
+        probes = [(x1, y1), (x2, y2), (x1, y2), (x2, y1), (x, y)]
+        assert schematic.nearest_wires(probes, 5) == [None] * 5
+        assert [schematic.instance_at(*p) for p in probes] == [None] * 5
+    assert boxes > 0
+
+
+def test_no_empty_box_near_elements(load):
+    schematic = load(["WIRE 0 0 64 0", "SYMBOL res 160 0 R0", "SYMATTR InstName R1"])
+    assert schematic.empty_box(32, 25, 32, 5) == (16, 9, 48, 41)
+    assert schematic.empty_box(32, 20, 32, 5) is None  # the wire is 4 below the box
+    assert schematic.empty_box(150, 50, 32, 5) is None  # overlaps the symbol
@@ -0,0 +1,84 @@
+import io
+import os
+from conftest import DIVIDER, write_asc, write_design, write_file
+from asc_viewer.design import Design
+from asc_viewer.netlist import NetlistWriter, write_netlist
+from benchmarks.generator import BLOCK_ASY
+
+
+def netlist(source, flatten=False):
+    f = io.StringIO()
+    count = write_netlist(source, f, flatten)
+    lines = f.getvalue().splitlines()
+    assert count == len(lines)
+    return lines
+
+
+def test_elements(load):
+    schematic = load(DIVIDER)
+    assert netlist(schematic)[1:] == ["R1 in N001 1k", "R2 N001 0 2k", ".op", ".end"]
+
+
+def test_unconnected_pins(load):
+    schematic = load(["SYMBOL res 0 0 R0", "SYMATTR InstName R1"])
+    assert netlist(schematic)[1] == "R1 NC_01 NC_02 R"
+
+
+def test_duplicate_and_missing_names(load):
+    schematic = load(
+        [
+            "SYMBOL res 0 0 R0",
+            "SYMATTR InstName R1",
+            "SYMBOL res 64 0 R0",
+            "SYMATTR InstName R1",
+            "SYMBOL res 128 0 R0",
+        ]
+    )
+    writer = NetlistWriter(schematic)
+    assert [line.split()[0] for line in writer.lines()] == ["*", "R1", "R1", ".end"]
+    assert len(writer.diagnostics) == 2
+
+
+def test_hierarchical(tmp_path, library):
+    lines = netlist(Design(write_design(str(tmp_path / "project")), library))
+    assert lines[1:3] == ["X1 vin N001 divider", "X2 N001 0 divider"]
+    assert lines[3:] == [
+        "",
+        ".subckt divider in out",
+        "R1 in N001 1k",
+        "R2 N001 out 2k",
+        ".op",
+        ".ends divider",
+        ".end",
+    ]
+
+
+def test_flattened(tmp_path, library):
+    design = Design(write_design(str(tmp_path / "project")), library)
+    lines = netlist(design, flatten=True)
+    assert lines[1:] == [
+        "R.X1.R1 vin X1.N001 1k",
+        "R.X1.R2 X1.N001 N001 2k",
+        "R.X2.R1 N001 X2.N001 1k",
+        "R.X2.R2 X2.N001 0 2k",
+        ".op",
+        ".end",
+    ]
+
+
+def test_recursive_block_is_reported_once(tmp_path, library, capsys):
+    directory = str(tmp_path / "project")
+    write_file(os.path.join(directory, "loop.asy"), BLOCK_ASY)
+    loop = ["SYMBOL res 0 0 R0", "SYMATTR InstName R1"]
+    loop += ["SYMBOL loop 128 0 R0", "SYMATTR InstName X1"]
+    write_asc(os.path.join(directory, "loop.asc"), loop)
+    top = write_asc(
+        os.path.join(directory, "top.asc"),
+        ["SYMBOL loop 0 0 R0", "SYMATTR InstName X1"],
+    )
+    design = Design(top, library)
+    assert [view.prefix for view in design.walk()] == ["", "X1"]
+    assert netlist(design, flatten=True)[1].startswith("R.X1.R1 ")
+    assert len(design.diagnostics) == 1
+    assert "Recursive block X1.X1" in design.diagnostics[0]
+    assert capsys.readouterr().out.count("Recursive block") == 1
@@ -0,0 +1,65 @@
+import marshal
+import pytest
+from asc_viewer.symbol import Symbol, parse_symbols
+from asc_viewer.symbol_library import SymbolLibrary
+from benchmarks.generator import write_symbols
+
+
+def geometry(symbol):
+    pins = [(pin.name, pin.order, pin.index, pin.x, pin.y) for pin in symbol.pins]
+    return (
+        symbol.lines,
+        symbol.circles,
+        symbol.arcs,
+        symbol.rectangles,
+        symbol.windows,
+        symbol.texts,
+        symbol.attrs,
+        pins,
+        symbol.get_extent(),
+    )
+
+
+@pytest.fixture
+def names(tmp_path):
+    return write_symbols(str(tmp_path), 40)
+
+
+def test_state_round_trip(tmp_path, names):
+    library = SymbolLibrary(str(tmp_path), use_cache=False)
+    filenames = [library.find(name) for name in names[:3]]
+    for filename, state in zip(filenames, marshal.loads(parse_symbols(filenames))):
+        symbol = Symbol(filename)
+        symbol.set_state(state)
+        parsed = Symbol(filename)
+        parsed.load()
+        assert symbol.loaded
+        assert geometry(symbol) == geometry(parsed)
+
+
+def test_serial(tmp_path, names):
+    library = SymbolLibrary(str(tmp_path), use_cache=False)
+    library.preload(names + ["nosuch"])
+    assert all(library[name].loaded for name in names)
+    assert library.executor is None
+
+
+def test_parallel(tmp_path, names):
+    library = SymbolLibrary(str(tmp_path), use_cache=False)
+    library.parallel_threshold = 0
+    library.chunk_size = 4
+    # the pool is kept, and later calls only parse symbols that aren't loaded
+    library.preload(names[:20], max_workers=2)
+    executor = library.executor
+    library.preload(names, max_workers=2)
+    assert library.executor is executor
+    try:
+        for name in names:
+            symbol = library[name]
+            parsed = Symbol(symbol.filename)
+            parsed.load()
+            assert symbol.loaded
+            assert geometry(symbol) == geometry(parsed)
+    finally:
+        library.close()
+    assert library.executor is None
@@ -0,0 +1,119 @@
+import random
+from conftest import write_asc
+from asc_viewer.schematic import Schematic
+
+
+def summary(schematic):
+    """Returns the connectivity and indexes of a schematic, without automatic net names
+    and object identities, so that a reloaded and a fresh schematic can be compared."""
+
+    def name(net):
+        return "" if net.name.startswith("N") else net.name
+
+    nets = sorted(
+        (
+            sorted((w.x0, w.y0, w.x1, w.y1) for w in net.wires),
+            sorted(
+                (c.instance.attrs["InstName"], c.pin.symbol_pin.name)
+                for c in net.connections
+            ),
+            name(net),
+        )
+        for net in schematic.nets.values()
+    )
+    return (
+        nets,
+        sorted(
+            str(entry.rect) + type(entry.data).__name__ for entry in schematic.rtree
+        ),
+        sorted(entry.rect for entry in schematic.wire_lookup),
+        sorted(entry.rect for entry in schematic.flag_lookup),
+        sorted((pos, name(net)) for pos, net in schematic.flag_nets.items()),
+        [
+            (pos, point.junction, point.direction, len(point.wires))
+            for pos, point in sorted(schematic.wire_points.items())
+        ],
+        schematic.get_extent(),
+        sorted(schematic.symbol_instances),
+    )
+
+
+def random_elements(rnd, names):
+    lines = []
+    for i in range(rnd.randrange(5, 30)):
+        x, y = rnd.randrange(0, 320, 16), rnd.randrange(0, 320, 16)
+        length = rnd.randrange(16, 160, 16)
+        if rnd.random() < 0.5:
+            lines.append(f"WIRE {x} {y} {x + length} {y}")
+        else:
+            lines.append(f"WIRE {x} {y} {x} {y + length}")
+    for i in range(rnd.randrange(0, 5)):
+        x, y = rnd.randrange(0, 320, 16), rnd.randrange(0, 320, 16)
+        lines.append(f"FLAG {x} {y} {rnd.choice(['a', 'b', '0'])}")
+    for i in range(rnd.randrange(0, 4)):
+        x, y = rnd.randrange(0, 320, 16), rnd.randrange(0, 320, 16)
+        rotation = rnd.choice([0, 90, 180, 270])
+        lines.append(f"SYMBOL res {x} {y} R{rotation}\nSYMATTR InstName R{next(names)}")
+    return lines
+
+
+def edit(rnd, lines, names):
+    lines = list(lines)
+    for i in range(rnd.randrange(1, 4)):
+        if rnd.random() < 0.4 and lines:
+            del lines[rnd.randrange(len(lines))]
+        else:
+            lines += random_elements(rnd, names)[:2]
+    return lines
+
+
+def test_reload_matches_fresh_load(tmp_path, library):
+    rnd = random.Random(1)
+    filename = str(tmp_path / "test.asc")
+    names = iter(range(1000000))
+    for trial in range(100):
+        lines = random_elements(rnd, names)
+        write_asc(filename, lines)
+        schematic = Schematic(library)
+        schematic.load(filename)
+        write_asc(filename, edit(rnd, lines, names))
+        schematic.reload()
+        fresh = Schematic(library)
+        fresh.load(filename)
+        assert summary(schematic) == summary(fresh), trial
+
+
+def test_reload_reports_changes(tmp_path, load):
+    schematic = load(["WIRE 0 0 64 0", "WIRE 0 64 64 64"])
+    wire = schematic.wires[0]
+    write_asc(str(tmp_path / "test.asc"), ["WIRE 0 0 64 0", "WIRE 0 128 64 128"])
+    changes = schematic.reload()
+    assert changes
+    assert [(w.y0, w.y1) for w in changes.wires[0]] == [(64, 64)]
+    assert [(w.y0, w.y1) for w in changes.wires[1]] == [(128, 128)]
+    assert schematic.wires[0] is wire  # unchanged wires keep their objects
+    assert not schematic.reload()
+
+
+def test_reload_keeps_automatic_net_names(tmp_path, load):
+    lines = ["WIRE 0 0 64 0", "WIRE 0 64 64 64", "WIRE 0 128 64 128"]
+    schematic = load(lines)
+    names = {(w.x0, w.y0): w.net.name for w in schematic.wires}
+    write_asc(str(tmp_path / "test.asc"), lines[1:] + ["WIRE 0 192 64 192"])
+    schematic.reload()
+    for wire in schematic.wires:
+        if (wire.x0, wire.y0) in names:
+            assert wire.net.name == names[(wire.x0, wire.y0)]
+    assert len(set(net.name for net in schematic.nets.values())) == 3
+
+
+def test_reload_with_missing_symbol(tmp_path, load, capsys):
+    schematic = load(["WIRE 0 0 64 0"])
+    write_asc(
+        str(tmp_path / "test.asc"),
+        ["WIRE 0 0 64 0", "SYMBOL nosuch 0 0 R0", "SYMATTR InstName X1"],
+    )
+    schematic.reload()
+    assert schematic.diagnostics == ["Symbol not found nosuch"]
+    assert len(schematic.instances) == 1
+    assert "X1" not in schematic.symbol_instances
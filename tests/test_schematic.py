@@ -0,0 +1,49 @@
+import gc
+import threading
+import pytest
+from asc_viewer.schematic import Schematic
+
+
+def test_load_restores_garbage_collection(load):
+    assert gc.isenabled()
+    load(["SYMBOL res 0 0 R0", "SYMATTR InstName R1"])
+    assert gc.isenabled()
+    gc.disable()
+    try:
+        load(["SYMBOL res 0 0 R0", "SYMATTR InstName R1"])
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_failed_load_restores_garbage_collection(library, tmp_path):
+    with pytest.raises(OSError):
+        Schematic(library).load(str(tmp_path / "missing.asc"))
+    assert gc.isenabled()
+
+
+def test_concurrent_loads_keep_collection_paused(load, library):
+    filename = load(["SYMBOL res 0 0 R0", "SYMATTR InstName R1"]).filename
+    started, finished = threading.Event(), threading.Event()
+    enabled = []
+
+    def inner_progress(phase, count):
+        started.set()
+        finished.wait(5)
+        enabled.append(gc.isenabled())
+
+    inner = threading.Thread(
+        target=Schematic(library).load, args=(filename, inner_progress)
+    )
+
+    def outer_progress(phase, count):
+        if not inner.is_alive() and not started.is_set():
+            inner.start()
+            started.wait(5)
+
+    # the outer load ends while the inner one still runs
+    Schematic(library).load(filename, outer_progress)
+    finished.set()
+    inner.join()
+    assert enabled and not any(enabled)
+    assert gc.isenabled()
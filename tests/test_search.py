@@ -0,0 +1,96 @@
+import pytest
+from asc_viewer.search import EXACT, OTHER, PREFIX, SearchIndex, SearchResults
+
+ELEMENTS = [
+    "WIRE 0 0 64 0",
+    "WIRE 0 128 64 128",
+    "FLAG 0 0 out",
+    "FLAG 0 128 out2",
+    "SYMBOL res 0 0 R0",
+    "SYMATTR InstName R1",
+    "SYMATTR Value 10k",
+    "SYMBOL res 64 0 R0",
+    "SYMATTR InstName R10",
+    "SYMATTR Value 1k",
+    "TEXT 0 300 Left 2 ;output stage",
+]
+
+
+@pytest.fixture
+def schematic(load):
+    return load(ELEMENTS)
+
+
+def texts(hits):
+    return [(hit.kind, hit.text) for hit in hits]
+
+
+def test_exact(schematic):
+    hits = schematic.search("r1", "exact")
+    assert texts(hits) == [("instance", "R1")]
+    assert hits[0].match == EXACT
+    assert (hits[0].x, hits[0].y) == (0, 0)
+
+
+def test_prefix(schematic):
+    hits = schematic.search("out", "prefix")
+    assert texts(hits) == [("net", "out"), ("net", "out2")]
+    assert [hit.match for hit in hits] == [EXACT, PREFIX]
+
+
+def test_substring_ranking(schematic):
+    # prefix matches rank first, then shorter texts
+    hits = schematic.search("1")
+    assert texts(hits) == [
+        ("attribute", "1k"),
+        ("attribute", "10k"),
+        ("instance", "R1"),
+        ("instance", "R10"),
+    ]
+    assert [hit.match for hit in hits] == [PREFIX, PREFIX, OTHER, OTHER]
+    assert texts(schematic.search("stage")) == [("text", ";output stage")]
+
+
+def test_case_sensitive(schematic):
+    assert schematic.search("r1", "exact", case_sensitive=True) == []
+    assert texts(schematic.search("R1", "prefix", case_sensitive=True)) == [
+        ("instance", "R1"),
+        ("instance", "R10"),
+    ]
+
+
+def test_regex(schematic):
+    assert texts(schematic.search(r"^r\d$", "regex")) == [("instance", "R1")]
+
+
+def test_unknown_mode(schematic):
+    with pytest.raises(ValueError):
+        schematic.search("r1", "fuzzy")
+
+
+def test_results_wrap_around(schematic):
+    results = SearchResults(schematic.search("R1", "prefix"))
+    assert len(results) == 2
+    first = results.next()
+    assert results.next() is not first
+    assert results.next() is first
+    assert results.previous() is not first
+    assert SearchResults([]).next() is None
+
+
+def test_narrowed_substring_search_matches_fresh_search(schematic):
+    typed = ["o", "ou", "out", "outp", "out", "t", "T", "utput s", "1", "10"]
+    for case_sensitive in (False, True):
+        for query in typed:
+            fresh = SearchIndex(schematic).search(query, "substring", case_sensitive)
+            narrowed = schematic.search(query, "substring", case_sensitive)
+            assert texts(narrowed) == texts(fresh), query
+
+
+def test_narrowing_follows_other_modes(schematic):
+    assert texts(schematic.search("out2", "substring")) == [("net", "out2")]
+    assert texts(schematic.search("r1", "prefix")) == [
+        ("instance", "R1"),
+        ("instance", "R10"),
+    ]
+    assert len(schematic.search("out", "substring")) == 3
@@ -0,0 +1,90 @@
+import random
+import pytest
+from asc_viewer.spatial_index import GridIndex, RTreeIndex
+
+
+def random_items(rng, count):
+    items = []
+    for i in range(count):
+        x, y = rng.randrange(-500, 500), rng.randrange(-500, 500)
+        # mostly small elements, some that span many cells, and points
+        w, h = rng.choice([(0, 0), (16, 0), (0, 64), (40, 80), (400, 16)])
+        items.append((f"item{i}", (x, y, x + w, y + h)))
+    return items
+
+
+def brute_force(items, loc):
+    if len(loc) == 2:
+        loc = loc * 2
+    x1, y1, x2, y2 = loc
+    return sorted(
+        data
+        for data, r in items
+        if r[0] <= x2 and r[2] >= x1 and r[1] <= y2 and r[3] >= y1
+    )
+
+
+def index_items(index_type, items):
+    if index_type is RTreeIndex:
+        # rtreelib only finds overlaps with a positive area
+        return [(data, r) for data, r in items if r[0] < r[2] and r[1] < r[3]]
+    return items
+
+
+def queries(rng):
+    for _ in range(100):
+        # between grid points, so that edges of items and queries don't touch
+        x, y = rng.randrange(-600, 600) + 0.5, rng.randrange(-600, 600) + 0.5
+        yield (x, y)
+        yield (x, y, x + rng.randrange(0, 300), y + rng.randrange(0, 300))
+
+
+@pytest.mark.parametrize("index_type", [GridIndex, RTreeIndex])
+def test_query_matches_brute_force(index_type):
+    rng = random.Random(1)
+    items = index_items(index_type, random_items(rng, 300))
+    index = index_type(items)
+    assert len(index) == len(items)
+    for loc in queries(rng):
+        found = [entry.data for entry in index.query(loc)]
+        assert sorted(found) == brute_force(items, loc), loc
+
+
+@pytest.mark.parametrize("index_type", [GridIndex, RTreeIndex])
+def test_remove_and_insert(index_type):
+    rng = random.Random(2)
+    items = index_items(index_type, random_items(rng, 200))
+    index = index_type(items)
+    removed = {data for data, rect in items[::3]}
+    index.remove(list(removed))
+    items = [item for item in items if item[0] not in removed]
+    added = index_items(index_type, random_items(random.Random(3), 20))
+    for data, rect in added:
+        index.insert("new " + data, rect)
+    items += [("new " + data, rect) for data, rect in added]
+    assert len(index) == len(items)
+    for loc in queries(rng):
+        found = [entry.data for entry in index.query(loc)]
+        assert sorted(found) == brute_force(items, loc), loc
+
+
+def test_grid_finds_touching_and_flat_items():
+    wires = [("h", (0, 32, 64, 32)), ("v", (64, 0, 64, 32)), ("dot", (96, 96, 96, 96))]
+    index = GridIndex(wires)
+    assert sorted(entry.data for entry in index.query((64, 32))) == ["h", "v"]
+    assert [entry.data for entry in index.query((16, 32))] == ["h"]
+    assert [entry.data for entry in index.query((80, 80, 96, 96))] == ["dot"]
+
+
+def test_grid_removes_by_identity():
+    a, b = [1], [1]  # equal but distinct
+    index = GridIndex([(a, (0, 0, 10, 10)), (b, (0, 0, 10, 10))])
+    index.remove([a])
+    assert [entry.data for entry in index.query((5, 5))] == [b]
+
+
+def test_grid_cell_size_follows_extent():
+    index = GridIndex([(i, (i * 100, 0, i * 100 + 10, 10)) for i in range(100)])
+    assert index.cell_size > 16
+    assert GridIndex([(0, (0, 0, 1, 1))]).cell_size == 16
+    assert list(GridIndex().query((0, 0))) == []
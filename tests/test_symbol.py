@@ -0,0 +1,36 @@
+import os
+import pytest
+from asc_viewer.affine import Affine
+from asc_viewer.symbol import Symbol
+from asc_viewer.vector_context import VectorContext
+
+ORIENTATIONS = [(m, r) for m in (False, True) for r in (0, 90, 180, 270)]
+
+
+@pytest.fixture
+def symbol(symbol_dir):
+    symbol = Symbol(os.path.join(symbol_dir, "res.asy"))
+    symbol.load()
+    return symbol
+
+
+def test_paths_are_transformed_per_orientation(symbol):
+    gc = VectorContext(100, 100, {})
+    for mirror, rotation in ORIENTATIONS:
+        matrix = Affine.orientation(mirror, rotation)
+        path, rectangles = symbol.get_paths(gc, matrix)
+        # LINE Normal 16 88 16 96 ends at pin B
+        assert ("L", *matrix.transform_point(16, 96)) in path.ops
+        assert ("M", *matrix.transform_point(0, 24)) in rectangles.ops
+
+
+def test_paths_are_cached_per_orientation(symbol):
+    gc = VectorContext(100, 100, {})
+    paths = [symbol.get_paths(gc, Affine.orientation(*o)) for o in ORIENTATIONS]
+    # and the untransformed path they are made of
+    assert len(symbol.paths) == 8 + 1
+    for (mirror, rotation), cached in zip(ORIENTATIONS, paths):
+        # equal matrices of other instances hit the cache
+        assert (
+            symbol.get_paths(gc, Affine.orientation(mirror, rotation + 360)) is cached
+        )
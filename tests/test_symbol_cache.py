@@ -0,0 +1,87 @@
+import os
+import pickle
+from conftest import write_file
+from asc_viewer.symbol_cache import CACHE_VERSION, SymbolCache
+from asc_viewer.symbol_library import SymbolLibrary
+from benchmarks.generator import RES_ASY
+
+
+def parse_and_save(symbol_dir, cache_dir):
+    cache = SymbolCache(symbol_dir, str(cache_dir))
+    symbol = cache.get(os.path.join(symbol_dir, "res.asy"))
+    symbol.load()
+    cache.save()
+    return symbol
+
+
+def test_round_trip(symbol_dir, tmp_path):
+    parsed = parse_and_save(symbol_dir, tmp_path)
+    cache = SymbolCache(symbol_dir, str(tmp_path))
+    symbol = cache.get(os.path.join(symbol_dir, "res.asy"))
+    assert symbol.loaded  # restored without parsing
+    assert [pin.name for pin in symbol.pins] == ["A", "B"]
+    assert symbol.lines == parsed.lines
+    assert symbol.attrs == parsed.attrs
+    assert symbol.get_extent() == parsed.get_extent()
+
+
+def test_changed_file_is_parsed_again(symbol_dir, tmp_path):
+    parse_and_save(symbol_dir, tmp_path)
+    write_file(os.path.join(symbol_dir, "res.asy"), RES_ASY + "SYMATTR Value2 x\n")
+    symbol = SymbolCache(symbol_dir, str(tmp_path)).get(
+        os.path.join(symbol_dir, "res.asy")
+    )
+    assert not symbol.loaded
+
+
+def test_other_version_is_not_unpickled(symbol_dir, tmp_path):
+    parse_and_save(symbol_dir, tmp_path)
+    cache = SymbolCache(symbol_dir, str(tmp_path))
+    # a cache file of another version with entries that can't be unpickled, like
+    # symbols whose class has changed
+    with open(cache.filename, "wb") as f:
+        pickle.dump((CACHE_VERSION - 1, cache.directory), f)
+        f.write(b"garbage")
+    assert cache.read() == {}
+
+
+def test_damaged_cache_is_a_miss(symbol_dir, tmp_path):
+    cache = SymbolCache(symbol_dir, str(tmp_path))
+    with open(cache.filename, "wb") as f:
+        pickle.dump((CACHE_VERSION, cache.directory), f)
+        # unpickling fails with an AttributeError, not an OSError
+        f.write(pickle.dumps(os.path.join).replace(b"join", b"nojn"))
+    assert cache.read() == {}
+    symbol = cache.get(os.path.join(symbol_dir, "res.asy"))
+    symbol.load()
+    assert len(symbol.pins) == 2
+
+
+def test_library_uses_cache(symbol_dir, tmp_path):
+    library = SymbolLibrary(symbol_dir, cache_dir=str(tmp_path))
+    library["res"].load()
+    library.save_cache()
+    library = SymbolLibrary(symbol_dir, cache_dir=str(tmp_path))
+    assert library["res"].loaded
+
+
+class Canvas:
+    """Aligns texts like an AscCanvas with fonts of the given size."""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def align_text(self, x, y, text, align, size, rotation):
+        return x, y - size * self.scale, y
+
+
+def test_text_positions_are_not_cached(symbol_dir, tmp_path):
+    cache = SymbolCache(symbol_dir, str(tmp_path))
+    symbol = cache.get(os.path.join(symbol_dir, "res.asy"))
+    symbol.load()
+    assert symbol.align_texts(Canvas(10)) == [(40, -12)]
+    cache.save()
+    # another process with other fonts aligns the texts again
+    symbol = SymbolCache(symbol_dir, str(tmp_path)).get(symbol.filename)
+    assert symbol.loaded
+    assert symbol.align_texts(Canvas(1)) == [(40, 6)]
@@ -0,0 +1,71 @@
+import os
+import pytest
+from conftest import write_file
+from asc_viewer.symbol import Symbol
+from asc_viewer.symbol_library import SymbolLibrary, normalize_name
+from benchmarks.generator import RES_ASY
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A library tree like the one of LTspice, with a name in two groups."""
+    root = str(tmp_path / "sym")
+    for name in (
+        "res.asy",
+        "Opamps/LT1001.asy",
+        "Misc/signal.asy",
+        "Opamps/x/signal.asy",
+    ):
+        write_file(os.path.join(root, name), RES_ASY)
+    write_file(os.path.join(root, "readme.txt"), "")
+    return root
+
+
+def test_normalize_name():
+    assert normalize_name("Opamps\\\\LT1001") == "opamps/lt1001"
+    assert normalize_name("/Misc//signal/") == "misc/signal"
+
+
+def test_qualified_and_bare_names(tree):
+    library = SymbolLibrary(tree, use_cache=False)
+    filename = os.path.join(tree, "Opamps", "LT1001.asy")
+    assert library.find("Opamps\\\\LT1001") == filename
+    assert library.find("opamps/lt1001") == filename
+    assert library.find("LT1001") == filename
+    assert library.find("Other\\\\LT1001") == filename  # falls back to the bare name
+    assert library.find("nosuch") is None
+    assert len(library) == 4
+
+
+def test_first_bare_name_wins(tree):
+    library = SymbolLibrary(tree, use_cache=False)
+    assert library.find("signal") == os.path.join(tree, "Misc", "signal.asy")
+    assert library.find("Opamps\\\\x\\\\signal") == os.path.join(
+        tree, "Opamps", "x", "signal.asy"
+    )
+
+
+def test_symbols_are_created_once_and_lazily(tree):
+    library = SymbolLibrary(tree, use_cache=False)
+    symbol = library["lt1001"]
+    assert not symbol.loaded
+    assert library.get("Opamps\\\\LT1001") is symbol
+    assert library.get("nosuch", "default") == "default"
+    with pytest.raises(KeyError):
+        library["nosuch"]
+
+
+def test_non_recursive_paths(tree):
+    library = SymbolLibrary()
+    library.add_paths(tree, recursive=False)
+    assert list(library) == ["res"]
+
+
+def test_overrides(tree):
+    library = SymbolLibrary(tree, use_cache=False)
+    symbol = Symbol(os.path.join(tree, "res.asy"))
+    library["Opamps\\\\LT1001"] = symbol
+    assert library.get("opamps/lt1001") is symbol
+    assert "my\\\\own" not in library
+    library["my\\\\own"] = symbol
+    assert "MY/OWN" in library
@@ -0,0 +1,27 @@
+import os
+from conftest import write_asc
+from asc_viewer.thumbnail_cache import ThumbnailCache
+
+
+def test_key_follows_content_and_symbol_paths(tmp_path):
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"))
+    a = write_asc(str(tmp_path / "a.asc"), ["WIRE 0 0 64 0"])
+    b = write_asc(str(tmp_path / "b.asc"), ["WIRE 0 0 64 0"])
+    assert cache.get(a) == cache.get(b)  # copies share a thumbnail
+    assert cache.get(a, ["lib"]) != cache.get(a)
+    assert cache.get(a, ["lib"]) == cache.get(a, [os.path.abspath("lib")])
+    assert cache.get(a, ["lib", "sym"]) != cache.get(a, ["sym", "lib"])
+    before = cache.get(a)
+    write_asc(a, ["WIRE 0 0 128 0"])
+    assert cache.get(a) != before
+
+
+def test_index_is_saved(tmp_path):
+    filename = write_asc(str(tmp_path / "a.asc"), ["WIRE 0 0 64 0"])
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"))
+    thumbnail = cache.get(filename, ["lib"])
+    cache.save()
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"))
+    assert cache.read().keys() == {filename}
+    assert cache.get(filename, ["lib"]) == thumbnail
+    assert not cache.changed  # the file wasn't hashed again
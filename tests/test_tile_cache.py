@@ -0,0 +1,42 @@
+from asc_viewer.tile_cache import TileCache
+
+
+def test_validate_clears_on_new_token():
+    cache = TileCache(tile_size=16)
+    cache.validate((1, 0))
+    cache.put((1, 0, 0), "tile")
+    cache.validate((1, 0))
+    assert len(cache) == 1
+    cache.validate((1, 1))  # e.g. the schematic was reloaded
+    assert len(cache) == 0
+    assert cache.get((1, 0, 0)) is None
+
+
+def test_discard_scales_rect_by_zoom_of_tile():
+    cache = TileCache(tile_size=100)
+    for zoom in (1, 2):
+        for col in range(3):
+            cache.put((zoom, col, 0), "tile")
+    # logical x 120..130 is in column 1 at zoom 1 and column 2 at zoom 2
+    cache.discard((120, 10, 130, 20))
+    assert sorted(cache.tiles) == [(1, 0, 0), (1, 2, 0), (2, 0, 0), (2, 1, 0)]
+
+
+def test_discard_keeps_touching_tiles():
+    cache = TileCache(tile_size=100)
+    for col in range(3):
+        cache.put((1, col, 0), "tile")
+    cache.discard((100, 0, 200, 50))  # exactly column 1
+    assert sorted(cache.tiles) == [(1, 0, 0), (1, 2, 0)]
+
+
+def test_least_recently_used_tile_is_evicted():
+    cache = TileCache(tile_size=16, max_bytes=3 * 4 * 16 * 16)
+    assert cache.max_tiles == 3
+    for col in range(3):
+        cache.put((1, col, 0), col)
+    assert cache.get((1, 0, 0)) == 0  # now the most recently used
+    cache.put((1, 3, 0), 3)
+    assert len(cache) == 3
+    assert cache.get((1, 1, 0)) is None
+    assert cache.get((1, 0, 0)) == 0